@@ -0,0 +1,509 @@
+"""
+Audio Metadata Module - parse audio headers once at ingestion time
+
+Clips are probed when they enter the system (upload, text-to-speech creation,
+the ingest_audio command) and the results are stored on the Audio row, so
+playback planning reads durations from the database instead of reopening files.
+
+Supported without extra dependencies:
+- WAV (RIFF): duration, sample rate, channels and codec from the fmt chunk;
+  peak and RMS level (dBFS) for integer and floating-point PCM
+- MP3/MP2: duration, sample rate, channels and codec from MPEG frame headers
+  (Xing/Info/VBRI frame counts for VBR files, bitrate otherwise); peak and
+  RMS need a decoder and are left empty
+
+Every file also gets a SHA-256 content hash.
+"""
+
+import array
+import hashlib
+import logging
+import math
+import operator
+import os
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per chunk when hashing and scanning samples
+READ_SIZE = 1 << 16
+
+# Bytes scanned for the first MPEG frame after any ID3v2 tag
+MPEG_SYNC_SEARCH = 1 << 16
+
+# Audio model fields filled by ingest_audio()
+METADATA_FIELDS = ('duration', 'sample_rate', 'channels', 'codec', 'peak_dbfs', 'rms_dbfs', 'content_hash')
+
+WAVE_CODECS = {1: 'pcm', 3: 'pcm_float', 6: 'alaw', 7: 'mulaw', 0x55: 'mp3', 0xFFFE: 'extensible'}
+
+
+class AudioMetadataError(ValueError):
+    """Raised when a file is missing or its format is not recognised."""
+
+
+class AudioMetadata(NamedTuple):
+    """Properties of one audio file."""
+    duration: float
+    sample_rate: int
+    channels: int
+    codec: str
+    peak_dbfs: Optional[float] = None
+    rms_dbfs: Optional[float] = None
+    content_hash: str = ''
+
+
+def _dbfs(value: float) -> Optional[float]:
+    """Level relative to full scale, None for digital silence."""
+    if value <= 0:
+        return None
+    return round(20 * math.log10(value), 2)
+
+
+# ---------------------------------------------------------------------------
+# WAV
+# ---------------------------------------------------------------------------
+
+def _read_wave_header(f) -> Tuple[dict, int, int]:
+    """
+    Walk RIFF chunks up to the data chunk.
+
+    Returns:
+        (fmt fields, data offset, data size)
+    """
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        raise AudioMetadataError('Not a RIFF/WAVE file')
+
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise AudioMetadataError('WAV file has no data chunk')
+        chunk_id, size = header[:4], struct.unpack('<I', header[4:])[0]
+        if chunk_id == b'fmt ':
+            body = f.read(size)
+            if len(body) < 16:
+                raise AudioMetadataError('Truncated fmt chunk')
+            tag, channels, rate, byte_rate, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+            if tag == 0xFFFE and len(body) >= 26:
+                # WAVE_FORMAT_EXTENSIBLE: the real format is the first two bytes of the subformat GUID
+                tag = struct.unpack('<H', body[24:26])[0]
+            fmt = {'tag': tag, 'channels': channels, 'rate': rate,
+                   'byte_rate': byte_rate, 'block_align': block_align, 'bits': bits}
+            if size % 2:
+                f.seek(1, os.SEEK_CUR)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise AudioMetadataError('WAV data chunk before fmt chunk')
+            offset = f.tell()
+            file_size = os.fstat(f.fileno()).st_size
+            # Streamed WAVs may carry a placeholder size; clamp to the file
+            return fmt, offset, min(size, file_size - offset)
+        else:
+            f.seek(size + size % 2, os.SEEK_CUR)
+
+
+def _pcm_levels(f, size: int, bits: int, is_float: bool = False) -> Tuple[Optional[float], Optional[float]]:
+    """Peak and RMS (0..1) of integer or floating-point PCM samples."""
+    width = bits // 8
+    if width not in ((4, 8) if is_float else (1, 2, 3, 4)):
+        return None, None
+    full_scale = 1.0 if is_float else float(1 << (bits - 1))
+
+    peak = 0
+    squares = 0.0
+    count = 0
+    remaining = size - size % width
+    read_size = READ_SIZE - READ_SIZE % (width * 4)
+    while remaining > 0:
+        chunk = f.read(min(read_size, remaining))
+        chunk = chunk[:len(chunk) - len(chunk) % width]
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        if NUMPY_AVAILABLE:
+            samples = _numpy_samples(chunk, width, is_float)
+            if samples.size:
+                peak = max(peak, float(numpy.abs(samples).max()))
+                squares += float(numpy.dot(samples, samples))
+                count += samples.size
+            continue
+
+        samples = _array_samples(chunk, width, is_float)
+        if samples:
+            peak = max(peak, max(samples), -min(samples))
+            squares += math.fsum(map(operator.mul, samples, samples))
+            count += len(samples)
+
+    if not count:
+        return None, None
+    return peak / full_scale, math.sqrt(squares / count) / full_scale
+
+
+def _numpy_samples(chunk: bytes, width: int, is_float: bool):
+    if is_float:
+        return numpy.frombuffer(chunk, dtype='<f4' if width == 4 else '<f8').astype(numpy.float64)
+    if width == 1:
+        return numpy.frombuffer(chunk, dtype=numpy.uint8).astype(numpy.float64) - 128
+    if width == 3:
+        raw = numpy.frombuffer(chunk, dtype=numpy.uint8).reshape(-1, 3).astype(numpy.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        return numpy.where(values >= 1 << 23, values - (1 << 24), values).astype(numpy.float64)
+    dtype = {2: '<i2', 4: '<i4'}[width]
+    return numpy.frombuffer(chunk, dtype=dtype).astype(numpy.float64)
+
+
+def _array_samples(chunk: bytes, width: int, is_float: bool) -> List[float]:
+    if width == 1 and not is_float:
+        return [b - 128 for b in chunk]
+    if width == 3:
+        return [
+            int.from_bytes(chunk[i:i + 3], 'little', signed=True)
+            for i in range(0, len(chunk), 3)
+        ]
+    if is_float:
+        typecode = 'f' if width == 4 else 'd'
+    else:
+        typecode = 'h' if width == 2 else 'i'
+    samples = array.array(typecode)
+    samples.frombytes(chunk)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+
+def _probe_wave(f, analyze: bool) -> AudioMetadata:
+    fmt, offset, size = _read_wave_header(f)
+    if not fmt['rate'] or not fmt['channels']:
+        raise AudioMetadataError('WAV fmt chunk has no sample rate or channels')
+
+    if fmt['block_align']:
+        duration = (size // fmt['block_align']) / fmt['rate']
+    else:
+        duration = size / fmt['byte_rate'] if fmt['byte_rate'] else 0.0
+
+    peak = rms = None
+    if analyze and fmt['tag'] in (1, 3):
+        f.seek(offset)
+        peak, rms = _pcm_levels(f, size, fmt['bits'], is_float=fmt['tag'] == 3)
+
+    return AudioMetadata(
+        duration=round(duration, 3),
+        sample_rate=fmt['rate'],
+        channels=fmt['channels'],
+        codec=WAVE_CODECS.get(fmt['tag'], f'wav_{fmt["tag"]:#06x}'),
+        peak_dbfs=_dbfs(peak) if peak is not None else None,
+        rms_dbfs=_dbfs(rms) if rms is not None else None,
+    )
+
+
+# ---------------------------------------------------------------------------
+# MPEG audio
+# ---------------------------------------------------------------------------
+
+# Bitrates in kbps indexed by [table][bitrate index]
+_MPEG_BITRATES = {
+    'V1L1': (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    'V1L2': (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    'V1L3': (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    'V2L1': (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    'V2L23': (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Sample rates indexed by version bits (0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1)
+_MPEG_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+class _MpegFrame(NamedTuple):
+    version: int
+    layer: int
+    bitrate: int
+    sample_rate: int
+    channels: int
+    samples: int
+    length: int
+
+
+def _parse_mpeg_header(header: bytes) -> Optional[_MpegFrame]:
+    """Decode a 4-byte MPEG audio frame header, None if invalid."""
+    b1, b2, b3 = header[1], header[2], header[3]
+    if header[0] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    if version == 3:
+        table = f'V1L{layer}'
+    else:
+        table = 'V2L1' if layer == 1 else 'V2L23'
+    bitrate = _MPEG_BITRATES[table][bitrate_index] * 1000
+    sample_rate = _MPEG_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if b3 >> 6 == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == 3:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    return _MpegFrame(version, layer, bitrate, sample_rate, channels, samples, length)
+
+
+def _id3v2_size(head: bytes) -> int:
+    if head[:3] != b'ID3' or len(head) < 10:
+        return 0
+    size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _vbr_frame_count(frame: _MpegFrame, data: bytes) -> Optional[int]:
+    """Frame count from a Xing/Info or VBRI header in the first frame."""
+    if frame.version == 3:
+        side_info = 17 if frame.channels == 1 else 32
+    else:
+        side_info = 9 if frame.channels == 1 else 17
+    xing = data[4 + side_info:4 + side_info + 12]
+    if xing[:4] in (b'Xing', b'Info') and len(xing) == 12:
+        flags = struct.unpack('>I', xing[4:8])[0]
+        if flags & 0x01:
+            return struct.unpack('>I', xing[8:12])[0]
+    vbri = data[36:36 + 18]
+    if vbri[:4] == b'VBRI' and len(vbri) == 18:
+        return struct.unpack('>I', vbri[14:18])[0]
+    return None
+
+
+def _probe_mpeg(f) -> AudioMetadata:
+    head = f.read(10)
+    start = _id3v2_size(head)
+    f.seek(start)
+    data = f.read(MPEG_SYNC_SEARCH)
+
+    frame = None
+    position = data.find(b'\xff')
+    while 0 <= position <= len(data) - 4:
+        candidate = _parse_mpeg_header(data[position:position + 4])
+        if candidate:
+            # Require the next frame to line up, so stray 0xFF bytes don't match
+            following = data[position + candidate.length:position + candidate.length + 4]
+            if len(following) < 4 or _parse_mpeg_header(following):
+                frame = candidate
+                break
+        position = data.find(b'\xff', position + 1)
+    if frame is None:
+        raise AudioMetadataError('No MPEG audio frame found')
+
+    frames = _vbr_frame_count(frame, data[position:position + 64])
+    if frames:
+        duration = frames * frame.samples / frame.sample_rate
+    else:
+        file_size = os.fstat(f.fileno()).st_size
+        audio_bytes = file_size - start - position
+        # An ID3v1 tag at the end is not audio
+        if file_size >= 128:
+            f.seek(-128, os.SEEK_END)
+            if f.read(3) == b'TAG':
+                audio_bytes -= 128
+        duration = audio_bytes * 8 / frame.bitrate
+
+    return AudioMetadata(
+        duration=round(duration, 3),
+        sample_rate=frame.sample_rate,
+        channels=frame.channels,
+        codec=f'mp{frame.layer}',
+    )
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def wave_format(path: str) -> Optional[dict]:
+    """
+    Read the fmt chunk of a WAV file.
+
+    Args:
+        path: File path
+
+    Returns:
+        Dict with 'tag', 'channels', 'rate', 'byte_rate', 'block_align' and
+        'bits', or None if the file is not a readable WAV
+    """
+    try:
+        with open(path, 'rb') as f:
+            fmt, _, _ = _read_wave_header(f)
+    except (OSError, struct.error, AudioMetadataError):
+        return None
+    return fmt
+
+
+def content_hash(path: str) -> str:
+    """
+    SHA-256 of a file, read in chunks.
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_audio(path: str, analyze: bool = True) -> AudioMetadata:
+    """
+    Read an audio file's properties from its headers.
+
+    Args:
+        path: File path
+        analyze: Also scan samples for peak/RMS and hash the file contents;
+                 False reads headers only
+
+    Returns:
+        AudioMetadata
+
+    Raises:
+        AudioMetadataError: If the file is missing or not WAV/MPEG audio
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read(4) == b'RIFF':
+                f.seek(0)
+                metadata = _probe_wave(f, analyze)
+            else:
+                f.seek(0)
+                metadata = _probe_mpeg(f)
+    except OSError as e:
+        raise AudioMetadataError(f'Cannot read {path}: {e}')
+    except struct.error as e:
+        raise AudioMetadataError(f'Truncated header in {path}: {e}')
+
+    if analyze:
+        metadata = metadata._replace(content_hash=content_hash(path))
+    return metadata
+
+
+def ingest_audio(audio, save: bool = True) -> bool:
+    """
+    Probe an Audio row's file and store the results on the row.
+
+    A file that cannot be probed leaves the fields unchanged; the clip
+    stays playable, it just has no metadata.
+
+    Args:
+        audio: Audio instance
+        save: Save the changed fields
+
+    Returns:
+        True if metadata was stored
+    """
+    try:
+        metadata = probe_audio(audio.path)
+    except Exception as e:
+        # Metadata must never block ingestion; any parse failure just leaves it empty
+        logger.warning(f"No metadata for audio {audio.pk} ({audio.path}): {e}")
+        return False
+
+    for field in METADATA_FIELDS:
+        setattr(audio, field, getattr(metadata, field))
+    if save and audio.pk:
+        audio.save(update_fields=list(METADATA_FIELDS))
+    return True
+
+
+_duration_lock = threading.Lock()
+_duration_cache: Dict[str, Tuple[Tuple[int, int], Optional[float]]] = {}
+
+
+def get_duration(path: str) -> Optional[float]:
+    """
+    Header-only duration of a file that is not in the Audio table.
+
+    Cached per path until the file's size or mtime changes.
+
+    Args:
+        path: File path
+
+    Returns:
+        Duration in seconds, None if unknown
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _duration_lock:
+        cached = _duration_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    try:
+        duration = probe_audio(path, analyze=False).duration
+    except Exception as e:
+        logger.debug(f"No duration for {path}: {e}")
+        duration = None
+    with _duration_lock:
+        _duration_cache[path] = (signature, duration)
+    return duration
+
+
+def sequence_duration(paths: Iterable[str], default: float = 0.0) -> float:
+    """
+    Estimate how long a playback sequence takes.
+
+    Durations come from Audio rows and AudioFragment rows (time
+    announcements), less any trimmed silence, in two queries; other files
+    (bells, temporary clips) fall back to a cached header read.
+
+    Args:
+        paths: File paths in playback order
+        default: Seconds assumed for a file whose duration is unknown
+
+    Returns:
+        Total seconds
+    """
+    from django.db.models import Q
+    from data.models import Audio, AudioFragment
+
+    paths = list(paths)
+    known = {}
+    rows = Audio.objects.filter(
+        Q(path__in=set(paths)) | Q(playback_path__in=set(paths)), duration__isnull=False
+    ).values_list('path', 'playback_path', 'duration', 'trim_start', 'trim_end')
+    for path, playback_path, duration, trim_start, trim_end in rows:
+        known[path] = max(0.0, duration - (trim_start or 0) - (trim_end or 0))
+        if playback_path:
+            known[playback_path] = known[path]
+    fragments = AudioFragment.objects.filter(path__in=set(paths), duration__isnull=False)
+    for path, duration, trim_start, trim_end in fragments.values_list('path', 'duration', 'trim_start', 'trim_end'):
+        known.setdefault(path, max(0.0, duration - trim_start - trim_end))
+    total = 0.0
+    for path in paths:
+        duration = known.get(path)
+        if duration is None:
+            duration = get_duration(path)
+        total += default if duration is None else duration
+    return total
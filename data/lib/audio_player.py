@@ -10,7 +10,8 @@ import os
 import logging
 import json
 import threading
-from typing import List, Optional, Dict, Any
+import time
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
 # Lazy import pygame to allow mocking in tests
@@ -21,8 +22,26 @@ except ImportError:
     PYGAME_AVAILABLE = False
     logging.warning("pygame not available - audio playback disabled")
 
+from data.lib.audio_metadata import get_duration
+from data.lib.clip_cache import CLIP_CACHE_MAX_SECONDS, get_clip_cache
+from data.lib.loudness import db_to_volume, playback_gains
+from data.lib.pcm_stream import PcmStream, open_stream
+from data.lib.silence import Trim, playback_trims
+
 logger = logging.getLogger(__name__)
 
+# Mixer output format; uploads are transcoded to match (data.lib.transcoder)
+MIXER_FREQUENCY = 44100
+MIXER_SIZE = -16  # signed 16-bit
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 512
+
+# Times per second a playing file is checked for stop requests and trim points
+POLL_RATE = 50
+
+# Mixer channel reserved for cached clips and streamed tracks
+PLAYER_CHANNEL = 0
+
 
 class AudioPlayer:
     """
@@ -64,7 +83,9 @@ class AudioPlayer:
             
         if not self._initialized:
             try:
-                pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+                pygame.mixer.init(frequency=MIXER_FREQUENCY, size=MIXER_SIZE,
+                                  channels=MIXER_CHANNELS, buffer=MIXER_BUFFER)
+                pygame.mixer.set_reserved(PLAYER_CHANNEL + 1)
                 self._initialized = True
                 logger.info("pygame mixer initialized successfully")
             except Exception as e:
@@ -192,6 +213,7 @@ class AudioPlayer:
                 'current_index': 0
             }
             self._set_state(state)
+            gains, trims = self._playback_plan(sound_paths)
             
             # Play each file sequentially
             for idx, path in enumerate(sound_paths):
@@ -206,16 +228,7 @@ class AudioPlayer:
                 
                 try:
                     logger.info(f"Playing audio file [{idx+1}/{len(sound_paths)}]: {path}")
-                    pygame.mixer.music.load(path)
-                    pygame.mixer.music.play()
-                    
-                    # Wait for playback to finish
-                    while pygame.mixer.music.get_busy():
-                        if self._stop_event.is_set():
-                            pygame.mixer.music.stop()
-                            break
-                        pygame.time.Clock().tick(10)  # Check 10 times per second
-                    
+                    self._play_file(path, gains.get(path), trims.get(path))
                 except Exception as e:
                     logger.error(f"Error playing file {path}: {e}")
                     # Continue to next file
@@ -229,6 +242,110 @@ class AudioPlayer:
             self._clear_state()
             self._stop_event.clear()
     
+    def _playback_plan(self, sound_paths: List[str]) -> Tuple[Dict[str, float], Dict[str, Trim]]:
+        """Stored loudness gains and trim points for the sequence; none on error."""
+        try:
+            return playback_gains(sound_paths), playback_trims(sound_paths)
+        except Exception as e:
+            logger.warning(f"Could not load playback gains and trims: {e}")
+            return {}, {}
+    
+    def _play_file(self, path: str, gain_db: Optional[float], trim: Optional[Trim]):
+        """
+        Play one file and wait for it to end.
+        
+        Short clips play from the in-RAM clip cache, PCM WAVs in the mixer
+        format are streamed from a memory map, anything else goes through
+        the music decoder.
+        """
+        volume = db_to_volume(gain_db)
+        duration = get_duration(path)
+        if duration is not None and duration <= CLIP_CACHE_MAX_SECONDS:
+            self._play_clip(path, volume, trim)
+            return
+        
+        stream = open_stream(path, MIXER_FREQUENCY, MIXER_CHANNELS, abs(MIXER_SIZE))
+        if stream:
+            with stream:
+                self._play_stream(stream, volume, trim)
+            return
+        
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.set_volume(volume)
+        deadline = self._start(path, trim)
+        # Wait for playback to finish, or for the trailing silence
+        self._wait(pygame.mixer.music, deadline)
+    
+    def _wait(self, player, deadline: Optional[float] = None):
+        """Wait while a music player or channel is busy, stopping on request or at the deadline."""
+        while player.get_busy():
+            if self._stop_event.is_set() or (deadline and time.monotonic() >= deadline):
+                player.stop()
+                break
+            pygame.time.Clock().tick(POLL_RATE)
+    
+    def _load_clip(self, path: str, trim: Optional[Trim]):
+        """Decode a clip into a Sound without its silence; returns (sound, bytes)."""
+        sound = pygame.mixer.Sound(path)
+        frame_bytes = MIXER_CHANNELS * abs(MIXER_SIZE) // 8
+        if not trim:
+            return sound, int(sound.get_length() * MIXER_FREQUENCY) * frame_bytes
+        raw = sound.get_raw()
+        start = int(trim.start * MIXER_FREQUENCY) * frame_bytes
+        end = max(start, len(raw) - int(trim.end * MIXER_FREQUENCY) * frame_bytes)
+        return pygame.mixer.Sound(buffer=raw[start:end]), end - start
+    
+    def _play_clip(self, path: str, volume: float, trim: Optional[Trim]):
+        """Play a short clip from the clip cache."""
+        variant = (trim.start, trim.end) if trim else ()
+        sound = get_clip_cache().get(path, variant, lambda: self._load_clip(path, trim))
+        sound.set_volume(volume)
+        channel = pygame.mixer.Channel(PLAYER_CHANNEL)
+        channel.play(sound)
+        self._wait(channel)
+    
+    def _play_stream(self, stream: PcmStream, volume: float, trim: Optional[Trim]):
+        """Queue a memory-mapped track on the player channel one chunk at a time."""
+        channel = pygame.mixer.Channel(PLAYER_CHANNEL)
+        chunks = stream.chunks(trim.start, trim.end) if trim else stream.chunks()
+        for index, chunk in enumerate(chunks):
+            sound = pygame.mixer.Sound(buffer=chunk)
+            sound.set_volume(volume)
+            if index == 0:
+                channel.play(sound)
+                continue
+            # Keep one chunk queued behind the one playing
+            while channel.get_queue() is not None:
+                if self._stop_event.is_set():
+                    channel.stop()
+                    return
+                pygame.time.Clock().tick(POLL_RATE)
+            channel.queue(sound)
+        self._wait(channel)
+    
+    def _start(self, path: str, trim: Optional[Trim]) -> Optional[float]:
+        """
+        Start the loaded file after its leading silence.
+        
+        Returns:
+            time.monotonic() at which to stop before the trailing silence, or None
+        """
+        if not trim:
+            pygame.mixer.music.play()
+            return None
+        
+        start = trim.start
+        try:
+            pygame.mixer.music.play(start=start)
+        except Exception as e:
+            # Not every music format can seek; play the leading silence instead
+            logger.debug(f"Cannot start {path} at {start}s: {e}")
+            pygame.mixer.music.play()
+            start = 0.0
+        if trim.duration is None or not trim.end:
+            return None
+        return time.monotonic() + max(0.0, trim.duration - start - trim.end)
+    
     def stop(self):
         """
         Stop current audio playback.
@@ -0,0 +1,109 @@
+"""
+Clip Cache Module - keep short decoded fragments in RAM
+
+Time announcements, bells and synthesized phrases are a few seconds long and
+are played over and over. AudioPlayer decodes each one once into a mixer
+Sound (already trimmed of silence) and keeps it in a least-recently-used
+cache bounded by bytes; long tracks are streamed instead (data.lib.pcm_stream).
+Entries are keyed by the file's mtime and size, so a replaced file is
+decoded again.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Clips at most this long are cached; longer ones are streamed or decoded per play
+CLIP_CACHE_MAX_SECONDS = 15.0
+
+# Cache size when settings.CLIP_CACHE_MB is unset
+DEFAULT_CACHE_MB = 32
+
+
+class ClipCache:
+    """
+    Byte-bounded LRU cache of decoded clips.
+
+    Thread-safe; the loader runs outside the lock.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = getattr(settings, 'CLIP_CACHE_MB', DEFAULT_CACHE_MB) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Bytes held."""
+        return self._bytes
+
+    def get(self, path: str, variant: Tuple, loader: Callable[[], Tuple[Any, int]]) -> Any:
+        """
+        Get a clip, decoding it on a miss.
+
+        Args:
+            path: File path
+            variant: Anything else the decoded clip depends on (e.g. trim points)
+            loader: Called on a miss; returns (clip, size in bytes)
+
+        Returns:
+            The cached or newly loaded clip
+
+        Raises:
+            OSError: If the file cannot be stat'ed
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size) + tuple(variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        clip, size = loader()
+        if size > self.max_bytes:
+            return clip
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (clip, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return clip
+
+    def clear(self):
+        """Drop every clip."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache: Optional[ClipCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_clip_cache() -> ClipCache:
+    """
+    Get the singleton clip cache.
+
+    Returns:
+        ClipCache instance
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ClipCache()
+        return _cache
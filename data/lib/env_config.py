@@ -0,0 +1,109 @@
+"""
+Cached snapshot of the project's .env file.
+
+The .env check runs on every request to the main page. Instead of parsing the
+file each time, a snapshot is kept in memory and revalidated with a single
+os.stat() at most once per CHECK_INTERVAL seconds; it is re-parsed only when
+the file's inode, mtime or size changes.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from decouple import RepositoryEnv
+
+# Project root (same location the views used for .env)
+ENV_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), '.env'
+)
+
+# Variables the application cannot start without
+REQUIRED_VARS = ["DEBUG", "SECRET_KEY", "ALLOWED_HOSTS", "CSRF_TRUSTED_ORIGINS"]
+
+# Minimum seconds between stat() calls for the same file
+CHECK_INTERVAL = 1.0
+
+
+class EnvSnapshot(NamedTuple):
+    """Parsed state of a .env file at one point in time."""
+    exists: bool
+    values: Dict[str, str]
+    missing_vars: List[str]
+
+    @property
+    def is_complete(self) -> bool:
+        """True if the file exists and every required variable is set."""
+        return self.exists and not self.missing_vars
+
+
+_lock = threading.Lock()
+_cache: Dict[str, dict] = {}
+
+
+def _file_key(path: str) -> Optional[tuple]:
+    """Identity of the file on disk, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _parse(path: str, key: Optional[tuple]) -> EnvSnapshot:
+    """Parse the file and work out which required variables are missing."""
+    values = {}
+    if key is not None:
+        try:
+            values = RepositoryEnv(path).data
+        except OSError:
+            key = None
+
+    # Like decouple.Config, real environment variables take precedence
+    missing = [var for var in REQUIRED_VARS if not (os.environ.get(var) or values.get(var))]
+    return EnvSnapshot(exists=key is not None, values=values, missing_vars=missing)
+
+
+def get_env_snapshot(env_path: Optional[str] = None, max_age: float = CHECK_INTERVAL) -> EnvSnapshot:
+    """
+    Get the cached .env snapshot, revalidating it if it is older than max_age.
+
+    Args:
+        env_path: Path of the .env file (defaults to the project .env)
+        max_age: Seconds a snapshot may be served without a stat(); 0 forces a check
+
+    Returns:
+        EnvSnapshot for the file
+    """
+    path = env_path or ENV_PATH
+    now = time.monotonic()
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry and now - entry['checked_at'] < max_age:
+            return entry['snapshot']
+
+    key = _file_key(path)
+    if entry and entry['key'] == key:
+        snapshot = entry['snapshot']
+    else:
+        snapshot = _parse(path, key)
+
+    with _lock:
+        _cache[path] = {'key': key, 'checked_at': now, 'snapshot': snapshot}
+    return snapshot
+
+
+def invalidate_env_snapshot(env_path: Optional[str] = None):
+    """
+    Drop cached snapshots so the next call re-reads the file.
+
+    Args:
+        env_path: Path to invalidate; None clears every cached path
+    """
+    with _lock:
+        if env_path is None:
+            _cache.clear()
+        else:
+            _cache.pop(env_path, None)
@@ -0,0 +1,136 @@
+"""
+Keyset Pagination Module - cursor-based paging for JSON listings
+
+Instead of OFFSET (which scans and discards every earlier row), each page
+continues after the sort key of the previous page's last row:
+
+    WHERE (time > :t) OR (time = :t AND id > :id) ORDER BY time, id LIMIT n
+
+With an index on the sort columns every page costs the same, however deep.
+The cursor is the last row's sort key, JSON-encoded in URL-safe base64.
+
+Nullable sort columns are ordered NULLS FIRST ascending and NULLS LAST
+descending on every database, and the continuation condition accounts for it.
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.db.models import F, Q, QuerySet
+
+# Rows per page when the client does not ask for a size
+DEFAULT_LIMIT = 50
+
+# Largest page a client may request
+MAX_LIMIT = 200
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode sort key values as an opaque cursor.
+
+    Args:
+        values: Sort key of the last row on the page
+
+    Returns:
+        URL-safe cursor string
+    """
+    encoded = [v.isoformat() if isinstance(v, (date, datetime, time)) else v for v in values]
+    raw = json.dumps(encoded, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_limit(value: Optional[str], default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    """
+    Parse a page size from a query parameter.
+
+    Raises:
+        ValueError: If the value is not a positive integer
+    """
+    if value in (None, ''):
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
+
+
+def _after(fields: Sequence[Tuple[str, bool]], values: Sequence[Any]) -> Q:
+    """Condition selecting rows that sort after the given key."""
+    (name, descending), rest = fields[0], fields[1:]
+    value = values[0]
+    tail = _after(rest, values[1:]) if rest else None
+    is_null = Q(**{f'{name}__isnull': True})
+
+    if descending:
+        # NULLS LAST: after a NULL only other NULLs (tie-broken by the tail) remain
+        if value is None:
+            return is_null & tail if tail is not None else Q(pk__in=[])
+        condition = Q(**{f'{name}__lt': value}) | is_null
+    else:
+        # NULLS FIRST: after a NULL come the remaining NULLs and every non-NULL
+        if value is None:
+            condition = ~is_null
+            return condition | (is_null & tail) if tail is not None else condition
+        condition = Q(**{f'{name}__gt': value})
+
+    if tail is not None:
+        condition |= Q(**{name: value}) & tail
+    return condition
+
+
+def keyset_page(queryset: QuerySet, ordering: Sequence[str], cursor: Optional[str],
+                limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of a queryset.
+
+    Args:
+        queryset: Filtered queryset
+        ordering: Local field names, '-' prefix for descending; the last one
+                  must be unique (normally 'id' or '-id')
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Rows per page
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor does not match the ordering
+    """
+    fields = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+    queryset = queryset.order_by(*[
+        F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_first=True)
+        for name, descending in fields
+    ])
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise ValueError('Invalid cursor')
+        queryset = queryset.filter(_after(fields, values))
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], name) for name, _ in fields])
+    return rows, next_cursor
@@ -0,0 +1,80 @@
+"""
+Incremental log tailing helpers.
+
+Reads only the bytes appended to a log file since a given offset so that
+progress endpoints (polling or Server-Sent Events) never re-read the whole file.
+"""
+
+import json
+import os
+from typing import Optional, Tuple
+
+# Upper bound for a single read so one event never carries megabytes of output
+MAX_CHUNK_BYTES = 64 * 1024
+
+
+def read_log_chunk(path: str, offset: int = 0, max_bytes: int = MAX_CHUNK_BYTES,
+                   final: bool = False) -> Tuple[str, int]:
+    """
+    Read new log content starting at a byte offset.
+
+    Only complete lines are returned; a trailing partial line is left for the
+    next call. If the file shrank (truncated by a new run) reading restarts at 0.
+
+    Args:
+        path: Log file path
+        offset: Byte offset already consumed by the caller
+        max_bytes: Maximum number of bytes to read in one call
+        final: Also return a trailing partial line (writer has finished)
+
+    Returns:
+        Tuple (text, new_offset). text is '' when nothing new is available.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return '', offset
+
+    if offset < 0 or size < offset:
+        offset = 0
+    if size == offset:
+        return '', offset
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+
+    end = len(data) - 1 if final else data.rfind(b'\n')
+    if end == -1:
+        # No complete line yet; wait for more output unless the buffer is full
+        if len(data) < max_bytes:
+            return '', offset
+        end = len(data) - 1
+
+    data = data[:end + 1]
+    return data.decode('utf-8', errors='replace'), offset + len(data)
+
+
+def format_sse(data, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """
+    Format one Server-Sent Events message.
+
+    Args:
+        data: String payload, or any JSON-serialisable object
+        event: Optional event name
+        event_id: Optional id (the client echoes it back as Last-Event-ID)
+
+    Returns:
+        SSE-encoded message terminated by a blank line
+    """
+    if not isinstance(data, str):
+        data = json.dumps(data, ensure_ascii=False)
+
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    for line in data.splitlines() or ['']:
+        lines.append(f"data: {line}")
+    return '\n'.join(lines) + '\n\n'
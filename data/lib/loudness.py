@@ -0,0 +1,480 @@
+"""
+Loudness Module - measure each clip once, apply a stored gain at playback
+
+Uploads, text-to-speech clips and bell sounds are mastered at very different
+levels, so announcements jump in volume between clips. Each clip is measured
+once, when it becomes ready for playback or through the analyze_loudness
+command, and the gain that brings it to the target level is stored on the
+row. AudioPlayer looks the gains up for a whole sequence and sets the mixer
+volume per clip, so playing a clip never re-reads or analyses its samples.
+
+Measurement (ITU-R BS.1770-4, vectorized with NumPy):
+- Integrated loudness (LUFS): K-weighting applied by FFT convolution in
+  chunks, mean square per 100 ms step, 400 ms blocks with 75 % overlap,
+  absolute gate at -70 LUFS and relative gate 10 LU below the ungated level
+- True peak (dBTP): 4x oversampling through a polyphase windowed-sinc filter
+
+pygame's mixer volume is 0..1, so the stored gain only ever attenuates: clips
+louder than the target are turned down, quieter ones play at full scale.
+NumPy is optional; without it clips are not analysed and play at unity gain.
+"""
+
+import logging
+import math
+import os
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from data.lib.audio_metadata import AudioMetadataError, _numpy_samples, _read_wave_header
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Target integrated loudness when settings.LOUDNESS_TARGET_LUFS is unset (EBU R128)
+DEFAULT_TARGET_LUFS = -23.0
+
+# Highest true peak a gain may produce
+TRUE_PEAK_CEILING = -1.0
+
+# Audio model fields filled by analyze_audio()
+LOUDNESS_FIELDS = ('loudness_lufs', 'true_peak_dbtp', 'gain_db')
+
+# BS.1770 gating block, step between blocks and gates
+BLOCK_SECONDS = 0.4
+STEP_SECONDS = 0.1
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+# K-weighting impulse response kept for the FFT convolution; its tail has
+# decayed far below 16-bit resolution well before 100 ms
+KWEIGHT_SECONDS = 0.1
+FFT_SIZE = 1 << 16
+
+# True-peak oversampling factor and filter taps per phase
+OVERSAMPLE = 4
+TAPS_PER_PHASE = 12
+
+
+class LoudnessError(ValueError):
+    """Raised when a file's samples cannot be read."""
+
+
+class Loudness(NamedTuple):
+    """Measurement of one clip."""
+    loudness_lufs: Optional[float]   # None for silence
+    true_peak_dbtp: Optional[float]  # None for digital silence
+
+
+# ---------------------------------------------------------------------------
+# Samples
+# ---------------------------------------------------------------------------
+
+def _read_wave_samples(path: str):
+    with open(path, 'rb') as f:
+        fmt, offset, size = _read_wave_header(f)
+        if fmt['tag'] not in (1, 3) or not fmt['channels']:
+            raise LoudnessError(f'{path} is not PCM audio')
+        is_float = fmt['tag'] == 3
+        width = fmt['bits'] // 8
+        if width not in ((4, 8) if is_float else (1, 2, 3, 4)):
+            raise LoudnessError(f'Unsupported sample width {fmt["bits"]} bits in {path}')
+        f.seek(offset)
+        data = f.read(size - size % fmt['block_align'])
+
+    samples = _numpy_samples(data, width, is_float)
+    if not is_float:
+        samples /= float(1 << (fmt['bits'] - 1))
+    return samples.reshape(-1, fmt['channels']), fmt['rate']
+
+
+def _decode_samples(path: str):
+    from data.lib.audio_player import MIXER_CHANNELS, MIXER_FREQUENCY
+    from data.lib.transcoder import TranscodeError, decode_pygame
+
+    try:
+        raw = decode_pygame(path)
+    except TranscodeError as e:
+        raise LoudnessError(f'Cannot decode {path}: {e}')
+    samples = numpy.frombuffer(raw, dtype='<i2').astype(numpy.float64) / 32768.0
+    return samples.reshape(-1, MIXER_CHANNELS), MIXER_FREQUENCY
+
+
+def load_samples(path: str) -> Tuple['numpy.ndarray', int]:
+    """
+    Read a file as floating-point samples.
+
+    PCM WAVs (including the transcoded playback copies) are read directly;
+    anything else is decoded by pygame into the mixer format.
+
+    Args:
+        path: File path
+
+    Returns:
+        (samples shaped (frames, channels) in -1..1, sample rate)
+
+    Raises:
+        LoudnessError: If the file is missing or cannot be decoded
+    """
+    try:
+        with open(path, 'rb') as f:
+            is_wave = f.read(4) == b'RIFF'
+        if is_wave:
+            return _read_wave_samples(path)
+    except OSError as e:
+        raise LoudnessError(f'Cannot read {path}: {e}')
+    except AudioMetadataError as e:
+        raise LoudnessError(str(e))
+    return _decode_samples(path)
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _biquad_response(b, a, z):
+    return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+
+def kweighting_response(rate: int, n: int):
+    """
+    Frequency response of the BS.1770 K-weighting filter on an rfft grid.
+
+    The two biquads (high shelf, then high pass) are derived for any sample
+    rate with the same analogue prototype libebur128 uses, so 48 kHz gives
+    the coefficients printed in the standard.
+
+    Args:
+        rate: Sample rate
+        n: FFT size
+
+    Returns:
+        Complex array of n // 2 + 1 bins
+    """
+    z = numpy.exp(-2j * numpy.pi * numpy.fft.rfftfreq(n))
+
+    k = math.tan(math.pi * 1681.974450955533 / rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = _biquad_response(
+        ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0),
+        (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0),
+        z,
+    )
+
+    k = math.tan(math.pi * 38.13547087602444 / rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    highpass = _biquad_response(
+        (1.0, -2.0, 1.0),
+        (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0),
+        z,
+    )
+    return shelf * highpass
+
+
+def _kweight(samples, rate: int):
+    """K-weight every channel with overlap-add FFT convolution."""
+    taps = max(1, int(rate * KWEIGHT_SECONDS))
+    fft_size = FFT_SIZE
+    while fft_size < 4 * taps:
+        fft_size *= 2
+    impulse = numpy.fft.irfft(kweighting_response(rate, fft_size), fft_size)[:taps]
+    response = numpy.fft.rfft(impulse, fft_size)[:, None]
+
+    frames = samples.shape[0]
+    segment = fft_size - taps + 1
+    out = numpy.zeros((frames + taps - 1, samples.shape[1]))
+    for start in range(0, frames, segment):
+        chunk = samples[start:start + segment]
+        filtered = numpy.fft.irfft(numpy.fft.rfft(chunk, fft_size, axis=0) * response, fft_size, axis=0)
+        end = min(start + fft_size, out.shape[0])
+        out[start:end] += filtered[:end - start]
+    return out[:frames]
+
+
+def _channel_weights(channels: int):
+    if channels == 1:
+        # The mixer plays a mono clip on both outputs
+        from data.lib.audio_player import MIXER_CHANNELS
+        return numpy.array([float(MIXER_CHANNELS)])
+    weights = numpy.ones(channels)
+    if channels == 6:
+        # 5.1: LFE excluded, surrounds weighted +1.5 dB
+        weights[3] = 0.0
+        weights[4:] = 1.41
+    return weights
+
+
+def _loudness(power) -> 'numpy.ndarray':
+    with numpy.errstate(divide='ignore'):
+        return -0.691 + 10 * numpy.log10(power)
+
+
+def integrated_loudness(samples, rate: int) -> Optional[float]:
+    """
+    Gated integrated loudness.
+
+    A clip shorter than one 400 ms block is measured as a single block.
+
+    Args:
+        samples: Array shaped (frames, channels) in -1..1
+        rate: Sample rate
+
+    Returns:
+        LUFS, or None if every block is below the absolute gate
+    """
+    if not samples.size:
+        return None
+    squares = _kweight(samples, rate) ** 2
+
+    step = max(1, int(round(rate * STEP_SECONDS)))
+    steps_per_block = int(round(BLOCK_SECONDS / STEP_SECONDS))
+    n_steps = squares.shape[0] // step
+    if n_steps < steps_per_block:
+        blocks = squares.mean(axis=0, keepdims=True)
+    else:
+        # Mean square per 100 ms step; each block averages four consecutive steps
+        means = squares[:n_steps * step].reshape(n_steps, step, -1).mean(axis=1)
+        totals = numpy.cumsum(numpy.vstack([numpy.zeros((1, means.shape[1])), means]), axis=0)
+        blocks = (totals[steps_per_block:] - totals[:-steps_per_block]) / steps_per_block
+
+    power = blocks @ _channel_weights(samples.shape[1])
+    levels = _loudness(power)
+    gated = levels > ABSOLUTE_GATE
+    if not gated.any():
+        return None
+    relative = _loudness(power[gated].mean()) + RELATIVE_GATE
+    gated &= levels > relative
+    return round(float(_loudness(power[gated].mean())), 2)
+
+
+def _oversampling_phases():
+    """Polyphase components of a Hann-windowed sinc interpolator."""
+    length = OVERSAMPLE * TAPS_PER_PHASE + 1
+    n = numpy.arange(length) - (length - 1) / 2
+    kernel = numpy.sinc(n / OVERSAMPLE) * numpy.hanning(length + 2)[1:-1]
+    return [kernel[phase::OVERSAMPLE] for phase in range(OVERSAMPLE)]
+
+
+def true_peak(samples) -> Optional[float]:
+    """
+    Highest absolute level between and at the samples.
+
+    Args:
+        samples: Array shaped (frames, channels) in -1..1
+
+    Returns:
+        dBTP, or None for digital silence
+    """
+    if not samples.size:
+        return None
+    peak = float(numpy.abs(samples).max())
+    phases = _oversampling_phases()
+    for channel in samples.T:
+        for taps in phases:
+            peak = max(peak, float(numpy.abs(numpy.convolve(channel, taps)).max()))
+    if peak <= 0:
+        return None
+    return round(20 * math.log10(peak), 2)
+
+
+def measure_file(path: str) -> Loudness:
+    """
+    Measure a file's integrated loudness and true peak.
+
+    Args:
+        path: File path
+
+    Returns:
+        Loudness
+
+    Raises:
+        LoudnessError: If NumPy is missing or the file cannot be read
+    """
+    if not NUMPY_AVAILABLE:
+        raise LoudnessError('numpy not available')
+    samples, rate = load_samples(path)
+    return Loudness(integrated_loudness(samples, rate), true_peak(samples))
+
+
+def target_loudness() -> float:
+    """Target integrated loudness from settings."""
+    return float(getattr(settings, 'LOUDNESS_TARGET_LUFS', DEFAULT_TARGET_LUFS))
+
+
+def compute_gain(loudness_lufs: Optional[float], true_peak_dbtp: Optional[float],
+                 target: Optional[float] = None) -> Optional[float]:
+    """
+    Playback gain that moves a clip towards the target level.
+
+    The gain never lifts the true peak above TRUE_PEAK_CEILING and never
+    exceeds 0 dB, because the mixer volume can only attenuate.
+
+    Args:
+        loudness_lufs: Measured integrated loudness
+        true_peak_dbtp: Measured true peak
+        target: Target LUFS, settings.LOUDNESS_TARGET_LUFS by default
+
+    Returns:
+        Gain in dB (<= 0), or None for silence (played at unity)
+    """
+    if loudness_lufs is None:
+        return None
+    gain = (target_loudness() if target is None else target) - loudness_lufs
+    if true_peak_dbtp is not None:
+        gain = min(gain, TRUE_PEAK_CEILING - true_peak_dbtp)
+    return round(min(gain, 0.0), 2)
+
+
+def db_to_volume(gain_db: Optional[float]) -> float:
+    """
+    Mixer volume for a gain.
+
+    Args:
+        gain_db: Gain in dB, None for unity
+
+    Returns:
+        Volume between 0 and 1
+    """
+    if gain_db is None:
+        return 1.0
+    return max(0.0, min(1.0, 10 ** (gain_db / 20)))
+
+
+# ---------------------------------------------------------------------------
+# Models
+# ---------------------------------------------------------------------------
+
+def analyze_audio(audio, save: bool = True) -> bool:
+    """
+    Measure an Audio row's playable file and store loudness and gain.
+
+    A row sharing its content hash with an already measured row reuses that
+    measurement instead of reading the file again. Failures are logged and
+    leave the row at unity gain.
+
+    Args:
+        audio: Audio instance
+        save: Save the changed fields
+
+    Returns:
+        True if a measurement was stored
+    """
+    from data.models import Audio
+
+    twin = None
+    if audio.content_hash:
+        twin = Audio.objects.filter(
+            content_hash=audio.content_hash, loudness_lufs__isnull=False
+        ).exclude(pk=audio.pk).values_list('loudness_lufs', 'true_peak_dbtp').first()
+
+    if twin:
+        measured = Loudness(*twin)
+    else:
+        try:
+            measured = measure_file(audio.playable_path)
+        except Exception as e:
+            # Loudness must never block playback; the clip just plays at unity gain
+            logger.warning(f"No loudness for audio {audio.pk} ({audio.playable_path}): {e}")
+            return False
+
+    audio.loudness_lufs = measured.loudness_lufs
+    audio.true_peak_dbtp = measured.true_peak_dbtp
+    audio.gain_db = compute_gain(*measured)
+    if save and audio.pk:
+        # update() rather than save(): the row may have been deleted meanwhile
+        Audio.objects.filter(pk=audio.pk).update(**{field: getattr(audio, field) for field in LOUDNESS_FIELDS})
+    return True
+
+
+def analyze_bell(bell, save: bool = True) -> bool:
+    """
+    Measure a Bell's first and last sounds and store their gains.
+
+    Args:
+        bell: Bell instance
+        save: Save the changed fields
+
+    Returns:
+        True if both sounds were measured
+    """
+    measured = True
+    for field in ('first', 'last'):
+        path = getattr(bell, field)
+        gain = None
+        if path:
+            try:
+                gain = compute_gain(*measure_file(path))
+            except Exception as e:
+                logger.warning(f"No loudness for bell {bell.pk} {field} sound ({path}): {e}")
+                measured = False
+        setattr(bell, f'{field}_gain_db', gain)
+    if save and bell.pk:
+        bell.save(update_fields=['first_gain_db', 'last_gain_db'])
+    return measured
+
+
+def path_keys(path: str) -> Iterable[str]:
+    """Forms a player path may be stored under: as given, and project-relative."""
+    yield path
+    if os.path.isabs(path):
+        # play_audio hands the player absolute paths; rows store them relative
+        relative = os.path.relpath(path)
+        if not relative.startswith(os.pardir):
+            yield relative
+
+
+def playback_gains(paths: Iterable[str]) -> Dict[str, float]:
+    """
+    Stored gains for a playback sequence.
+
+    Two queries cover the whole sequence (Audio rows by original or playback
+    path, Bell sounds); files without a stored gain are left out and play
+    at unity.
+
+    Args:
+        paths: File paths in playback order
+
+    Returns:
+        Dict of path -> gain in dB
+    """
+    from django.db.models import Q
+    from data.models import Audio, Bell
+
+    keys = {path: list(path_keys(path)) for path in set(paths)}
+    candidates = {key for forms in keys.values() for key in forms}
+    if not candidates:
+        return {}
+
+    known: Dict[str, float] = {}
+    rows = Audio.objects.filter(
+        Q(path__in=candidates) | Q(playback_path__in=candidates), gain_db__isnull=False
+    ).values_list('path', 'playback_path', 'gain_db')
+    for path, playback_path, gain in rows:
+        known[path] = gain
+        if playback_path:
+            known[playback_path] = gain
+    bells = Bell.objects.filter(
+        Q(first__in=candidates) | Q(last__in=candidates)
+    ).values_list('first', 'first_gain_db', 'last', 'last_gain_db')
+    for first, first_gain, last, last_gain in bells:
+        if first_gain is not None:
+            known.setdefault(first, first_gain)
+        if last_gain is not None:
+            known.setdefault(last, last_gain)
+
+    gains = {}
+    for path, forms in keys.items():
+        for key in forms:
+            if key in known:
+                gains[path] = known[key]
+                break
+    return gains
@@ -0,0 +1,131 @@
+"""
+PCM Stream Module - memory-mapped playback of long WAV files
+
+The national anthem, march songs and full-length recordings uploaded by
+schools run for minutes. Instead of letting the decoder hold a whole track,
+AudioPlayer memory-maps a PCM WAV already in the mixer format (every ready
+upload is, see data.lib.transcoder) and queues it on a mixer channel in
+fixed-size chunks. Only the chunk playing and the one queued behind it are
+copied into the mixer; pages of the mapping that have been played are
+released with madvise, so resident memory stays flat however long the track.
+"""
+
+import logging
+import mmap
+import os
+from typing import Iterator, Optional
+
+from data.lib.audio_metadata import AudioMetadataError, _read_wave_header
+
+logger = logging.getLogger(__name__)
+
+# Bytes handed to the mixer per chunk (about 1.5 s at 44.1 kHz 16-bit stereo)
+CHUNK_BYTES = 256 * 1024
+
+
+class PcmStreamError(ValueError):
+    """Raised when a file is not PCM WAV that can be streamed."""
+
+
+class PcmStream:
+    """
+    Memory-mapped data chunk of a PCM WAV file.
+
+    Use as a context manager; chunks() yields bytes of whole sample frames.
+    """
+
+    def __init__(self, path: str, chunk_bytes: Optional[int] = None):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self.format, self._offset, self._size = _read_wave_header(self._file)
+            if self.format['tag'] != 1 or not self.format['block_align']:
+                raise PcmStreamError(f'{path} is not integer PCM')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AudioMetadataError, OSError, ValueError) as e:
+            self._file.close()
+            if isinstance(e, PcmStreamError):
+                raise
+            raise PcmStreamError(f'Cannot stream {path}: {e}')
+        align = self.format['block_align']
+        chunk_bytes = chunk_bytes or CHUNK_BYTES
+        self.chunk_bytes = max(align, chunk_bytes - chunk_bytes % align)
+        self._released = 0
+
+    def __enter__(self) -> 'PcmStream':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio in the data chunk."""
+        return (self._size // self.format['block_align']) / self.format['rate']
+
+    def _byte(self, seconds: float) -> int:
+        frame = int(seconds * self.format['rate'])
+        return min(self._size, frame * self.format['block_align'])
+
+    def _release(self, end: int):
+        """Drop mapped pages before an absolute file offset from resident memory."""
+        if not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        released = end - end % mmap.PAGESIZE
+        if released <= self._released:
+            return
+        try:
+            self._map.madvise(mmap.MADV_DONTNEED, self._released, released - self._released)
+        except OSError as e:
+            logger.debug(f"madvise failed on {self.path}: {e}")
+        self._released = released
+
+    def chunks(self, start: float = 0.0, end: float = 0.0) -> Iterator[bytes]:
+        """
+        Yield the samples in chunk_bytes pieces.
+
+        Args:
+            start: Seconds skipped at the beginning
+            end: Seconds skipped at the end
+
+        Yields:
+            Raw PCM bytes in the file's format
+        """
+        position = self._offset + self._byte(start)
+        stop = self._offset + self._size - self._byte(end)
+        while position < stop:
+            size = min(self.chunk_bytes, stop - position)
+            yield self._map[position:position + size]
+            position += size
+            self._release(position)
+
+
+def open_stream(path: str, frequency: int, channels: int, bits: int = 16) -> Optional[PcmStream]:
+    """
+    Open a file for streaming if it is PCM WAV in the given mixer format.
+
+    Args:
+        path: File path
+        frequency: Mixer sample rate
+        channels: Mixer channel count
+        bits: Mixer sample size
+
+    Returns:
+        PcmStream, or None if the file is not in that format (the caller
+        then falls back to the decoder)
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        stream = PcmStream(path)
+    except PcmStreamError as e:
+        logger.debug(str(e))
+        return None
+    if (stream.format['rate'], stream.format['channels'], stream.format['bits']) != (frequency, channels, bits):
+        stream.close()
+        return None
+    return stream
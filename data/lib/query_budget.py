@@ -0,0 +1,275 @@
+"""
+Query Budget Module - per-view SQL instrumentation and N+1 detection
+
+Queries are observed with ``connection.execute_wrapper`` so counting works
+with DEBUG off and costs only a counter increment and a regex per query.
+
+- QueryBudgetMiddleware records query count and time for every request into
+  per-route histograms and logs the repeated SQL shapes when a view goes over
+  its budget (settings.QUERY_BUDGET_DEFAULT / settings.QUERY_BUDGETS).
+- capture_queries() / assert_query_budget() give tests the same data, so an
+  N+1 regression in a view fails the test suite.
+
+Queries executed while a StreamingHttpResponse is being consumed happen after
+the middleware returns and are not counted.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Queries allowed per request when a view has no entry in QUERY_BUDGETS
+DEFAULT_QUERY_BUDGET = 20
+
+# Histogram bucket upper bounds (the last bucket is open-ended)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+DURATION_MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Reduce a query to its shape so that N+1 repeats compare equal.
+
+    Literals and placeholders become ``?`` and IN lists collapse to ``IN (...)``.
+
+    Args:
+        sql: SQL text as passed to the database driver
+
+    Returns:
+        Normalized SQL
+    """
+    shape = _STRING_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = shape.replace('%s', '?')
+    shape = _IN_LIST_RE.sub('IN (...)', shape)
+    return _SPACE_RE.sub(' ', shape).strip()
+
+
+class QueryCapture:
+    """Query count, time and shapes observed inside capture_queries()."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper hook."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[normalize_sql(sql)] += 1
+
+    def duplicates(self, min_count: int = 2) -> List[Tuple[str, int]]:
+        """
+        Get SQL shapes executed repeatedly.
+
+        Args:
+            min_count: Minimum repetitions to report
+
+        Returns:
+            List of (shape, count), most repeated first
+        """
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= min_count]
+
+
+@contextmanager
+def capture_queries(using: Optional[List[str]] = None):
+    """
+    Record queries run inside the block.
+
+    Args:
+        using: Database aliases to observe (default: all configured)
+
+    Yields:
+        QueryCapture
+    """
+    capture = QueryCapture()
+    aliases = using or list(connections)
+    wrappers = [connections[alias].execute_wrapper(capture) for alias in aliases]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield capture
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+def _format_duplicates(duplicates: List[Tuple[str, int]]) -> str:
+    if not duplicates:
+        return '  (none)'
+    return '\n'.join(f'  {n}x {shape}' for shape, n in duplicates)
+
+
+@contextmanager
+def assert_query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None):
+    """
+    Fail if the block runs too many queries or repeats a query shape.
+
+    Args:
+        max_queries: Maximum total queries (None to skip the check)
+        max_repeats: Maximum executions of any single SQL shape
+                     (None to skip; 1 forbids any repetition)
+
+    Yields:
+        QueryCapture
+
+    Raises:
+        AssertionError: Listing the repeated shapes
+    """
+    with capture_queries() as capture:
+        yield capture
+
+    problems = []
+    if max_queries is not None and capture.count > max_queries:
+        problems.append(f'{capture.count} queries executed, budget is {max_queries}')
+    if max_repeats is not None:
+        repeated = capture.duplicates(min_count=max_repeats + 1)
+        if repeated:
+            problems.append(f'query shapes repeated more than {max_repeats}x (possible N+1)')
+    if problems:
+        raise AssertionError('; '.join(problems) + '\n' + _format_duplicates(capture.duplicates()))
+
+
+class Histogram:
+    """Fixed-bucket histogram with count/sum/max."""
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Add one observation."""
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Serializable snapshot."""
+        labels = [f'<={bound}' for bound in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0,
+            'max': round(self.max, 3),
+            'buckets': dict(zip(labels, self.buckets)),
+        }
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def record_request(route: str, capture: QueryCapture, elapsed: float, over_budget: bool):
+    """Add one request's numbers to the per-route histograms."""
+    with _stats_lock:
+        entry = _stats.get(route)
+        if entry is None:
+            entry = _stats[route] = {
+                'queries': Histogram(QUERY_COUNT_BUCKETS),
+                'query_ms': Histogram(DURATION_MS_BUCKETS),
+                'total_ms': Histogram(DURATION_MS_BUCKETS),
+                'over_budget': 0,
+            }
+        entry['queries'].observe(capture.count)
+        entry['query_ms'].observe(capture.duration * 1000)
+        entry['total_ms'].observe(elapsed * 1000)
+        if over_budget:
+            entry['over_budget'] += 1
+
+
+def get_query_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get per-route histograms recorded by this process.
+
+    Returns:
+        Dict mapping route to {'queries', 'query_ms', 'total_ms', 'over_budget'}
+    """
+    with _stats_lock:
+        return {
+            route: {
+                key: value.as_dict() if isinstance(value, Histogram) else value
+                for key, value in entry.items()
+            }
+            for route, entry in _stats.items()
+        }
+
+
+def reset_query_stats():
+    """Clear recorded histograms."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_query_budget(url_name: Optional[str]) -> int:
+    """Budget for a URL name from settings, falling back to the default."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if url_name and url_name in budgets:
+        return budgets[url_name]
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', DEFAULT_QUERY_BUDGET)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count queries per request, record histograms and warn on budget overruns.
+
+    Disabled with settings.QUERY_BUDGET_ENABLED = False. With DEBUG on, the
+    count is also returned in an ``X-Query-Count`` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', True):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with capture_queries() as capture:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unresolved'
+        url_name = match.url_name if match else None
+        budget = get_query_budget(url_name)
+        over_budget = capture.count > budget
+
+        record_request(route, capture, elapsed, over_budget)
+
+        if over_budget:
+            logger.warning(
+                f"{request.method} {request.path} ran {capture.count} queries "
+                f"(budget {budget}, {capture.duration * 1000:.1f} ms in SQL). "
+                f"Repeated shapes:\n{_format_duplicates(capture.duplicates())}"
+            )
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(capture.count)
+        return response
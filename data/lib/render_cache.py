@@ -0,0 +1,139 @@
+"""
+Render Cache Module - generation-keyed caching of rendered fragments
+
+Schedules, sounds, bells and days change a few times a term but are rendered
+on every page visit. Rendered output is cached under a key that includes a
+data generation number, and every write to those models bumps the number, so
+stale entries are simply never looked up again (they expire on their own).
+
+- Templates use ``{% cache render_cache_timeout <name> data_generation %}``;
+  both variables come from the render_cache_context context processor.
+- JSON listing views are wrapped with @cache_listing(namespace), which keys
+  successful GET responses by generation and query string.
+
+The generation is bumped after the writing transaction commits, so a reader
+can never cache pre-commit data under the new number. Bulk writes that skip
+model signals (bulk_create/bulk_update) call bump_data_generation() directly.
+
+Uses Django's default cache (local memory unless settings.CACHE_DIR selects
+the file backend), so no Redis is needed.
+"""
+
+import hashlib
+import logging
+import time
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Cache key holding the current data generation
+GENERATION_KEY = 'render:data_generation'
+
+# Seconds a rendered fragment is kept when settings.RENDER_CACHE_TIMEOUT is unset
+DEFAULT_TIMEOUT = 3600
+
+
+def get_render_cache_timeout() -> int:
+    """Fragment timeout in seconds from settings."""
+    return getattr(settings, 'RENDER_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def _new_generation() -> int:
+    # Time-based start value: if the counter is evicted it never restarts at
+    # a number that old fragments are still stored under.
+    return time.time_ns() // 1000
+
+
+def get_data_generation() -> int:
+    """
+    Get the current data generation, initialising it if missing.
+
+    Returns:
+        Generation number
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, _new_generation(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _bump():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key missing (evicted or never read): start a fresh generation
+        cache.set(GENERATION_KEY, _new_generation(), timeout=None)
+    logger.debug("Render cache generation bumped")
+
+
+def bump_data_generation(using: Optional[str] = None):
+    """
+    Invalidate every cached fragment once the current transaction commits.
+
+    Outside a transaction the bump happens immediately.
+
+    Args:
+        using: Database alias of the writing transaction
+    """
+    transaction.on_commit(_bump, using=using)
+
+
+def render_cache_context(request):
+    """Context processor providing data_generation and render_cache_timeout."""
+    return {
+        'data_generation': get_data_generation(),
+        'render_cache_timeout': get_render_cache_timeout(),
+    }
+
+
+def listing_cache_key(namespace: str, params) -> str:
+    """
+    Cache key for one listing page.
+
+    Args:
+        namespace: Listing name
+        params: QueryDict of request parameters
+
+    Returns:
+        Key including the current generation
+    """
+    query = '&'.join(f'{key}={value}' for key, values in sorted(params.lists()) for value in values)
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f'render:{namespace}:{get_data_generation()}:{digest}'
+
+
+def cache_listing(namespace: str):
+    """
+    Cache successful GET responses of a JSON listing view.
+
+    Other methods and non-200 responses pass through uncached.
+
+    Args:
+        namespace: Listing name used in the cache key
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+
+            key = listing_cache_key(namespace, request.GET)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response.content, response['Content-Type']), get_render_cache_timeout())
+            return response
+
+        return _wrapped_view
+    return decorator
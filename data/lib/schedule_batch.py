@@ -0,0 +1,349 @@
+"""
+Schedule Batch Module - validate and write many schedules at once
+
+Used by the JSON schedule API and the timetable form. A batch is validated in
+one pass (every referenced Audio/Bell/Day is fetched with a single query per
+model) and written inside one transaction with bulk_create/bulk_update, with
+notification days inserted directly into the M2M through table. A 60-row
+timetable therefore costs a handful of queries instead of several per row.
+
+Bulk writes skip model signals, so the writers bump the render cache
+generation (data.lib.render_cache) themselves.
+"""
+
+import logging
+from datetime import datetime, time as dt_time
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import transaction
+
+from data.models import Audio, Bell, Day, Schedule
+from data.lib.render_cache import bump_data_generation
+
+logger = logging.getLogger(__name__)
+
+# Schedule fields that can be set through the API
+FIELDS = ('time', 'days', 'sound', 'bell_sound', 'tell_time', 'enable_bell_sound')
+
+# Values used when creating a schedule and a field is omitted
+CREATE_DEFAULTS = {
+    'days': [],
+    'sound': None,
+    'bell_sound': None,
+    'tell_time': True,
+    'enable_bell_sound': True,
+}
+
+ScheduleDays = Schedule.notification_days.through
+
+
+class ScheduleValidationError(Exception):
+    """Raised when one or more items of a batch are invalid."""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        """
+        Args:
+            errors: List of {'index', 'field', 'message'} dicts
+        """
+        super().__init__(f"{len(errors)} invalid schedule field(s)")
+        self.errors = errors
+
+
+def serialize_schedule(schedule: Schedule, day_ids: Optional[List[int]] = None,
+                       include_names: bool = False) -> Dict[str, Any]:
+    """
+    Convert a schedule to its JSON representation.
+
+    Args:
+        schedule: Schedule instance
+        day_ids: Notification day ids; read from prefetched days if None
+        include_names: Also include display names (sound, bell and days need
+                       to be select_related/prefetched)
+
+    Returns:
+        Dict with id, time, days, sound, bell_sound, tell_time, enable_bell_sound
+        (plus sound_name, bell_sound_name, day_names with include_names)
+    """
+    if day_ids is None or include_names:
+        days = sorted(schedule.notification_days.all(), key=lambda day: day.id)
+        day_ids = [day.id for day in days]
+    data = {
+        'id': schedule.id,
+        'time': schedule.time.strftime('%H:%M') if schedule.time else None,
+        'days': day_ids,
+        'sound': schedule.sound_id,
+        'bell_sound': schedule.bell_sound_id,
+        'tell_time': schedule.tell_time,
+        'enable_bell_sound': schedule.enable_bell_sound,
+    }
+    if include_names:
+        data['sound_name'] = schedule.sound.name if schedule.sound else None
+        data['bell_sound_name'] = schedule.bell_sound.name if schedule.bell_sound else None
+        data['day_names'] = [day.name for day in days]
+    return data
+
+
+def _parse_time(value) -> dt_time:
+    """Parse 'HH:MM' or 'HH:MM:SS'."""
+    if not isinstance(value, str):
+        raise ValueError("must be a string in HH:MM format")
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    raise ValueError("must be in HH:MM format")
+
+
+def _collect_ids(items: List[Dict[str, Any]], field: str) -> set:
+    """Collect integer ids referenced by a field across all items."""
+    ids = set()
+    for item in items:
+        value = item.get(field)
+        if isinstance(value, int) and not isinstance(value, bool):
+            ids.add(value)
+    return ids
+
+
+def validate_schedule_items(items: List[Dict[str, Any]], partial: bool = False,
+                            index_offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Validate a batch of schedule items in one pass.
+
+    Args:
+        items: Raw items from the request body
+        partial: If True (updates), only supplied fields are validated and
+                 'id' is required
+        index_offset: Added to item positions in error reports (for batches
+                      taken from a longer stream)
+
+    Returns:
+        Cleaned items with model instances/ids resolved
+
+    Raises:
+        ScheduleValidationError: If any item is invalid (nothing is written)
+    """
+    errors: List[Dict[str, Any]] = []
+
+    if not isinstance(items, list):
+        raise ScheduleValidationError([{'index': None, 'field': None, 'message': 'Expected a list of schedules'}])
+
+    dicts = [item for item in items if isinstance(item, dict)]
+
+    # One query per referenced model for the whole batch
+    audios = Audio.objects.in_bulk(_collect_ids(dicts, 'sound'))
+    bells = Bell.objects.in_bulk(_collect_ids(dicts, 'bell_sound'))
+    known_day_ids = set()
+    days_by_name = {}
+    for day in Day.objects.all():
+        known_day_ids.add(day.id)
+        days_by_name[day.name.lower()] = day.id
+        if day.name_eng:
+            days_by_name[day.name_eng.lower()] = day.id
+
+    cleaned = []
+    for index, item in enumerate(items, start=index_offset):
+        def error(field, message):
+            errors.append({'index': index, 'field': field, 'message': message})
+
+        if not isinstance(item, dict):
+            error(None, 'Expected an object')
+            continue
+
+        for field in sorted(set(item) - set(FIELDS) - {'id'}):
+            error(field, 'Unknown field')
+
+        if partial:
+            if not isinstance(item.get('id'), int):
+                error('id', 'Required for update')
+            data = item
+            result = {'id': item.get('id')}
+        else:
+            if 'time' not in item:
+                error('time', 'Required')
+            data = {**CREATE_DEFAULTS, **item}
+            result = {}
+
+        for field in FIELDS:
+            if field not in data:
+                continue
+            value = data[field]
+
+            if field == 'time':
+                try:
+                    result['time'] = _parse_time(value)
+                except ValueError as e:
+                    error('time', str(e))
+            elif field == 'days':
+                if not isinstance(value, list):
+                    error('days', 'Expected a list of day ids or names')
+                    continue
+                day_ids = set()
+                for day in value:
+                    if isinstance(day, int) and not isinstance(day, bool) and day in known_day_ids:
+                        day_ids.add(day)
+                    elif isinstance(day, str) and day.lower() in days_by_name:
+                        day_ids.add(days_by_name[day.lower()])
+                    else:
+                        error('days', f'Unknown day: {day!r}')
+                result['days'] = sorted(day_ids)
+            elif field in ('sound', 'bell_sound'):
+                lookup = audios if field == 'sound' else bells
+                if value is None:
+                    result[field] = None
+                elif isinstance(value, int) and value in lookup:
+                    result[field] = lookup[value]
+                else:
+                    error(field, f'Unknown id: {value!r}')
+            elif isinstance(value, bool):
+                result[field] = value
+            else:
+                error(field, 'Expected true or false')
+
+        # Same rule as the timetable form: no bell sound when the bell is off
+        if result.get('enable_bell_sound') is False:
+            result['bell_sound'] = None
+
+        cleaned.append(result)
+
+    if errors:
+        raise ScheduleValidationError(errors)
+    return cleaned
+
+
+def _insert_days(schedule_days: Iterable[tuple]):
+    """Bulk insert (schedule_id, day_id) pairs into the through table."""
+    rows = [ScheduleDays(schedule_id=schedule_id, day_id=day_id) for schedule_id, day_id in schedule_days]
+    if rows:
+        ScheduleDays.objects.bulk_create(rows)
+
+
+def insert_schedules(cleaned: List[Dict[str, Any]]) -> List[Schedule]:
+    """
+    Write validated items with one bulk insert per table.
+
+    The caller is responsible for the surrounding transaction.
+
+    Args:
+        cleaned: Items returned by validate_schedule_items()
+
+    Returns:
+        Created Schedule instances
+    """
+    schedules = Schedule.objects.bulk_create([
+        Schedule(
+            time=item['time'],
+            sound=item['sound'],
+            bell_sound=item['bell_sound'],
+            tell_time=item['tell_time'],
+            enable_bell_sound=item['enable_bell_sound'],
+        )
+        for item in cleaned
+    ])
+    _insert_days(
+        (schedule.id, day_id)
+        for schedule, item in zip(schedules, cleaned)
+        for day_id in item['days']
+    )
+    bump_data_generation()
+    return schedules
+
+
+def create_schedules(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate and create schedules in one transaction.
+
+    Args:
+        items: Raw schedule items
+
+    Returns:
+        Serialized created schedules
+
+    Raises:
+        ScheduleValidationError: If any item is invalid
+    """
+    cleaned = validate_schedule_items(items)
+
+    with transaction.atomic():
+        schedules = insert_schedules(cleaned)
+
+    logger.info(f"Created {len(schedules)} schedule(s)")
+    return [serialize_schedule(schedule, item['days']) for schedule, item in zip(schedules, cleaned)]
+
+
+def update_schedules(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate and apply partial updates in one transaction.
+
+    Args:
+        items: Raw items, each with an 'id' and the fields to change
+
+    Returns:
+        Serialized updated schedules
+
+    Raises:
+        ScheduleValidationError: If any item is invalid or does not exist
+    """
+    cleaned = validate_schedule_items(items, partial=True)
+    schedules = Schedule.objects.in_bulk([item['id'] for item in cleaned])
+
+    missing = [
+        {'index': index, 'field': 'id', 'message': f"Schedule {item['id']} not found"}
+        for index, item in enumerate(cleaned) if item['id'] not in schedules
+    ]
+    if missing:
+        raise ScheduleValidationError(missing)
+
+    changed_fields = set()
+    new_days = {}
+    for item in cleaned:
+        schedule = schedules[item['id']]
+        for field, value in item.items():
+            if field == 'id':
+                continue
+            if field == 'days':
+                new_days[schedule.id] = value
+                continue
+            setattr(schedule, field, value)
+            changed_fields.add(field)
+
+    with transaction.atomic():
+        if changed_fields:
+            Schedule.objects.bulk_update(list(schedules.values()), sorted(changed_fields))
+        if new_days:
+            ScheduleDays.objects.filter(schedule_id__in=new_days).delete()
+            _insert_days(
+                (schedule_id, day_id)
+                for schedule_id, day_ids in new_days.items()
+                for day_id in day_ids
+            )
+        bump_data_generation()
+
+    logger.info(f"Updated {len(schedules)} schedule(s)")
+    updated = Schedule.objects.filter(id__in=schedules).prefetch_related('notification_days').order_by('time', 'id')
+    return [serialize_schedule(schedule) for schedule in updated]
+
+
+def delete_schedules(ids: List[int]) -> int:
+    """
+    Delete schedules and their notification days in one transaction.
+
+    Args:
+        ids: Schedule ids
+
+    Returns:
+        Number of schedules deleted
+
+    Raises:
+        ScheduleValidationError: If ids is not a list of integers
+    """
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ScheduleValidationError([{'index': None, 'field': 'ids', 'message': 'Expected a list of schedule ids'}])
+
+    with transaction.atomic():
+        ScheduleDays.objects.filter(schedule_id__in=ids).delete()
+        _, per_model = Schedule.objects.filter(id__in=ids).delete()
+
+    deleted = per_model.get(Schedule._meta.label, 0)
+    logger.info(f"Deleted {deleted} schedule(s)")
+    return deleted
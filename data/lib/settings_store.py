@@ -0,0 +1,261 @@
+"""
+Settings Store Module - typed, cached access to the Utility key/value table
+
+The Utility table holds small settings and runtime state as strings. Reading
+them one ``filter().first()`` at a time costs a query per key, and every caller
+parses ``'true'``/numbers/JSON by hand. This module keeps a typed registry of
+the known keys with their defaults and serves reads from a process-local copy
+of the whole table, loaded in one query.
+
+Consistency:
+- Writes through the ORM fire post_save/post_delete signals (see data.models)
+  which drop this process's copy and bump a generation token row.
+- Other processes (web server vs. scheduler) compare that token at most once
+  per ``REVALIDATE_INTERVAL`` seconds and reload the table when it changed.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Row holding the cross-process generation token
+GENERATION_KEY = 'settings_generation'
+
+# Maximum seconds a process serves its copy without checking the generation
+REVALIDATE_INTERVAL = 1.0
+
+_MISSING = object()
+
+
+class Setting(NamedTuple):
+    """A registered setting: value type and default when the row is absent."""
+    name: str
+    type: type
+    default: Any = None
+
+
+# Known settings. Unregistered names are still readable as raw strings.
+SETTINGS: Dict[str, Setting] = {s.name: s for s in (
+    # WiFi monitoring / fallback state (scheduler_jobs.monitor_wifi_connection)
+    Setting('wifi_monitor_enabled', bool, False),
+    Setting('in_fallback_mode', bool, False),
+    Setting('last_known_ssid', str),
+    Setting('wifi_down_count', int, 0),
+    Setting('wifi_back_time', float),
+    Setting('fallback_count', int, 0),
+    Setting('last_fallback_time', float),
+    # Access point configuration
+    Setting('ap_ssid', str),
+    Setting('ap_password', str),
+    Setting('ap_channel', int, 6),
+    # Text-to-speech
+    Setting('voice_api_key', str),
+)}
+
+
+def _deserialize(setting: Setting, raw: str) -> Any:
+    """Convert a stored string to the setting's type."""
+    if setting.type is bool:
+        return raw == 'true'
+    if setting.type is dict or setting.type is list:
+        return json.loads(raw)
+    return setting.type(raw)
+
+
+def _serialize(value: Any) -> str:
+    """Convert a value to the string form stored in Utility."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+class SettingsStore:
+    """
+    Typed, cached view of the Utility table.
+
+    Features:
+    - One query loads every row; reads are dictionary lookups
+    - Values converted using the SETTINGS registry, with defaults
+    - Writes that would not change a value are skipped
+    - Cross-process invalidation through a generation token row
+    """
+
+    def __init__(self, utility_model=None, revalidate_interval: float = REVALIDATE_INTERVAL):
+        """
+        Initialize settings store.
+
+        Args:
+            utility_model: Django Utility model class for storage
+                          If None, will import from data.models
+            revalidate_interval: Seconds between generation checks
+        """
+        if utility_model is None:
+            from data.models import Utility
+            self.utility_model = Utility
+        else:
+            self.utility_model = utility_model
+
+        self.revalidate_interval = revalidate_interval
+        self._lock = threading.Lock()
+        self._values: Optional[Dict[str, str]] = None
+        self._generation: Optional[str] = None
+        self._checked_at = 0.0
+
+    def _load(self) -> Dict[str, str]:
+        """Load every row in one query (caller holds the lock)."""
+        values = dict(self.utility_model.objects.values_list('name', 'value'))
+        self._values = values
+        self._generation = values.get(GENERATION_KEY)
+        self._checked_at = time.monotonic()
+        return values
+
+    def _current(self) -> Dict[str, str]:
+        """Return the cached rows, reloading if another process wrote since."""
+        with self._lock:
+            if self._values is None:
+                return self._load()
+
+            if time.monotonic() - self._checked_at < self.revalidate_interval:
+                return self._values
+
+            generation = self.utility_model.objects.filter(
+                name=GENERATION_KEY
+            ).values_list('value', flat=True).first()
+            if generation != self._generation:
+                return self._load()
+
+            self._checked_at = time.monotonic()
+            return self._values
+
+    def get_raw(self, name: str) -> Optional[str]:
+        """
+        Get the stored string for a key.
+
+        Args:
+            name: Utility row name
+
+        Returns:
+            Stored value, or None if the row does not exist
+        """
+        return self._current().get(name)
+
+    def get(self, name: str, default: Any = _MISSING) -> Any:
+        """
+        Get a typed setting value.
+
+        Args:
+            name: Setting name (unregistered names are returned as strings)
+            default: Overrides the registry default when the row is absent
+
+        Returns:
+            Converted value, or the default if absent or unparseable
+        """
+        return self._convert(self._current(), name, default)
+
+    def get_many(self, *names: str) -> Dict[str, Any]:
+        """
+        Get several typed settings from one snapshot.
+
+        Args:
+            names: Setting names
+
+        Returns:
+            Dict mapping each name to its value
+        """
+        values = self._current()
+        return {name: self._convert(values, name) for name in names}
+
+    @staticmethod
+    def _convert(values: Dict[str, str], name: str, default: Any = _MISSING) -> Any:
+        """Look up a name in a snapshot and convert it to its registered type."""
+        setting = SETTINGS.get(name, Setting(name, str))
+        if default is _MISSING:
+            default = setting.default
+
+        raw = values.get(name)
+        if raw is None:
+            return default
+        try:
+            return _deserialize(setting, raw)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Invalid value for setting {name!r}: {raw!r} ({e})")
+            return default
+
+    def set(self, name: str, value: Any):
+        """
+        Store a setting value.
+
+        The write is skipped if the cached value is already identical.
+
+        Args:
+            name: Setting name
+            value: Value to store (bool, number, str, dict or list)
+        """
+        raw = _serialize(value)
+        if self._current().get(name) == raw:
+            return
+        self.utility_model.objects.update_or_create(name=name, defaults={'value': raw})
+        self.invalidate()
+
+    def delete(self, *names: str):
+        """
+        Remove settings so they fall back to their defaults.
+
+        Args:
+            names: Setting names to delete
+        """
+        current = self._current()
+        present = [name for name in names if name in current]
+        if present:
+            self.utility_model.objects.filter(name__in=present).delete()
+            self.invalidate()
+
+    def invalidate(self):
+        """Drop this process's cached copy."""
+        with self._lock:
+            self._values = None
+
+    def bump_generation(self):
+        """Publish a new generation token so other processes reload."""
+        token = uuid.uuid4().hex
+        try:
+            updated = self.utility_model.objects.filter(name=GENERATION_KEY).update(value=token)
+            if not updated:
+                self.utility_model.objects.get_or_create(name=GENERATION_KEY, defaults={'value': token})
+        except Exception as e:
+            logger.error(f"Error bumping settings generation: {e}")
+
+    def utility_changed(self, name: str):
+        """
+        Handle a write to the Utility table.
+
+        Args:
+            name: Name of the row that was saved or deleted
+        """
+        self.invalidate()
+        if name != GENERATION_KEY:
+            self.bump_generation()
+
+
+# Global singleton instance
+_store_instance: Optional[SettingsStore] = None
+
+
+def get_settings_store() -> SettingsStore:
+    """
+    Get singleton settings store instance.
+
+    Returns:
+        SettingsStore instance
+    """
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = SettingsStore()
+    return _store_instance
@@ -0,0 +1,205 @@
+"""
+Silence Module - trim leading and trailing silence from announcement fragments
+
+Time announcements chain three to five short clips (tell_hour + tell_minute)
+and synthesized phrases are padded at both ends, so padding adds up to long
+gaps between words. Each clip is scanned once, offline, and the seconds of
+silence at its start and end are stored: on the Audio row for library clips,
+on an AudioFragment row for built-in fragments that are played by path.
+AudioPlayer starts each clip after its leading silence and stops it at its
+trailing silence; sequence_duration() plans with the trimmed length.
+
+Detection is vectorized with NumPy: mean square per 10 ms frame across all
+channels, compared against SILENCE_THRESHOLD_DBFS. A short pad is kept on
+both sides so consonant onsets and decays are not clipped.
+"""
+
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from data.lib.loudness import NUMPY_AVAILABLE, LoudnessError, load_samples, path_keys
+
+if NUMPY_AVAILABLE:
+    import numpy
+
+logger = logging.getLogger(__name__)
+
+# Frames quieter than this are silence
+SILENCE_THRESHOLD_DBFS = -50.0
+
+# Analysis frame length
+FRAME_SECONDS = 0.01
+
+# Silence kept before the first and after the last sound
+PAD_SECONDS = 0.05
+
+# Audio model fields filled by trim_audio()
+TRIM_FIELDS = ('trim_start', 'trim_end')
+
+
+class Trim(NamedTuple):
+    """Seconds of silence skipped at each end of a clip."""
+    start: float = 0.0
+    end: float = 0.0
+    duration: Optional[float] = None  # untrimmed length, if known
+
+    @property
+    def length(self) -> Optional[float]:
+        """Seconds actually played."""
+        if self.duration is None:
+            return None
+        return max(0.0, self.duration - self.start - self.end)
+
+
+def detect_trim(samples, rate: int) -> Trim:
+    """
+    Find leading and trailing silence.
+
+    Args:
+        samples: Array shaped (frames, channels) in -1..1
+        rate: Sample rate
+
+    Returns:
+        Trim; a clip that is silent throughout is left untrimmed
+    """
+    frames = samples.shape[0]
+    duration = frames / rate
+    frame = max(1, int(rate * FRAME_SECONDS))
+    n_frames = -(-frames // frame)
+    if not n_frames:
+        return Trim(duration=duration)
+
+    padded = numpy.zeros((n_frames * frame, samples.shape[1]))
+    padded[:frames] = samples
+    power = (padded.reshape(n_frames, frame * samples.shape[1]) ** 2).mean(axis=1)
+    loud = numpy.flatnonzero(power > 10 ** (SILENCE_THRESHOLD_DBFS / 10))
+    if not loud.size:
+        return Trim(duration=duration)
+
+    start = max(0.0, loud[0] * frame / rate - PAD_SECONDS)
+    end = max(0.0, duration - min(frames, (loud[-1] + 1) * frame) / rate - PAD_SECONDS)
+    return Trim(round(start, 3), round(end, 3), round(duration, 3))
+
+
+def measure_trim(path: str) -> Trim:
+    """
+    Read a file and find its silence.
+
+    Args:
+        path: File path
+
+    Returns:
+        Trim
+
+    Raises:
+        LoudnessError: If NumPy is missing or the file cannot be read
+    """
+    if not NUMPY_AVAILABLE:
+        raise LoudnessError('numpy not available')
+    samples, rate = load_samples(path)
+    return detect_trim(samples, rate)
+
+
+def trim_audio(audio, save: bool = True) -> Optional[Trim]:
+    """
+    Store an Audio row's trim points, measured on its playable file.
+
+    Args:
+        audio: Audio instance
+        save: Save the changed fields
+
+    Returns:
+        The Trim, or None if the file could not be read (the clip then plays whole)
+    """
+    from data.models import Audio
+
+    try:
+        trim = measure_trim(audio.playable_path)
+    except Exception as e:
+        logger.warning(f"No trim points for audio {audio.pk} ({audio.playable_path}): {e}")
+        return None
+
+    audio.trim_start, audio.trim_end = trim.start, trim.end
+    if save and audio.pk:
+        Audio.objects.filter(pk=audio.pk).update(trim_start=trim.start, trim_end=trim.end)
+    return trim
+
+
+def trim_fragment(path: str) -> Optional[Trim]:
+    """
+    Store trim points and duration for a built-in fragment played by path.
+
+    Args:
+        path: File path as passed to the player
+
+    Returns:
+        The Trim, or None if the file could not be read
+    """
+    from data.models import AudioFragment
+
+    try:
+        trim = measure_trim(path)
+    except Exception as e:
+        logger.warning(f"No trim points for fragment {path}: {e}")
+        return None
+
+    AudioFragment.objects.update_or_create(
+        path=path, defaults={'duration': trim.duration, 'trim_start': trim.start, 'trim_end': trim.end}
+    )
+    return trim
+
+
+def announcement_fragments() -> List[str]:
+    """Every clip tell_hour() and tell_minute() can return."""
+    from data.time_sound import tell_hour, tell_minute
+
+    paths = []
+    for key in [f'{hour:02d}' for hour in range(24)]:
+        paths.extend(tell_hour(key))
+    for key in [f'{minute:02d}' for minute in range(60)]:
+        paths.extend(tell_minute(key))
+    return list(dict.fromkeys(paths))
+
+
+def playback_trims(paths: Iterable[str]) -> Dict[str, Trim]:
+    """
+    Stored trim points for a playback sequence.
+
+    Two queries cover the whole sequence (Audio rows by original or playback
+    path, AudioFragment rows); untrimmed files are left out.
+
+    Args:
+        paths: File paths in playback order
+
+    Returns:
+        Dict of path -> Trim
+    """
+    from django.db.models import Q
+    from data.models import Audio, AudioFragment
+
+    keys = {path: list(path_keys(path)) for path in set(paths)}
+    candidates = {key for forms in keys.values() for key in forms}
+    if not candidates:
+        return {}
+
+    known: Dict[str, Trim] = {}
+    rows = Audio.objects.filter(
+        Q(path__in=candidates) | Q(playback_path__in=candidates), trim_start__isnull=False
+    ).values_list('path', 'playback_path', 'trim_start', 'trim_end', 'duration')
+    for path, playback_path, start, end, duration in rows:
+        known[path] = Trim(start, end or 0.0, duration)
+        if playback_path:
+            known[playback_path] = known[path]
+    for path, start, end, duration in AudioFragment.objects.filter(path__in=candidates).values_list(
+        'path', 'trim_start', 'trim_end', 'duration'
+    ):
+        known.setdefault(path, Trim(start, end, duration))
+
+    trims = {}
+    for path, forms in keys.items():
+        for key in forms:
+            trim = known.get(key)
+            if trim and (trim.start or trim.end):
+                trims[path] = trim
+                break
+    return trims
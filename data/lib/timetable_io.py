@@ -0,0 +1,483 @@
+"""
+Timetable Import/Export Module - CSV, JSON and iCalendar
+
+Exports stream one schedule at a time (the ORM iterator is chunked and every
+format is produced as a generator), so the response can be served with
+StreamingHttpResponse without building the whole document in memory.
+
+Imports parse the upload incrementally and validate it in batches of
+IMPORT_BATCH_SIZE rows. Every batch is written with bulk inserts inside a
+single transaction; the first invalid batch rolls the whole import back.
+
+Sounds and bells are referenced by name, days by English or Thai name.
+"""
+
+import csv
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from django.db import transaction
+
+from data.models import Audio, Bell, Schedule
+from data.lib.schedule_batch import (
+    ScheduleDays,
+    ScheduleValidationError,
+    insert_schedules,
+    validate_schedule_items,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and inserted together during import
+IMPORT_BATCH_SIZE = 500
+
+# Rows fetched per query during export
+EXPORT_CHUNK_SIZE = 500
+
+# Characters read per call while streaming JSON
+JSON_READ_SIZE = 64 * 1024
+
+CSV_COLUMNS = ['time', 'days', 'sound', 'bell_sound', 'tell_time', 'enable_bell_sound']
+
+# English day name -> iCalendar BYDAY code
+ICS_DAYS = {
+    'Monday': 'MO', 'Tuesday': 'TU', 'Wednesday': 'WE', 'Thursday': 'TH',
+    'Friday': 'FR', 'Saturday': 'SA', 'Sunday': 'SU',
+}
+ICS_CODES = {code: name for name, code in ICS_DAYS.items()}
+
+# Week the recurring events start in (2024-01-01 is a Monday)
+ICS_ANCHOR = date(2024, 1, 1)
+
+ICS_PRODID = '-//Thai School Alarm//Timetable//TH'
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'json': ('application/json', 'json'),
+    'ics': ('text/calendar; charset=utf-8', 'ics'),
+}
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def _records() -> Iterator[Dict[str, Any]]:
+    """Yield every schedule as a portable record (names instead of ids)."""
+    schedules = (
+        Schedule.objects
+        .select_related('sound', 'bell_sound')
+        .prefetch_related('notification_days')
+        .order_by('time', 'id')
+    )
+    for schedule in schedules.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        days = sorted(schedule.notification_days.all(), key=lambda day: day.id)
+        yield {
+            'id': schedule.id,
+            'time': schedule.time.strftime('%H:%M') if schedule.time else None,
+            'days': [day.name_eng for day in days],
+            'sound': schedule.sound.name if schedule.sound else None,
+            'bell_sound': schedule.bell_sound.name if schedule.bell_sound else None,
+            'tell_time': schedule.tell_time,
+            'enable_bell_sound': schedule.enable_bell_sound,
+        }
+
+
+class _Echo:
+    """File-like object whose write() returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv() -> Iterator[str]:
+    """Yield the timetable as CSV, one row per chunk."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for record in _records():
+        yield writer.writerow([
+            record['time'],
+            ';'.join(record['days']),
+            record['sound'] or '',
+            record['bell_sound'] or '',
+            'true' if record['tell_time'] else 'false',
+            'true' if record['enable_bell_sound'] else 'false',
+        ])
+
+
+def export_json() -> Iterator[str]:
+    """Yield the timetable as a JSON document, one schedule per chunk."""
+    yield '{"version": 1, "schedules": ['
+    separator = '\n'
+    for record in _records():
+        record.pop('id')
+        yield separator + json.dumps(record, ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]}\n'
+
+
+def _ics_escape(text: str) -> str:
+    """Escape a TEXT value (RFC 5545 section 3.3.11)."""
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_unescape(text: str) -> str:
+    """Reverse _ics_escape()."""
+    result = []
+    chars = iter(text)
+    for ch in chars:
+        if ch == '\\':
+            nxt = next(chars, '')
+            result.append('\n' if nxt in ('n', 'N') else nxt)
+        else:
+            result.append(ch)
+    return ''.join(result)
+
+
+def _ics_line(line: str) -> str:
+    """Fold a content line at 75 octets without splitting UTF-8 characters."""
+    parts = []
+    current = ''
+    size = 0
+    limit = 75
+    for ch in line:
+        width = len(ch.encode('utf-8'))
+        if size + width > limit:
+            parts.append(current)
+            current, size, limit = ch, width, 74  # continuation lines start with a space
+        else:
+            current += ch
+            size += width
+    parts.append(current)
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def export_ics() -> Iterator[str]:
+    """Yield the timetable as an iCalendar file with one weekly event per schedule."""
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield _ics_line('BEGIN:VCALENDAR')
+    yield _ics_line('VERSION:2.0')
+    yield _ics_line(f'PRODID:{ICS_PRODID}')
+
+    for record in _records():
+        if record['time'] is None:
+            continue
+        codes = [ICS_DAYS[name] for name in record['days'] if name in ICS_DAYS]
+        first_day = ICS_ANCHOR + timedelta(days=list(ICS_CODES).index(codes[0]) if codes else 0)
+        start = first_day.strftime('%Y%m%d') + 'T' + record['time'].replace(':', '') + '00'
+
+        lines = [
+            'BEGIN:VEVENT',
+            f"UID:schedule-{record['id']}@thai-school-alarm",
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{start}',
+        ]
+        if codes:
+            lines.append(f"RRULE:FREQ=WEEKLY;BYDAY={','.join(codes)}")
+        lines.append(f"SUMMARY:{_ics_escape(record['sound'] or record['bell_sound'] or 'School bell')}")
+        if record['sound']:
+            lines.append(f"X-SCHOOL-ALARM-SOUND:{_ics_escape(record['sound'])}")
+        if record['bell_sound']:
+            lines.append(f"X-SCHOOL-ALARM-BELL:{_ics_escape(record['bell_sound'])}")
+        lines.append(f"X-SCHOOL-ALARM-TELL-TIME:{'TRUE' if record['tell_time'] else 'FALSE'}")
+        lines.append(f"X-SCHOOL-ALARM-BELL-ENABLED:{'TRUE' if record['enable_bell_sound'] else 'FALSE'}")
+        lines.append('END:VEVENT')
+        yield ''.join(_ics_line(line) for line in lines)
+
+    yield _ics_line('END:VCALENDAR')
+
+
+EXPORTERS = {
+    'csv': export_csv,
+    'json': export_json,
+    'ics': export_ics,
+}
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+def _parse_bool(value: str):
+    """Parse a CSV/iCalendar flag; unrecognised text is returned for validation to reject."""
+    text = value.strip().lower()
+    if text in ('true', '1', 'yes'):
+        return True
+    if text in ('false', '0', 'no'):
+        return False
+    return value
+
+
+def parse_csv(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yield records from a CSV export, one row at a time.
+
+    Args:
+        stream: Text stream with a header row (see CSV_COLUMNS)
+    """
+    for row in csv.DictReader(stream):
+        record: Dict[str, Any] = {}
+        for column, value in row.items():
+            if column is None or value is None:
+                continue
+            value = value.strip()
+            if column == 'days':
+                record['days'] = [day.strip() for day in value.split(';') if day.strip()]
+            elif column in ('sound', 'bell_sound'):
+                record[column] = value or None
+            elif column in ('tell_time', 'enable_bell_sound'):
+                if value:
+                    record[column] = _parse_bool(value)
+            else:
+                record[column] = value
+        yield record
+
+
+class _JsonStream:
+    """Minimal incremental reader for the top level of a JSON document."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read more text, discarding what has been consumed."""
+        if self.eof:
+            return False
+        chunk = self.stream.read(JSON_READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, ch: str):
+        """Consume a structural character."""
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if not self._fill():
+                    raise ValueError(str(e))
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def array_items(self) -> Iterator[Any]:
+        """Yield the elements of the array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            ch = self.peek()
+            self.pos += 1
+            if ch == ']':
+                return
+            if ch != ',':
+                raise ValueError(f"expected ',' or ']' at offset {self.pos - 1}")
+
+
+def parse_json(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yield records from a JSON export without loading the whole document.
+
+    Accepts either a list of schedules or an object with a "schedules" list.
+
+    Args:
+        stream: Text stream
+    """
+    reader = _JsonStream(stream)
+    first = reader.peek()
+
+    if first == '[':
+        yield from reader.array_items()
+        return
+    if first != '{':
+        raise ValueError('expected a JSON object or array')
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'schedules':
+            yield from reader.array_items()
+        else:
+            reader.value()
+        if reader.peek() == ',':
+            reader.expect(',')
+            continue
+        reader.expect('}')
+        return
+
+
+def _ics_lines(stream: TextIO) -> Iterator[str]:
+    """Yield unfolded iCalendar content lines."""
+    current = None
+    for raw in stream:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_ics(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yield records from an iCalendar file, one VEVENT at a time.
+
+    Times come from DTSTART and days from a weekly RRULE's BYDAY.
+
+    Args:
+        stream: Text stream
+    """
+    event: Optional[Dict[str, Any]] = None
+    for line in _ics_lines(stream):
+        name, _, value = line.partition(':')
+        name = name.split(';', 1)[0].upper()
+
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {'days': []}
+        elif name == 'END' and value.upper() == 'VEVENT' and event is not None:
+            yield event
+            event = None
+        elif event is None:
+            continue
+        elif name == 'DTSTART':
+            _, _, clock = value.partition('T')
+            event['time'] = f'{clock[0:2]}:{clock[2:4]}' if len(clock) >= 4 else value
+        elif name == 'RRULE':
+            rule = dict(part.split('=', 1) for part in value.split(';') if '=' in part)
+            codes = rule.get('BYDAY', '')
+            event['days'] = [ICS_CODES.get(code.strip()[-2:], code) for code in codes.split(',') if code.strip()]
+        elif name == 'X-SCHOOL-ALARM-SOUND':
+            event['sound'] = _ics_unescape(value)
+        elif name == 'X-SCHOOL-ALARM-BELL':
+            event['bell_sound'] = _ics_unescape(value)
+        elif name == 'X-SCHOOL-ALARM-TELL-TIME':
+            event['tell_time'] = _parse_bool(value)
+        elif name == 'X-SCHOOL-ALARM-BELL-ENABLED':
+            event['enable_bell_sound'] = _parse_bool(value)
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'json': parse_json,
+    'ics': parse_ics,
+}
+
+
+def _name_index(model) -> Dict[str, int]:
+    """Map names to ids (lowest id wins for duplicate names)."""
+    index: Dict[str, int] = {}
+    for pk, name in model.objects.order_by('-id').values_list('id', 'name'):
+        index[name] = pk
+    return index
+
+
+def _resolve(record: Any, index: int, audios: Dict[str, int],
+             bells: Dict[str, int]) -> Tuple[Any, List[Dict[str, Any]]]:
+    """Replace sound/bell names in a record with ids."""
+    if not isinstance(record, dict):
+        return record, []
+
+    item = {key: value for key, value in record.items() if key != 'id'}
+    errors = []
+    for field, lookup in (('sound', audios), ('bell_sound', bells)):
+        value = item.get(field)
+        if isinstance(value, str):
+            if value in lookup:
+                item[field] = lookup[value]
+            else:
+                errors.append({'index': index, 'field': field, 'message': f'Unknown name: {value!r}'})
+                item[field] = None
+    return item, errors
+
+
+def import_timetable(stream: TextIO, fmt: str, replace: bool = False) -> int:
+    """
+    Import a timetable in one transaction.
+
+    Args:
+        stream: Text stream of the uploaded file
+        fmt: 'csv', 'json' or 'ics'
+        replace: Delete all existing schedules first
+
+    Returns:
+        Number of schedules created
+
+    Raises:
+        ScheduleValidationError: If the file cannot be parsed or a row is
+            invalid (nothing is written)
+    """
+    records = PARSERS[fmt](stream)
+    audios = _name_index(Audio)
+    bells = _name_index(Bell)
+    count = 0
+
+    try:
+        with transaction.atomic():
+            if replace:
+                ScheduleDays.objects.all().delete()
+                Schedule.objects.all().delete()
+
+            while True:
+                batch = list(islice(records, IMPORT_BATCH_SIZE))
+                if not batch:
+                    break
+
+                items = []
+                errors = []
+                for offset, record in enumerate(batch):
+                    item, item_errors = _resolve(record, count + offset, audios, bells)
+                    items.append(item)
+                    errors.extend(item_errors)
+
+                try:
+                    cleaned = validate_schedule_items(items, index_offset=count)
+                except ScheduleValidationError as e:
+                    errors.extend(e.errors)
+                if errors:
+                    raise ScheduleValidationError(errors)
+
+                insert_schedules(cleaned)
+                count += len(cleaned)
+    except (ValueError, csv.Error, UnicodeDecodeError) as e:
+        raise ScheduleValidationError([{'index': None, 'field': None, 'message': f'Invalid {fmt} file: {e}'}])
+
+    logger.info(f"Imported {count} schedule(s) from {fmt}")
+    return count
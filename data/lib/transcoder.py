@@ -0,0 +1,262 @@
+"""
+Transcoder Module - convert uploads to the mixer's native format once
+
+pygame decodes MP3 and resamples anything that is not 44.1 kHz 16-bit stereo
+every time a clip is played. Each uploaded clip is instead converted once, on
+a small worker pool, into a WAV matching AudioPlayer's mixer format. The
+original file is kept and the row is marked ready when the copy exists, so
+playback (Audio.playable_path) never pays decode or resample cost.
+
+Backends, tried in order:
+- ffmpeg, when installed
+- pygame: with the mixer open in the canonical format, Sound(path).get_raw()
+  returns exactly the samples the mixer would produce at play time
+
+Files already in the canonical format are used as they are. Copies are named
+after the content hash, so identical uploads share one transcoded file.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from data.lib.audio_metadata import wave_format
+from data.lib.audio_player import MIXER_CHANNELS, MIXER_FREQUENCY, MIXER_SIZE, PYGAME_AVAILABLE
+from data.lib.loudness import analyze_audio
+from data.lib.silence import trim_audio
+
+if PYGAME_AVAILABLE:
+    import pygame
+
+logger = logging.getLogger(__name__)
+
+# Where transcoded copies are written
+TRANSCODED_DIR = 'audio/transcoded'
+
+# Worker threads when settings.TRANSCODE_WORKERS is unset
+DEFAULT_WORKERS = 2
+
+# Seconds allowed for one ffmpeg run
+FFMPEG_TIMEOUT = 300
+
+SAMPLE_WIDTH = abs(MIXER_SIZE) // 8
+
+
+class TranscodeError(Exception):
+    """Raised when no backend could convert a file."""
+
+
+def is_canonical(path: str) -> bool:
+    """True if the file is a 16-bit PCM WAV in the mixer's rate and channel count."""
+    fmt = wave_format(path)
+    return bool(fmt) and (fmt['tag'], fmt['rate'], fmt['channels'], fmt['bits']) == (
+        1, MIXER_FREQUENCY, MIXER_CHANNELS, SAMPLE_WIDTH * 8
+    )
+
+
+def _transcode_ffmpeg(src: str, dst: str):
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise TranscodeError('ffmpeg not installed')
+    result = subprocess.run(
+        [ffmpeg, '-v', 'error', '-y', '-i', src,
+         '-ar', str(MIXER_FREQUENCY), '-ac', str(MIXER_CHANNELS),
+         '-c:a', f'pcm_s{SAMPLE_WIDTH * 8}le', '-f', 'wav', dst],
+        capture_output=True, text=True, timeout=FFMPEG_TIMEOUT
+    )
+    if result.returncode != 0:
+        raise TranscodeError(f'ffmpeg failed: {result.stderr.strip()}')
+
+
+def decode_pygame(src: str) -> bytes:
+    """
+    Decode a file with pygame into interleaved samples in the mixer format.
+
+    Args:
+        src: Source audio file
+
+    Returns:
+        Raw 16-bit little-endian PCM at MIXER_FREQUENCY with MIXER_CHANNELS
+
+    Raises:
+        TranscodeError: If pygame is missing or the mixer is open in another format
+    """
+    if not PYGAME_AVAILABLE:
+        raise TranscodeError('pygame not available')
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=MIXER_FREQUENCY, size=MIXER_SIZE, channels=MIXER_CHANNELS)
+    if pygame.mixer.get_init() != (MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS):
+        raise TranscodeError(f'mixer is open as {pygame.mixer.get_init()}, not the canonical format')
+    return pygame.mixer.Sound(src).get_raw()
+
+
+def _transcode_pygame(src: str, dst: str):
+    raw = decode_pygame(src)
+    with wave.open(dst, 'wb') as out:
+        out.setnchannels(MIXER_CHANNELS)
+        out.setsampwidth(SAMPLE_WIDTH)
+        out.setframerate(MIXER_FREQUENCY)
+        out.writeframes(raw)
+
+
+BACKENDS = [('ffmpeg', _transcode_ffmpeg), ('pygame', _transcode_pygame)]
+
+
+def transcode_file(src: str, dst: str) -> str:
+    """
+    Convert a file to the canonical format.
+
+    The output is written to a temporary name and renamed into place, so a
+    half-written file is never played.
+
+    Args:
+        src: Source audio file
+        dst: Destination WAV path
+
+    Returns:
+        Name of the backend that succeeded
+
+    Raises:
+        TranscodeError: If every backend failed
+    """
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    partial = f'{dst}.part'
+    errors: List[str] = []
+    for name, backend in BACKENDS:
+        try:
+            backend(src, partial)
+            os.replace(partial, dst)
+            return name
+        except Exception as e:
+            errors.append(f'{name}: {e}')
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+    raise TranscodeError('; '.join(errors))
+
+
+def transcode_audio(audio_id: int) -> Optional[str]:
+    """
+    Produce the playback copy for one Audio row and mark it ready.
+
+    The ready copy is then measured for loudness (data.lib.loudness) and
+    scanned for leading/trailing silence (data.lib.silence), so its gain and
+    trim points are known before it is first played.
+
+    On failure the row is marked failed and keeps playing its original.
+
+    Args:
+        audio_id: Audio primary key
+
+    Returns:
+        The playback path, or None if the row is gone or transcoding failed
+    """
+    from data.models import Audio
+
+    audio = Audio.objects.filter(pk=audio_id).first()
+    if audio is None:
+        return None
+    Audio.objects.filter(pk=audio_id).update(status=Audio.Status.PROCESSING)
+
+    try:
+        if is_canonical(audio.path):
+            playback_path = audio.path
+        else:
+            playback_path = os.path.join(TRANSCODED_DIR, f'{audio.content_hash or f"audio-{audio.pk}"}.wav')
+            if not (audio.content_hash and os.path.exists(playback_path)):
+                backend = transcode_file(audio.path, playback_path)
+                logger.info(f"Transcoded audio {audio.pk} ({audio.path}) with {backend}")
+    except Exception as e:
+        logger.error(f"Transcoding audio {audio.pk} ({audio.path}) failed: {e}")
+        Audio.objects.filter(pk=audio_id).update(status=Audio.Status.FAILED)
+        return None
+
+    Audio.objects.filter(pk=audio_id).update(status=Audio.Status.READY, playback_path=playback_path)
+    audio.status, audio.playback_path = Audio.Status.READY, playback_path
+    analyze_audio(audio)
+    trim_audio(audio)
+    return playback_path
+
+
+def remove_playback_copy(audio):
+    """Delete an Audio row's transcoded copy unless another row still uses it."""
+    from data.models import Audio
+
+    path = audio.playback_path
+    if not path or path == audio.path:
+        return
+    if Audio.objects.filter(playback_path=path).exclude(pk=audio.pk).exists():
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove transcoded file {path}: {e}")
+
+
+class TranscodePool:
+    """
+    Worker pool running transcode_audio() in the background.
+
+    Jobs are queued after the creating transaction commits so workers always
+    see the row.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or getattr(settings, 'TRANSCODE_WORKERS', DEFAULT_WORKERS)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='transcode')
+            return self._executor
+
+    def _run(self, audio_id: int) -> Optional[str]:
+        try:
+            return transcode_audio(audio_id)
+        finally:
+            close_old_connections()
+
+    def submit_now(self, audio_id: int) -> Future:
+        """Queue a job immediately and return its future."""
+        return self._get_executor().submit(self._run, audio_id)
+
+    def submit(self, audio_id: int):
+        """Queue a job once the current transaction commits."""
+        transaction.on_commit(lambda: self.submit_now(audio_id))
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers; a later submit starts a new pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+_pool: Optional[TranscodePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_transcode_pool() -> TranscodePool:
+    """
+    Get the singleton transcode pool.
+
+    Returns:
+        TranscodePool instance
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TranscodePool()
+        return _pool
@@ -0,0 +1,232 @@
+"""
+Update Runner Module - runs the self-update script and captures its output
+
+The child process writes to a pipe that is drained continuously by a reader
+thread, so a chatty ``pip install`` can never fill the pipe buffer and stall.
+Every line goes to a size-capped status log that the progress endpoints tail
+by byte offset. The exit code and per-phase timings are persisted in the
+Utility model so they survive a page reload.
+"""
+
+import os
+import json
+import logging
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateRunner:
+    """
+    Run one update process at a time and stream its output to a log file.
+
+    Features:
+    - Output drained by a reader thread (no pipe back-pressure)
+    - stdout and stderr merged in order into one log
+    - Log rotated to ``<log>.1`` when it grows past ``max_bytes``
+    - Exit code and phase timings persisted in the database
+
+    The script marks phases by printing ``##phase <name>`` lines; these are
+    recorded as timings and not written to the log.
+    """
+
+    STATE_KEY = 'update_runner_state'
+    PHASE_MARKER = b'##phase '
+    DEFAULT_MAX_BYTES = 2 * 1024 * 1024  # 2 MB
+
+    def __init__(self, utility_model=None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize update runner.
+
+        Args:
+            utility_model: Django Utility model class for state persistence
+                          If None, will import from data.models
+            max_bytes: Size at which the log is rotated
+        """
+        if utility_model is None:
+            from data.models import Utility
+            self.utility_model = Utility
+        else:
+            self.utility_model = utility_model
+
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._reader_thread: Optional[threading.Thread] = None
+        self._state: Dict[str, Any] = {}
+        self._phase_started: Optional[float] = None
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Read persisted state (used after a restart when nothing runs in-process)."""
+        try:
+            state_obj = self.utility_model.objects.filter(name=self.STATE_KEY).first()
+            if state_obj:
+                return json.loads(state_obj.value)
+            return {}
+        except Exception as e:
+            logger.error(f"Error reading update state: {e}")
+            return {}
+
+    def _save_state(self):
+        """Persist current state to the database."""
+        with self._lock:
+            value = json.dumps(self._state)
+        try:
+            self.utility_model.objects.update_or_create(
+                name=self.STATE_KEY,
+                defaults={'value': value}
+            )
+        except Exception as e:
+            logger.error(f"Error saving update state: {e}")
+
+    def is_running(self) -> bool:
+        """Check whether an update started by this runner is still running."""
+        with self._lock:
+            return self._process is not None and self._process.poll() is None
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Get update state.
+
+        Returns:
+            Dict with: pid, started_at, finished_at, exit_code, phases, log_bytes
+        """
+        with self._lock:
+            if self._state:
+                return dict(self._state)
+        return self._load_state()
+
+    def start(self, args: List[str], cwd: str, log_path: str) -> int:
+        """
+        Start the update process unless one is already running.
+
+        Args:
+            args: Command to execute
+            cwd: Working directory for the command
+            log_path: Status log written by the reader thread
+
+        Returns:
+            PID of the running update process
+        """
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                logger.info(f"Update already running (pid={self._process.pid})")
+                return self._process.pid
+
+            # Truncate before starting so readers never see the previous run
+            log_file = open(log_path, 'wb')
+            try:
+                process = subprocess.Popen(
+                    args,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL,
+                    cwd=cwd,
+                    start_new_session=True,
+                )
+            except Exception:
+                log_file.close()
+                raise
+
+            self._process = process
+            self._state = {
+                'pid': process.pid,
+                'started_at': datetime.now().isoformat(),
+                'finished_at': None,
+                'exit_code': None,
+                'phases': [],
+                'log_bytes': 0,
+            }
+            self._reader_thread = threading.Thread(
+                target=self._reader,
+                args=(process, log_file, log_path),
+                daemon=True,
+                name="UpdateRunnerReader"
+            )
+            self._reader_thread.start()
+
+        self._save_state()
+        logger.info(f"Started update process pid={process.pid}")
+        return process.pid
+
+    def _reader(self, process: subprocess.Popen, log_file, log_path: str):
+        """
+        Drain process output into the log, then record the exit code.
+
+        Args:
+            process: Running update process
+            log_file: Open binary log file (already truncated)
+            log_path: Path of the log, used for rotation
+        """
+        written = 0
+        try:
+            for line in iter(process.stdout.readline, b''):
+                if line.startswith(self.PHASE_MARKER):
+                    self._begin_phase(line[len(self.PHASE_MARKER):].decode('utf-8', errors='replace').strip())
+                    continue
+
+                log_file.write(line)
+                log_file.flush()
+                written += len(line)
+
+                if log_file.tell() >= self.max_bytes:
+                    log_file.close()
+                    os.replace(log_path, log_path + '.1')
+                    log_file = open(log_path, 'wb')
+        except Exception as e:
+            logger.error(f"Error reading update output: {e}")
+        finally:
+            process.stdout.close()
+            exit_code = process.wait()
+            log_file.close()
+
+            with self._lock:
+                self._end_phase()
+                self._state['exit_code'] = exit_code
+                self._state['finished_at'] = datetime.now().isoformat()
+                self._state['log_bytes'] = written
+            self._save_state()
+            logger.info(f"Update process pid={process.pid} exited with code {exit_code}")
+
+            from django.db import close_old_connections
+            close_old_connections()
+
+    def _begin_phase(self, name: str):
+        """Close the current phase and start timing a new one."""
+        with self._lock:
+            self._end_phase()
+            self._state['phases'].append({
+                'name': name,
+                'started_at': datetime.now().isoformat(),
+                'duration': None,
+            })
+            self._phase_started = time.monotonic()
+        self._save_state()
+
+    def _end_phase(self):
+        """Record the duration of the open phase (caller holds the lock)."""
+        phases = self._state.get('phases') or []
+        if phases and self._phase_started is not None:
+            phases[-1]['duration'] = round(time.monotonic() - self._phase_started, 3)
+            self._phase_started = None
+
+
+# Global singleton instance
+_runner_instance: Optional[UpdateRunner] = None
+
+
+def get_update_runner() -> UpdateRunner:
+    """
+    Get singleton update runner instance.
+
+    Returns:
+        UpdateRunner instance
+    """
+    global _runner_instance
+    if _runner_instance is None:
+        _runner_instance = UpdateRunner()
+    return _runner_instance
@@ -0,0 +1,79 @@
+"""
+Django Management Command: analyze_loudness
+
+Measures integrated loudness and true peak of the sound library and stores
+the playback gain on Audio and Bell rows.
+
+Usage:
+    python manage.py analyze_loudness          # measure rows without loudness
+    python manage.py analyze_loudness --all    # re-measure every row
+
+Rows that were already measured are not read again; their gain is recomputed
+from the stored measurement, so running the command after changing
+LOUDNESS_TARGET_LUFS updates every gain without touching the files. Bell
+sounds are few and are always measured.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from data.models import Audio, Bell
+from data.lib.loudness import LOUDNESS_FIELDS, NUMPY_AVAILABLE, analyze_audio, analyze_bell, compute_gain
+
+logger = logging.getLogger(__name__)
+
+# Rows written per bulk_update
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Measure loudness of audio files and store their playback gain'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-measure rows that already have loudness',
+        )
+
+    def handle(self, *args, **options):
+        if not NUMPY_AVAILABLE:
+            self.stdout.write(self.style.WARNING('numpy is not installed; only stored measurements are used'))
+
+        measured, failed, regained = self._audios(options['all'])
+        bells = sum(1 for bell in Bell.objects.all() if NUMPY_AVAILABLE and analyze_bell(bell))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Measured {measured} audio row(s), {failed} failed; "
+            f"updated gain of {regained} measured row(s); measured {bells} bell(s)"
+        ))
+
+    def _audios(self, remeasure: bool):
+        """Measure new rows and recompute gains of measured ones, saving in batches."""
+        measured = failed = regained = 0
+        batch = []
+        for audio in Audio.objects.all().iterator():
+            if audio.loudness_lufs is not None and not remeasure:
+                gain = compute_gain(audio.loudness_lufs, audio.true_peak_dbtp)
+                if gain == audio.gain_db:
+                    continue
+                audio.gain_db = gain
+                regained += 1
+            elif NUMPY_AVAILABLE and analyze_audio(audio, save=False):
+                measured += 1
+            else:
+                failed += 1
+                continue
+            batch.append(audio)
+            if len(batch) >= BATCH_SIZE:
+                self._save(batch)
+                batch = []
+        if batch:
+            self._save(batch)
+        return measured, failed, regained
+
+    def _save(self, batch):
+        with transaction.atomic():
+            Audio.objects.bulk_update(batch, list(LOUDNESS_FIELDS))
@@ -0,0 +1,122 @@
+"""
+Django Management Command: ingest_audio
+
+Parses audio headers (duration, sample rate, channels, codec, peak/RMS level,
+content hash) and stores them on Audio rows.
+
+Usage:
+    python manage.py ingest_audio                  # fill rows without metadata
+    python manage.py ingest_audio --all            # re-probe every row
+    python manage.py ingest_audio --transcode      # also transcode rows not yet ready
+    python manage.py ingest_audio audio/thai ...   # also import new files from directories
+
+Imported files are named after the file name without its extension, like the
+initial audio migration. Files whose path is already in the table are skipped.
+"""
+
+import logging
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from data.models import Audio
+from data.lib.audio_metadata import METADATA_FIELDS, ingest_audio
+from data.lib.render_cache import bump_data_generation
+from data.lib.transcoder import get_transcode_pool
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3')
+
+# Rows written per bulk_update / bulk_create
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Store audio metadata on Audio rows and import new audio files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directories',
+            nargs='*',
+            help='Directories whose .wav/.mp3 files are imported as Audio rows',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-probe rows that already have metadata',
+        )
+        parser.add_argument(
+            '--transcode',
+            action='store_true',
+            help='Convert rows that are not ready to the mixer format',
+        )
+
+    def handle(self, *args, **options):
+        probed, failed = self._backfill(options['all'])
+        imported = 0
+        for directory in options['directories']:
+            imported += self._import_directory(directory)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Probed {probed} audio row(s), {failed} without metadata; imported {imported} new file(s)"
+        ))
+
+        if options['transcode']:
+            ready = self._transcode()
+            self.stdout.write(self.style.SUCCESS(f"Transcoded {ready} audio row(s)"))
+
+    def _backfill(self, reprobe: bool):
+        """Probe existing rows and save them in batches."""
+        audios = Audio.objects.all() if reprobe else Audio.objects.filter(content_hash='')
+        probed = failed = 0
+        batch = []
+        for audio in audios.iterator():
+            if ingest_audio(audio, save=False):
+                probed += 1
+                batch.append(audio)
+            else:
+                failed += 1
+            if len(batch) >= BATCH_SIZE:
+                self._save(batch)
+                batch = []
+        if batch:
+            self._save(batch)
+        return probed, failed
+
+    def _transcode(self) -> int:
+        """Transcode every row that is not ready on the worker pool and wait."""
+        pool = get_transcode_pool()
+        ids = Audio.objects.exclude(status=Audio.Status.READY).values_list('id', flat=True)
+        futures = [pool.submit_now(audio_id) for audio_id in ids]
+        ready = sum(1 for future in futures if future.result())
+        pool.shutdown()
+        return ready
+
+    def _save(self, batch):
+        with transaction.atomic():
+            Audio.objects.bulk_update(batch, list(METADATA_FIELDS))
+            bump_data_generation()
+
+    def _import_directory(self, directory: str) -> int:
+        """Create Audio rows with metadata for files not yet in the table."""
+        if not os.path.isdir(directory):
+            raise CommandError(f"Not a directory: {directory}")
+
+        known = set(Audio.objects.values_list('path', flat=True))
+        new = []
+        for filename in sorted(os.listdir(directory)):
+            path = os.path.join(directory, filename)
+            if not filename.lower().endswith(AUDIO_EXTENSIONS) or path in known:
+                continue
+            audio = Audio(name=os.path.splitext(filename)[0], path=path)
+            ingest_audio(audio, save=False)
+            new.append(audio)
+
+        with transaction.atomic():
+            Audio.objects.bulk_create(new, batch_size=BATCH_SIZE)
+            if new:
+                bump_data_generation()
+        logger.info(f"Imported {len(new)} audio file(s) from {directory}")
+        return len(new)
@@ -0,0 +1,91 @@
+"""
+Django Management Command: trim_silence
+
+Finds leading and trailing silence in announcement fragments and library
+clips and stores the trim points the player honours. Reports total playing
+time before and after trimming.
+
+Usage:
+    python manage.py trim_silence              # time fragments + clips not yet scanned
+    python manage.py trim_silence --all        # re-scan every clip
+    python manage.py trim_silence -v 2         # also list each clip
+
+Time fragments are the files tell_hour() and tell_minute() can return; they
+are always scanned, as there are few of them and they may be replaced on disk.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from data.models import Audio
+from data.lib.loudness import NUMPY_AVAILABLE
+from data.lib.silence import TRIM_FIELDS, announcement_fragments, trim_audio, trim_fragment
+
+logger = logging.getLogger(__name__)
+
+# Rows written per bulk_update
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Store leading/trailing silence trim points for announcement fragments and audio clips'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-scan clips that already have trim points',
+        )
+
+    def handle(self, *args, **options):
+        if not NUMPY_AVAILABLE:
+            self.stdout.write(self.style.ERROR('numpy is not installed; nothing was scanned'))
+            return
+
+        self._verbosity = options['verbosity']
+        fragments = [(path, trim_fragment(path)) for path in announcement_fragments()]
+        self._report('Time fragments', fragments)
+        self._report('Audio clips', self._audios(options['all']))
+
+    def _audios(self, rescan: bool):
+        """Scan clips and save their trim points in batches."""
+        audios = Audio.objects.all() if rescan else Audio.objects.filter(trim_start__isnull=True)
+        results = []
+        batch = []
+        for audio in audios.iterator():
+            trim = trim_audio(audio, save=False)
+            results.append((audio.name, trim))
+            if trim:
+                batch.append(audio)
+            if len(batch) >= BATCH_SIZE:
+                self._save(batch)
+                batch = []
+        if batch:
+            self._save(batch)
+        return results
+
+    def _save(self, batch):
+        with transaction.atomic():
+            Audio.objects.bulk_update(batch, list(TRIM_FIELDS))
+
+    def _report(self, label, results):
+        """Print playing time before and after trimming."""
+        scanned = [(name, trim) for name, trim in results if trim and trim.duration is not None]
+        failed = len(results) - len(scanned)
+        before = sum(trim.duration for _, trim in scanned)
+        after = sum(trim.length for _, trim in scanned)
+
+        if self._verbosity >= 2:
+            for name, trim in scanned:
+                self.stdout.write(
+                    f"  {name}: {trim.duration:.2f}s -> {trim.length:.2f}s "
+                    f"(-{trim.start:.2f}s start, -{trim.end:.2f}s end)"
+                )
+        saved = before - after
+        per_clip = saved / len(scanned) * 1000 if scanned else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: scanned {len(scanned)}, {failed} unreadable; "
+            f"{before:.2f}s -> {after:.2f}s, {saved:.2f}s of silence removed ({per_clip:.0f} ms per clip)"
+        ))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0014_schedule_enable_bell_sound'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audio',
+            index=models.Index(fields=['name', 'id'], name='audio_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['time', 'id'], name='schedule_time_id_idx'),
+        ),
+    ]
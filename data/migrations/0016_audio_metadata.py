@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0015_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audio',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='codec',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='peak_dbfs',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='rms_dbfs',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0016_audio_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audio',
+            name='playback_path',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=16),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0017_audio_transcoding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audio',
+            name='gain_db',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='loudness_lufs',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='true_peak_dbtp',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bell',
+            name='first_gain_db',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bell',
+            name='last_gain_db',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
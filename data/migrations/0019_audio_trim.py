@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0018_audio_loudness'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioFragment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, unique=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('trim_start', models.FloatField(default=0)),
+                ('trim_end', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='trim_end',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='audio',
+            name='trim_start',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -1,15 +1,62 @@
 from django.db import models
-from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_delete, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
 # Create your models here.
 class Audio(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending'        # waiting for transcoding; plays the original
+        PROCESSING = 'processing'
+        READY = 'ready'            # playback_path holds the mixer-format copy
+        FAILED = 'failed'          # could not transcode; plays the original
+
     name = models.CharField(max_length=255)
-    path = models.TextField()
+    path = models.TextField()  # original file, always kept
+    # Copy in the mixer's native format written by data.lib.transcoder
+    playback_path = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    # Filled once at ingestion by data.lib.audio_metadata; empty if the file could not be parsed
+    duration = models.FloatField(null=True, blank=True)  # seconds
+    sample_rate = models.PositiveIntegerField(null=True, blank=True)
+    channels = models.PositiveSmallIntegerField(null=True, blank=True)
+    codec = models.CharField(max_length=32, blank=True, default='')
+    peak_dbfs = models.FloatField(null=True, blank=True)
+    rms_dbfs = models.FloatField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)  # SHA-256
+    # Measured once by data.lib.loudness; gain_db is applied as mixer volume at playback
+    loudness_lufs = models.FloatField(null=True, blank=True)
+    true_peak_dbtp = models.FloatField(null=True, blank=True)
+    gain_db = models.FloatField(null=True, blank=True)
+    # Seconds of leading/trailing silence skipped at playback (data.lib.silence); None until scanned
+    trim_start = models.FloatField(null=True, blank=True)
+    trim_end = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the sound library (ORDER BY name, id)
+            models.Index(fields=['name', 'id'], name='audio_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def playable_path(self):
+        """File to hand to the player: the transcoded copy once ready, else the original."""
+        if self.status == self.Status.READY and self.playback_path:
+            return self.playback_path
+        return self.path
+
+class AudioFragment(models.Model):
+    """Built-in clip played by path (time announcements), not listed in the sound library."""
+    path = models.CharField(max_length=500, unique=True)
+    duration = models.FloatField(null=True, blank=True)  # seconds, untrimmed
+    trim_start = models.FloatField(default=0)  # seconds of leading silence skipped
+    trim_end = models.FloatField(default=0)  # seconds of trailing silence skipped
+
+    def __str__(self):
+        return self.path
+
 class Day(models.Model):
     name = models.CharField(max_length=100)
     name_eng = models.CharField(max_length=100,null=True)
@@ -21,6 +68,9 @@ class Bell(models.Model):
     first = models.TextField()
     last = models.TextField()
     status = models.BooleanField(default=False)
+    # Playback gain of each sound (data.lib.loudness); None plays at unity
+    first_gain_db = models.FloatField(null=True, blank=True)
+    last_gain_db = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -32,6 +82,13 @@ class Schedule(models.Model):
     bell_sound = models.ForeignKey(Bell, on_delete=models.SET_NULL, null=True, blank=True)  # เสียงระฆัง
     tell_time = models.BooleanField(default=True)
     enable_bell_sound = models.BooleanField(default=True)  # เพิ่ม field นี้
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the timetable (ORDER BY time, id)
+            models.Index(fields=['time', 'id'], name='schedule_time_id_idx'),
+        ]
+
     def __str__(self):
         return f"Schedule {self.id}"
     
@@ -45,4 +102,25 @@ class Utility(models.Model):
 # Signal receiver to remove related Day instances when Schedule is deleted
 @receiver(pre_delete, sender=Schedule)
 def delete_notification_days(sender, instance, **kwargs):
-    instance.notification_days.clear()
\ No newline at end of file
+    instance.notification_days.clear()
+
+# Keep the cached settings store (data.lib.settings_store) in sync with Utility writes
+@receiver(post_save, sender=Utility)
+@receiver(post_delete, sender=Utility)
+def invalidate_settings_cache(sender, instance, **kwargs):
+    from data.lib.settings_store import get_settings_store
+    get_settings_store().utility_changed(instance.name)
+
+# Bump the render cache generation (data.lib.render_cache) on timetable writes
+@receiver(post_save, sender=Audio)
+@receiver(post_delete, sender=Audio)
+@receiver(post_save, sender=Bell)
+@receiver(post_delete, sender=Bell)
+@receiver(post_save, sender=Day)
+@receiver(post_delete, sender=Day)
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+@receiver(m2m_changed, sender=Schedule.notification_days.through)
+def invalidate_render_cache(sender, **kwargs):
+    from data.lib.render_cache import bump_data_generation
+    bump_data_generation(using=kwargs.get('using'))
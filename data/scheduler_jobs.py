@@ -14,6 +14,7 @@ from pytz import timezone
 from django.db import close_old_connections
 
 from data.models import Schedule, Utility
+from data.lib.settings_store import get_settings_store
 from data.time_sound import tell_hour, tell_minute
 from data.lib.audio_player import get_audio_player
 
@@ -138,7 +139,7 @@ def _build_sound_sequence(schedule: Schedule, hour: int, minute: int) -> List[st
     
     # Add custom sound if specified
     if schedule.sound:
-        sound_paths.append(schedule.sound.path)
+        sound_paths.append(schedule.sound.playable_path)
     
     # Add closing bell sound if enabled
     if schedule.enable_bell_sound and schedule.bell_sound:
@@ -235,12 +236,11 @@ def monitor_wifi_connection():
         
         # Check if monitoring is enabled
         try:
-            enabled = Utility.objects.filter(name='wifi_monitor_enabled').first()
-            if not enabled or enabled.value != 'true':
+            if not get_settings_store().get('wifi_monitor_enabled'):
                 logger.debug("WiFi monitoring is disabled")
                 return "WiFi monitoring disabled"
         except Exception:
-            pass  # If record doesn't exist, continue
+            pass  # If the settings can't be read, continue
         
         # Check if NetworkManager is available
         if not is_network_manager_available():
@@ -270,10 +270,7 @@ def monitor_wifi_connection():
 def _get_wifi_down_count() -> int:
     """Get WiFi down count from database."""
     try:
-        count_obj = Utility.objects.filter(name='wifi_down_count').first()
-        if count_obj:
-            return int(count_obj.value)
-        return 0
+        return get_settings_store().get('wifi_down_count')
     except Exception:
         return 0
 
@@ -281,10 +278,7 @@ def _get_wifi_down_count() -> int:
 def _set_wifi_down_count(count: int):
     """Set WiFi down count in database."""
     try:
-        Utility.objects.update_or_create(
-            name='wifi_down_count',
-            defaults={'value': str(count)}
-        )
+        get_settings_store().set('wifi_down_count', count)
     except Exception as e:
         logger.error(f"Error setting wifi_down_count: {e}")
 
@@ -304,17 +298,14 @@ def _handle_ap_mode_monitoring() -> str:
         
         # Track when WiFi came back
         try:
-            wifi_back_time = Utility.objects.filter(name='wifi_back_time').first()
-            if not wifi_back_time:
+            store = get_settings_store()
+            back_timestamp = store.get('wifi_back_time')
+            if back_timestamp is None:
                 # First detection - save timestamp
-                Utility.objects.create(
-                    name='wifi_back_time',
-                    value=str(datetime.now().timestamp())
-                )
+                store.set('wifi_back_time', datetime.now().timestamp())
                 return "WiFi back - waiting 5 minutes"
             else:
                 # Check if 5 minutes have passed
-                back_timestamp = float(wifi_back_time.value)
                 elapsed = datetime.now().timestamp() - back_timestamp
                 
                 if elapsed >= 300:  # 5 minutes
@@ -324,14 +315,10 @@ def _handle_ap_mode_monitoring() -> str:
                     if success:
                         # Reset state
                         _set_wifi_down_count(0)
-                        Utility.objects.filter(name='in_fallback_mode').delete()
-                        Utility.objects.filter(name='wifi_back_time').delete()
+                        store.delete('in_fallback_mode', 'wifi_back_time')
                         
                         # Record event
-                        Utility.objects.update_or_create(
-                            name='last_fallback_time',
-                            defaults={'value': str(datetime.now().timestamp())}
-                        )
+                        store.set('last_fallback_time', datetime.now().timestamp())
                         
                         logger.info("✓ Successfully returned to client mode")
                         return "Returned to client mode"
@@ -347,7 +334,7 @@ def _handle_ap_mode_monitoring() -> str:
             return f"Error: {str(e)}"
     else:
         # Still no WiFi/Internet - reset timer
-        Utility.objects.filter(name='wifi_back_time').delete()
+        get_settings_store().delete('wifi_back_time')
         return "Still no WiFi - waiting in AP mode"
 
 
@@ -373,10 +360,7 @@ def _handle_client_mode_monitoring(wifi_down_count: int) -> str:
             if current:
                 ssid = current.get('ssid')
                 if ssid:
-                    Utility.objects.update_or_create(
-                        name='last_known_ssid',
-                        defaults={'value': ssid}
-                    )
+                    get_settings_store().set('last_known_ssid', ssid)
         except Exception as e:
             logger.error(f"Error saving SSID: {e}")
         
@@ -393,12 +377,11 @@ def _handle_client_mode_monitoring(wifi_down_count: int) -> str:
             logger.warning("WiFi down for 3 minutes, switching to AP mode...")
             
             # Get AP configuration from database
+            store = get_settings_store()
             try:
-                ap_ssid_obj = Utility.objects.filter(name='ap_ssid').first()
-                ap_password_obj = Utility.objects.filter(name='ap_password').first()
-                
-                ap_ssid = ap_ssid_obj.value if ap_ssid_obj else None
-                ap_password = ap_password_obj.value if ap_password_obj else None
+                ap_config = store.get_many('ap_ssid', 'ap_password')
+                ap_ssid = ap_config['ap_ssid']
+                ap_password = ap_config['ap_password']
             except Exception:
                 ap_ssid = None
                 ap_password = None
@@ -408,30 +391,16 @@ def _handle_client_mode_monitoring(wifi_down_count: int) -> str:
             
             if success:
                 # Save fallback state
-                Utility.objects.update_or_create(
-                    name='in_fallback_mode',
-                    defaults={'value': 'true'}
-                )
-                Utility.objects.update_or_create(
-                    name='last_fallback_time',
-                    defaults={'value': str(datetime.now().timestamp())}
-                )
+                store.set('in_fallback_mode', True)
+                store.set('last_fallback_time', datetime.now().timestamp())
                 
                 # Save AP password if generated
                 if ap_info.get('password'):
-                    Utility.objects.update_or_create(
-                        name='ap_password',
-                        defaults={'value': ap_info['password']}
-                    )
+                    store.set('ap_password', ap_info['password'])
                 
                 # Increment fallback counter
                 try:
-                    count_obj = Utility.objects.filter(name='fallback_count').first()
-                    if count_obj:
-                        count_obj.value = str(int(count_obj.value) + 1)
-                        count_obj.save()
-                    else:
-                        Utility.objects.create(name='fallback_count', value='1')
+                    store.set('fallback_count', store.get('fallback_count') + 1)
                 except Exception:
                     pass
                 
@@ -21,6 +21,20 @@ play_thread = None
 stop_event = threading.Event()
 
 
+def wrap_with_bells(sound_paths=None):
+    """
+    Build the sequence play_sound() actually plays.
+    
+    No paths plays the three default bells; a single path is wrapped with
+    a bell before and after it.
+    """
+    if not sound_paths:
+        return ['audio/bell/sound1/First.wav', 'audio/bell/sound2/First.wav', 'audio/bell/sound3/First.wav']
+    if len(sound_paths) == 1:
+        return ['audio/bell/sound1/First.wav', sound_paths[0], 'audio/bell/sound1/First.wav']
+    return list(sound_paths)
+
+
 def play_sound(sound_paths=None):
     """
     Play a sequence of audio files.
@@ -28,19 +42,15 @@ def play_sound(sound_paths=None):
     Args:
         sound_paths: List of file paths to play in sequence
         
+    Returns:
+        The background playback thread (join() waits for the sequence to end)
+        
     Uses pygame mixer for cross-platform audio playback.
     Falls back to ffplay if available.
     """
     global current_process, play_thread, stop_event
     
-    if sound_paths is None:
-        sound_paths = []
-    
-    # If only 1 song, wrap it with bell sounds
-    if not sound_paths:
-        sound_paths = ['audio/bell/sound1/First.wav', 'audio/bell/sound2/First.wav', 'audio/bell/sound3/First.wav']
-    elif len(sound_paths) == 1:
-        sound_paths = ['audio/bell/sound1/First.wav', sound_paths[0], 'audio/bell/sound1/First.wav']
+    sound_paths = wrap_with_bells(sound_paths)
     
     def play_sequence():
         """Play audio files in sequence using pygame or ffplay"""
@@ -101,6 +111,7 @@ def play_sound(sound_paths=None):
     play_thread = threading.Thread(target=play_sequence, daemon=True)
     play_thread.start()
     logger.info("Started audio playback thread")
+    return play_thread
 
 
 def stop_sound():
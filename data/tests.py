@@ -7,6 +7,7 @@ import os
 from django.conf import settings as django_settings # Renamed to avoid conflict
 from datetime import time as dt_time
 import data.views # Required for path calculations
+from data.lib.env_config import EnvSnapshot
 import requests # For requests.exceptions.RequestException
 import subprocess # For subprocess.CalledProcessError, subprocess.PIPE
 from django.core.files.uploadedfile import SimpleUploadedFile # Added import
@@ -109,8 +110,7 @@ class ViewTests(TestCase):
         self.mock_shutil_rmtree = patch('data.views.shutil.rmtree').start()
         self.mock_builtin_open = patch('builtins.open', new_callable=mock_open).start() # For general file ops
         self.mock_views_open = patch('data.views.open', new_callable=mock_open).start() # Specifically for open in views if not builtin
-        self.mock_config_class = patch('data.views.Config').start()
-        self.mock_repository_env_class = patch('data.views.RepositoryEnv').start()
+        self.mock_get_env_snapshot = patch('data.views.get_env_snapshot').start()
         self.mock_platform_system = patch('data.views.platform.system').start()
         self.mock_subprocess_popen = patch('data.views.subprocess.Popen').start()
         self.mock_subprocess_run = patch('data.views.subprocess.run').start()
@@ -119,37 +119,40 @@ class ViewTests(TestCase):
         self.mock_platform_system.return_value = "Linux"
         self.mock_os_path_exists.return_value = False # Default: .env does not exist, other paths might not exist
         
-        self.mock_config_instance = MagicMock()
-        self.mock_config_class.return_value = self.mock_config_instance
-        self.mock_config_instance.side_effect = lambda key, default=None: {
+        self.env_values = {
             "DEBUG": "True", "SECRET_KEY": "akey", "ALLOWED_HOSTS": "localhost", "CSRF_TRUSTED_ORIGINS": "http://localhost"
-        }.get(key, default)
+        }
+        self.mock_get_env_snapshot.return_value = EnvSnapshot(exists=False, values={}, missing_vars=list(self.env_values))
+
+    def set_env_snapshot(self, exists, missing_vars=()):
+        self.mock_get_env_snapshot.return_value = EnvSnapshot(
+            exists=exists, values=self.env_values if exists else {}, missing_vars=list(missing_vars)
+        )
 
     def tearDown(self):
         patch.stopall()
 
     # Tests for check_env_file decorator (via index view)
     def test_check_env_file_decorator_no_env_file(self):
-        self.mock_os_path_exists.side_effect = lambda path: path != self.env_file_path_in_views
+        self.set_env_snapshot(exists=False, missing_vars=self.env_values)
         response = self.client.get(reverse('index'))
         self.assertRedirects(response, '/setup')
-        self.mock_os_path_exists.assert_any_call(self.env_file_path_in_views)
+        self.mock_get_env_snapshot.assert_called()
 
     def test_check_env_file_decorator_missing_vars(self):
-        self.mock_os_path_exists.side_effect = lambda path: path == self.env_file_path_in_views
-        self.mock_config_instance.side_effect = lambda key, default=None: {"DEBUG": "True"}.get(key, default) # Missing SECRET_KEY
+        self.set_env_snapshot(exists=True, missing_vars=["SECRET_KEY", "ALLOWED_HOSTS", "CSRF_TRUSTED_ORIGINS"]) # Only DEBUG set
         response = self.client.get(reverse('index')) # This call is decorated
         self.assertRedirects(response, '/setup', fetch_redirect_response=False) # Tell it not to follow
 
     # index view
     def test_index_view_success(self):
-        self.mock_os_path_exists.side_effect = lambda path: path == self.env_file_path_in_views # .env exists
-        # Default mock_config_instance is fine for success
+        self.set_env_snapshot(exists=True) # .env exists with all required vars
         response = self.client.get(reverse('index'))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'main.html')
-        self.assertIn('audios', response.context)
-        self.assertEqual(list(response.context['schedules']), [self.schedule1])
+        self.assertIn('bells', response.context)
+        # Schedules and audios are fetched page by page from the JSON API
+        self.assertNotIn('schedules', response.context)
 
     # save_form view
     def test_save_form_success(self):
@@ -196,7 +199,7 @@ class ViewTests(TestCase):
         response = self.client.get(reverse('sound'))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'sound.html')
-        self.assertIn('audios', response.context)
+        self.assertNotIn('audios', response.context)
 
     # setting view
     def test_setting_view_with_api_key(self):
@@ -213,12 +216,12 @@ class ViewTests(TestCase):
 
     # setup view
     def test_setup_view_env_exists(self):
-        self.mock_os_path_exists.side_effect = lambda path: path == self.env_file_path_in_views
+        self.set_env_snapshot(exists=True)
         response = self.client.get(reverse('setup'))
         self.assertRedirects(response, '/')
 
     def test_setup_view_no_env(self):
-        self.mock_os_path_exists.side_effect = lambda path: path != self.env_file_path_in_views
+        self.set_env_snapshot(exists=False)
         response = self.client.get(reverse('setup'))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'setup.html')
@@ -284,7 +287,11 @@ class ViewTests(TestCase):
         self.mock_os_makedirs.assert_called_with(temp_dir, exist_ok=True)
         self.mock_views_open.assert_called_with(os.path.join(temp_dir, 'temp.wav'), 'wb')
         self.mock_play_sound_task.assert_called_with([os.path.join(temp_dir, 'temp.wav')])
-        mock_sleep.assert_called_with(3) # ceil(2.5)
+        # Waits for playback to finish instead of sleeping for the clip length
+        playback = self.mock_play_sound_task.return_value
+        playback.join.assert_called_once()
+        self.assertGreaterEqual(playback.join.call_args.kwargs['timeout'], 3) # at least ceil(2.5)
+        self.assertNotIn(call(3), mock_sleep.call_args_list)
         self.mock_shutil_rmtree.assert_called_with(temp_dir)
 
     def test_text_to_speech_api_key_not_found(self):
@@ -307,7 +314,7 @@ class ViewTests(TestCase):
 
     # api_setup view
     def test_api_setup_success_linux(self):
-        self.mock_os_path_exists.side_effect = lambda path: path != self.env_file_path_in_views # .env does not exist
+        self.set_env_snapshot(exists=False) # .env does not exist
         self.mock_platform_system.return_value = "Linux"
         self.mock_subprocess_popen.return_value = MagicMock(pid=12345) # Mock the Popen object
 
@@ -318,7 +325,7 @@ class ViewTests(TestCase):
         self.mock_subprocess_popen.assert_called_once()
 
     def test_api_setup_env_exists(self):
-        self.mock_os_path_exists.side_effect = lambda path: path == self.env_file_path_in_views # .env exists
+        self.set_env_snapshot(exists=True) # .env exists
         response = self.client.post(reverse('api_setup'), {'domain': 'http://localhost:8000'})
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json()['error'], '.env file already exists.')
@@ -366,11 +373,14 @@ class ViewTests(TestCase):
         # This script_path is for the assertion, and should match the mocked SCRIPT_PATH in the view
         expected_script_path_for_chmod = mock_script_path_in_view
 
-        response = self.client.get(reverse('api_update'))
+        mock_runner = MagicMock()
+        mock_runner.start.return_value = 12345
+        with patch('data.views.get_update_runner', return_value=mock_runner):
+            response = self.client.get(reverse('api_update'))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['process_id'], 12345)
         self.mock_subprocess_run.assert_called_with(["chmod", "+x", expected_script_path_for_chmod], check=True)
-        self.mock_subprocess_popen.assert_called_with([expected_script_path_for_chmod], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, shell=True, cwd='/fake/basedir')
+        mock_runner.start.assert_called_with([expected_script_path_for_chmod], cwd='/fake/basedir', log_path=data.views.STATUS_FILE_PATH)
 
     def test_api_update_windows_not_supported(self):
         self.mock_platform_system.return_value = "Windows"
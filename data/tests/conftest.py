@@ -306,6 +306,51 @@ def frozen_time_tuesday_14_00():
     frozen_time.stop()
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Assert a block stays within a query budget.
+    
+    Usage::
+    
+        with query_budget(max_queries=5, max_repeats=1):
+            client.get('/')
+    
+    Returns:
+        data.lib.query_budget.assert_query_budget context manager
+    """
+    from data.lib.query_budget import assert_query_budget
+    return assert_query_budget
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings_store():
+    """
+    Drop the cached settings store before and after each test.
+    
+    Test transactions are rolled back without firing signals, so a cached
+    copy of the Utility table could otherwise leak between tests.
+    """
+    from data.lib.settings_store import get_settings_store
+    get_settings_store().invalidate()
+    yield
+    get_settings_store().invalidate()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Clear Django's cache before and after each test.
+    
+    Render cache generations are bumped on commit, and test transactions
+    never commit, so cached fragments could otherwise leak between tests.
+    """
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 @pytest.mark.django_db
 def clear_utility_state():
@@ -323,6 +368,34 @@ def clear_utility_state():
     Utility.objects.all().delete()
 
 
+@pytest.fixture
+def make_wav():
+    """
+    Factory writing a 16-bit PCM sine wave file.
+    
+    Returns:
+        make(path, seconds=1.0, rate=8000, channels=1, amplitude=0.5) -> path
+    """
+    import math
+    import struct
+    import wave
+
+    def make(path, seconds=1.0, rate=8000, channels=1, amplitude=0.5):
+        peak = int(amplitude * 32767)
+        samples = b''.join(
+            struct.pack('<h', int(peak * math.sin(2 * math.pi * 440 * i / rate))) * channels
+            for i in range(int(seconds * rate))
+        )
+        with wave.open(str(path), 'wb') as w:
+            w.setnchannels(channels)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(samples)
+        return path
+
+    return make
+
+
 @pytest.fixture
 def mock_tell_time():
     """
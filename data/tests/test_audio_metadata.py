@@ -0,0 +1,171 @@
+"""
+Tests for audio metadata extraction
+
+Tests cover:
+- WAV headers and levels (integer and float PCM)
+- MPEG headers (CBR and Xing VBR)
+- Ingestion on upload and through the ingest_audio command
+- Sequence duration from stored metadata
+"""
+
+import io
+import struct
+from unittest.mock import patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from data.models import Audio, AudioFragment
+from data.lib import audio_metadata
+from data.lib.audio_metadata import AudioMetadataError, probe_audio, sequence_duration
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo, no padding
+MP3_HEADER = b'\xff\xfb\x90\x00'
+MP3_FRAME_LENGTH = 417
+
+
+def write_float_wav(path, samples, rate=22050):
+    """Write a mono 32-bit float WAV with an extra chunk before the data."""
+    data = struct.pack(f'<{len(samples)}f', *samples)
+    fmt = struct.pack('<HHIIHH', 3, 1, rate, rate * 4, 4, 32)
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    body += b'LIST' + struct.pack('<I', 3) + b'abc\x00'
+    body += b'data' + struct.pack('<I', len(data)) + data
+    path.write_bytes(b'RIFF' + struct.pack('<I', len(body)) + body)
+    return path
+
+
+def write_mp3(path, frames, xing_frames=None):
+    """Write silent MP3 frames, optionally with a Xing header in the first one."""
+    first = bytearray(MP3_HEADER + bytes(MP3_FRAME_LENGTH - 4))
+    if xing_frames is not None:
+        first[36:48] = b'Xing' + struct.pack('>II', 1, xing_frames)
+    frame = MP3_HEADER + bytes(MP3_FRAME_LENGTH - 4)
+    id3 = b'ID3\x03\x00\x00' + bytes([0, 0, 0, 20]) + bytes(20)
+    path.write_bytes(id3 + bytes(first) + frame * (frames - 1))
+    return path
+
+
+@pytest.mark.unit
+class TestProbe:
+    """Test header parsing."""
+
+    def test_pcm_wav(self, make_wav, tmp_path):
+        """Test duration, format and levels of a half-scale sine."""
+        metadata = probe_audio(str(make_wav(tmp_path / 'a.wav', seconds=1.5, channels=2)))
+
+        assert metadata.duration == 1.5
+        assert (metadata.sample_rate, metadata.channels, metadata.codec) == (8000, 2, 'pcm')
+        assert metadata.peak_dbfs == pytest.approx(-6.02, abs=0.05)
+        assert metadata.rms_dbfs == pytest.approx(-9.03, abs=0.05)
+        assert len(metadata.content_hash) == 64
+
+    def test_levels_without_numpy(self, make_wav, tmp_path):
+        """Test the pure-Python sample scan matches."""
+        path = str(make_wav(tmp_path / 'a.wav'))
+        expected = probe_audio(path)
+
+        with patch.object(audio_metadata, 'NUMPY_AVAILABLE', False):
+            assert probe_audio(path) == expected
+
+    def test_float_wav(self, tmp_path):
+        """Test float PCM and skipping unknown chunks."""
+        metadata = probe_audio(str(write_float_wav(tmp_path / 'f.wav', [0.0, 0.25, -1.0, 0.25] * 5512)))
+
+        assert metadata.codec == 'pcm_float'
+        assert metadata.duration == pytest.approx(1.0, abs=0.001)
+        assert metadata.peak_dbfs == 0.0
+
+    def test_mp3_cbr(self, tmp_path):
+        """Test CBR duration from the bitrate, skipping an ID3v2 tag."""
+        metadata = probe_audio(str(write_mp3(tmp_path / 'a.mp3', frames=100)))
+
+        assert (metadata.sample_rate, metadata.channels, metadata.codec) == (44100, 2, 'mp3')
+        assert metadata.duration == pytest.approx(100 * MP3_FRAME_LENGTH * 8 / 128000, abs=0.001)
+        assert metadata.peak_dbfs is None
+
+    def test_mp3_xing(self, tmp_path):
+        """Test VBR duration from the Xing frame count."""
+        metadata = probe_audio(str(write_mp3(tmp_path / 'a.mp3', frames=10, xing_frames=1000)))
+        assert metadata.duration == pytest.approx(1000 * 1152 / 44100, abs=0.001)
+
+    @pytest.mark.parametrize('content', [b'', b'not audio at all', b'RIFF\x00\x00\x00\x00WAVE'])
+    def test_invalid(self, tmp_path, content):
+        """Test unrecognised files raise AudioMetadataError."""
+        path = tmp_path / 'bad.wav'
+        path.write_bytes(content)
+        with pytest.raises(AudioMetadataError):
+            probe_audio(str(path))
+
+    def test_missing_file(self, tmp_path):
+        """Test a missing file raises AudioMetadataError."""
+        with pytest.raises(AudioMetadataError):
+            probe_audio(str(tmp_path / 'missing.wav'))
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestIngestion:
+    """Test metadata is stored when audio enters the system."""
+
+    def test_upload_stores_metadata(self, make_wav, tmp_path, monkeypatch):
+        """Test upload_file probes the saved file."""
+        monkeypatch.chdir(tmp_path)
+        content = make_wav(tmp_path / 'source.wav', seconds=2).read_bytes()
+
+        response = Client().post(reverse('upload_file'), {'file': SimpleUploadedFile('bell.wav', content)})
+
+        assert response.json()['duration'] == 2.0
+        audio = Audio.objects.get(name='bell.wav')
+        assert (audio.sample_rate, audio.channels, audio.codec) == (8000, 1, 'pcm')
+        assert audio.content_hash
+
+    def test_upload_unparseable_still_saved(self, tmp_path, monkeypatch):
+        """Test a file without readable headers is kept without metadata."""
+        monkeypatch.chdir(tmp_path)
+
+        Client().post(reverse('upload_file'), {'file': SimpleUploadedFile('x.mp3', b'garbage')})
+
+        audio = Audio.objects.get(name='x.mp3')
+        assert audio.duration is None
+        assert audio.content_hash == ''
+
+    def test_command_backfills_and_imports(self, make_wav, tmp_path):
+        """Test ingest_audio fills existing rows and imports new files."""
+        existing = Audio.objects.create(name='old', path=str(make_wav(tmp_path / 'old.wav')))
+        folder = tmp_path / 'clips'
+        folder.mkdir()
+        write_mp3(folder / 'new.mp3', frames=50)
+        (folder / 'notes.txt').write_text('skip')
+
+        call_command('ingest_audio', str(folder), stdout=io.StringIO())
+        call_command('ingest_audio', str(folder), stdout=io.StringIO())
+
+        existing.refresh_from_db()
+        assert existing.duration == 1.0
+        imported = Audio.objects.get(name='new')
+        assert imported.codec == 'mp3'
+        assert Audio.objects.filter(path__startswith=str(folder)).count() == 1
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestSequenceDuration:
+    """Test playback length estimates."""
+
+    def test_uses_stored_metadata(self, make_wav, tmp_path, django_assert_num_queries):
+        """Test stored durations are used without opening files, others are probed."""
+        Audio.objects.create(name='stored', path='/nonexistent/stored.wav', duration=3.5)
+        AudioFragment.objects.create(path='/nonexistent/fragment.mp3', duration=1.0)
+        other = str(make_wav(tmp_path / 'other.wav', seconds=0.5))
+
+        with django_assert_num_queries(2):
+            total = sequence_duration(
+                ['/nonexistent/stored.wav', '/nonexistent/fragment.mp3', other, '/nonexistent/unknown.wav'],
+                default=2,
+            )
+
+        assert total == 3.5 + 1.0 + 0.5 + 2
@@ -0,0 +1,102 @@
+"""
+Unit Tests for the cached .env snapshot
+
+Tests cover:
+- Missing file and missing variable detection
+- stat() throttling within CHECK_INTERVAL
+- Re-parsing only when the file changes
+- Explicit invalidation
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from data.lib import env_config
+from data.lib.env_config import get_env_snapshot, invalidate_env_snapshot
+
+COMPLETE_ENV = "SECRET_KEY=abc\nDEBUG=False\nALLOWED_HOSTS=localhost\nCSRF_TRUSTED_ORIGINS=http://localhost\n"
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Start every test with an empty snapshot cache."""
+    invalidate_env_snapshot()
+    yield
+    invalidate_env_snapshot()
+
+
+@pytest.fixture
+def env_file(tmp_path, monkeypatch):
+    """Path of a temporary .env file; required vars removed from os.environ."""
+    for var in env_config.REQUIRED_VARS:
+        monkeypatch.delenv(var, raising=False)
+    return tmp_path / '.env'
+
+
+@pytest.mark.unit
+class TestEnvSnapshot:
+    """Test get_env_snapshot results."""
+
+    def test_missing_file(self, env_file):
+        """Test a missing file is reported as incomplete."""
+        snapshot = get_env_snapshot(str(env_file))
+        assert not snapshot.exists
+        assert not snapshot.is_complete
+
+    def test_complete_file(self, env_file):
+        """Test a file with every required variable."""
+        env_file.write_text(COMPLETE_ENV)
+        snapshot = get_env_snapshot(str(env_file))
+        assert snapshot.is_complete
+        assert snapshot.values['ALLOWED_HOSTS'] == 'localhost'
+
+    def test_missing_variables(self, env_file):
+        """Test required variables absent from the file are listed."""
+        env_file.write_text("DEBUG=True\n")
+        snapshot = get_env_snapshot(str(env_file))
+        assert snapshot.exists
+        assert snapshot.missing_vars == ["SECRET_KEY", "ALLOWED_HOSTS", "CSRF_TRUSTED_ORIGINS"]
+
+
+@pytest.mark.unit
+class TestEnvSnapshotCache:
+    """Test snapshot caching and revalidation."""
+
+    def test_no_stat_within_interval(self, env_file):
+        """Test repeated calls within CHECK_INTERVAL do not touch the filesystem."""
+        env_file.write_text(COMPLETE_ENV)
+        get_env_snapshot(str(env_file))
+
+        with patch('data.lib.env_config.os.stat') as mock_stat:
+            for _ in range(10):
+                assert get_env_snapshot(str(env_file)).is_complete
+        mock_stat.assert_not_called()
+
+    def test_unchanged_file_not_reparsed(self, env_file):
+        """Test an expired snapshot is revalidated by stat() only."""
+        env_file.write_text(COMPLETE_ENV)
+        first = get_env_snapshot(str(env_file))
+
+        with patch('data.lib.env_config.RepositoryEnv') as mock_repo:
+            second = get_env_snapshot(str(env_file), max_age=0)
+        mock_repo.assert_not_called()
+        assert second is first
+
+    def test_changed_file_reparsed(self, env_file):
+        """Test a modified file is parsed again once the interval has passed."""
+        env_file.write_text("DEBUG=True\n")
+        assert not get_env_snapshot(str(env_file)).is_complete
+
+        env_file.write_text(COMPLETE_ENV)
+        os.utime(env_file, ns=(0, 10 ** 18))
+        assert get_env_snapshot(str(env_file), max_age=0).is_complete
+
+    def test_invalidate(self, env_file):
+        """Test invalidation makes a newly created file visible immediately."""
+        assert not get_env_snapshot(str(env_file)).exists
+
+        env_file.write_text(COMPLETE_ENV)
+        invalidate_env_snapshot(str(env_file))
+        assert get_env_snapshot(str(env_file)).exists
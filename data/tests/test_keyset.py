@@ -0,0 +1,119 @@
+"""
+Tests for keyset pagination and the listing endpoints
+
+Tests cover:
+- Cursor encoding
+- Walking every page in both directions, including NULL sort keys
+- Schedule filters (day, sound, time range)
+- Audio search
+"""
+
+from datetime import time
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from data.models import Audio, Schedule
+from data.lib.keyset import decode_cursor, encode_cursor, keyset_page
+
+
+def _walk(queryset, ordering, limit):
+    """Collect ids from every page."""
+    ids, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(queryset, ordering, cursor, limit)
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+
+
+@pytest.fixture
+def schedules(test_day_monday, test_day_tuesday, test_audio):
+    """Schedules with duplicate and NULL times."""
+    created = []
+    for value in [time(8, 0), time(8, 0), None, time(12, 0), None, time(9, 30), time(8, 0)]:
+        schedule = Schedule.objects.create(time=value, sound=test_audio if value else None)
+        schedule.notification_days.add(test_day_monday if value != time(12, 0) else test_day_tuesday)
+        created.append(schedule)
+    return created
+
+
+@pytest.mark.unit
+class TestCursor:
+    """Test cursor encoding."""
+
+    def test_round_trip(self):
+        """Test values survive encoding, with times as ISO strings."""
+        assert decode_cursor(encode_cursor([time(8, 30), 5, None])) == ['08:30:00', 5, None]
+
+    def test_invalid(self):
+        """Test garbage is rejected."""
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor!')
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestKeysetPage:
+    """Test keyset_page ordering."""
+
+    @pytest.mark.parametrize('ordering', [('time', 'id'), ('-time', '-id'), ('id',), ('-id',)])
+    @pytest.mark.parametrize('limit', [1, 2, 3, 50])
+    def test_pages_match_full_ordering(self, schedules, ordering, limit):
+        """Test paging visits every row once, in the same order as one big page."""
+        queryset = Schedule.objects.all()
+        expected, _ = keyset_page(queryset, ordering, None, 1000)
+
+        assert _walk(queryset, ordering, limit) == [row.id for row in expected]
+
+    def test_nulls_first_ascending(self, schedules):
+        """Test NULL times sort first when ascending."""
+        rows, _ = keyset_page(Schedule.objects.all(), ('time', 'id'), None, 2)
+        assert [row.time for row in rows] == [None, None]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestListingEndpoints:
+    """Test /api/schedules/ and /api/audios/ listings."""
+
+    def test_schedule_filters(self, schedules, test_day_monday, test_audio):
+        """Test day, sound and time range filters."""
+        response = Client().get(reverse('api_schedules'), {
+            'day': 'monday', 'sound': test_audio.id, 'time_from': '08:00', 'time_to': '09:00',
+        })
+
+        results = response.json()['results']
+        assert len(results) == 3
+        assert {item['time'] for item in results} == {'08:00'}
+
+    def test_schedule_cursor_walk(self, schedules):
+        """Test following next_cursor returns every schedule once."""
+        seen, params = [], {'limit': 2, 'sort': '-time'}
+        while True:
+            body = Client().get(reverse('api_schedules'), params).json()
+            seen.extend(item['id'] for item in body['results'])
+            if not body['next_cursor']:
+                break
+            params['cursor'] = body['next_cursor']
+
+        assert sorted(seen) == sorted(s.id for s in schedules)
+        assert len(seen) == len(set(seen))
+
+    def test_invalid_sort(self):
+        """Test an unknown sort key is rejected."""
+        response = Client().get(reverse('api_schedules'), {'sort': 'sound'})
+        assert response.status_code == 400
+
+    def test_audio_search(self):
+        """Test audio listing with a name filter."""
+        for name in ['Bell A', 'bell B', 'Anthem']:
+            Audio.objects.create(name=name, path=f'/tmp/{name}.mp3')
+
+        body = Client().get(reverse('api_audios'), {'q': 'bell', 'limit': 1}).json()
+        assert [a['name'] for a in body['results']] == ['Bell A']
+
+        body = Client().get(reverse('api_audios'), {'q': 'bell', 'cursor': body['next_cursor']}).json()
+        assert [a['name'] for a in body['results']] == ['bell B']
+        assert body['next_cursor'] is None
@@ -0,0 +1,139 @@
+"""
+Unit Tests for incremental log tailing and the update progress stream
+
+Tests cover:
+- Reading only appended bytes by offset
+- Partial line handling and truncation
+- SSE message formatting
+- api_process incremental mode and api_process_stream events
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from data.lib.log_tail import read_log_chunk, format_sse
+
+
+@pytest.mark.unit
+class TestReadLogChunk:
+    """Test read_log_chunk offset handling."""
+
+    def test_missing_file(self, tmp_path):
+        """Test missing file returns nothing and keeps offset."""
+        assert read_log_chunk(str(tmp_path / 'missing.log'), 5) == ('', 5)
+
+    def test_reads_only_new_lines(self, tmp_path):
+        """Test consecutive reads return only appended content."""
+        log = tmp_path / 'status.log'
+        log.write_text('line 1\n')
+
+        text, offset = read_log_chunk(str(log))
+        assert text == 'line 1\n'
+
+        with open(log, 'a') as f:
+            f.write('line 2\n')
+
+        text, offset = read_log_chunk(str(log), offset)
+        assert text == 'line 2\n'
+        assert read_log_chunk(str(log), offset) == ('', offset)
+
+    def test_partial_line_held_back(self, tmp_path):
+        """Test an unterminated line is only returned when final."""
+        log = tmp_path / 'status.log'
+        log.write_text('done\npartial')
+
+        text, offset = read_log_chunk(str(log))
+        assert text == 'done\n'
+        assert read_log_chunk(str(log), offset) == ('', offset)
+
+        text, offset = read_log_chunk(str(log), offset, final=True)
+        assert text == 'partial'
+
+    def test_truncated_file_restarts(self, tmp_path):
+        """Test offset past end of file (log rewritten) restarts at 0."""
+        log = tmp_path / 'status.log'
+        log.write_text('new run\n')
+
+        text, offset = read_log_chunk(str(log), 1000)
+        assert text == 'new run\n'
+        assert offset == len('new run\n')
+
+    def test_max_bytes_limits_read(self, tmp_path):
+        """Test large output is split into bounded chunks."""
+        log = tmp_path / 'status.log'
+        log.write_text('a' * 10 + '\n' + 'b' * 10 + '\n')
+
+        text, offset = read_log_chunk(str(log), 0, max_bytes=15)
+        assert text == 'a' * 10 + '\n'
+        text, offset = read_log_chunk(str(log), offset, max_bytes=15)
+        assert text == 'b' * 10 + '\n'
+
+
+@pytest.mark.unit
+class TestFormatSSE:
+    """Test SSE message formatting."""
+
+    def test_format_with_event_and_id(self):
+        """Test id, event and JSON data lines."""
+        message = format_sse({'log': 'x'}, event='log', event_id=7)
+        assert message == 'id: 7\nevent: log\ndata: {"log": "x"}\n\n'
+
+    def test_format_multiline_string(self):
+        """Test multi-line strings become multiple data lines."""
+        assert format_sse('a\nb') == 'data: a\ndata: b\n\n'
+
+
+@pytest.mark.integration
+class TestProcessStreamViews:
+    """Test update progress endpoints backed by read_log_chunk."""
+
+    def test_api_process_offset_mode(self, client, tmp_path):
+        """Test ?offset= returns only new content and the next offset."""
+        log = tmp_path / 'process_status.log'
+        log.write_text('step 1\nstep 2\n')
+
+        with patch('data.views.STATUS_FILE_PATH', str(log)), \
+             patch('data.views.platform.system', return_value='Linux'), \
+             patch('data.views.is_process_running', return_value=True):
+            response = client.get('/api/process/123/?offset=7')
+
+        assert response.json() == {'status': 'running', 'log': 'step 2\n', 'offset': 14}
+
+    def test_stream_emits_log_then_status(self, client, tmp_path):
+        """Test SSE stream sends log lines and a final status event."""
+        log = tmp_path / 'process_status.log'
+        log.write_text('pulling\nreloading')
+
+        with patch('data.views.STATUS_FILE_PATH', str(log)), \
+             patch('data.views.platform.system', return_value='Linux'), \
+             patch('data.views.is_process_running', return_value=False):
+            response = client.get('/api/process/123/stream/')
+            body = b''.join(response.streaming_content).decode()
+
+        assert response['Content-Type'] == 'text/event-stream'
+        events = [block for block in body.split('\n\n') if block]
+        assert 'event: log' in events[1]
+        assert json.loads(events[1].split('data: ', 1)[1]) == {'log': 'pulling\nreloading'}
+        assert 'completed_or_not_found' in events[-1]
+
+    def test_stream_resumes_from_last_event_id(self, client, tmp_path):
+        """Test reconnecting clients only receive unseen output."""
+        log = tmp_path / 'process_status.log'
+        log.write_text('old\nnew\n')
+
+        with patch('data.views.STATUS_FILE_PATH', str(log)), \
+             patch('data.views.platform.system', return_value='Linux'), \
+             patch('data.views.is_process_running', return_value=False):
+            response = client.get('/api/process/123/stream/', HTTP_LAST_EVENT_ID='4')
+            body = b''.join(response.streaming_content).decode()
+
+        assert 'old' not in body
+        assert 'new' in body
+
+    def test_stream_invalid_pid(self, client):
+        """Test invalid process id is rejected."""
+        with patch('data.views.platform.system', return_value='Linux'):
+            response = client.get('/api/process/abc/stream/')
+        assert response.status_code == 400
@@ -0,0 +1,224 @@
+"""
+Tests for loudness measurement and playback gain
+
+Tests cover:
+- Integrated loudness, gating and true peak of synthetic signals
+- Gain limits (attenuation only, true-peak ceiling)
+- Measurement stored once per clip and reused by identical uploads
+- Gains applied as mixer volume at playback
+- The analyze_loudness backfill command
+"""
+
+import io
+import wave
+from unittest.mock import call, patch
+
+import pytest
+from django.core.management import call_command
+
+from data.models import Audio, Bell
+from data.lib import loudness
+from data.lib.loudness import (
+    analyze_audio, compute_gain, db_to_volume, integrated_loudness, measure_file, playback_gains, true_peak,
+)
+
+numpy = pytest.importorskip('numpy')
+
+
+def sine(frequency, seconds, rate=48000, amplitude=1.0, channels=2, phase=0.0):
+    t = numpy.arange(int(seconds * rate)) / rate
+    wave_ = amplitude * numpy.sin(2 * numpy.pi * frequency * t + phase)
+    return numpy.repeat(wave_[:, None], channels, axis=1)
+
+
+def write_pcm(path, samples, rate=48000):
+    """Write float samples shaped (frames, channels) as a 16-bit WAV."""
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(samples.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((samples * 32767).astype('<i2').tobytes())
+    return path
+
+
+@pytest.mark.unit
+class TestMeasure:
+    """Test BS.1770 measurement."""
+
+    def test_reference_sine(self):
+        """Test a stereo 997 Hz sine at -23 dBFS reads -23 LUFS (EBU Tech 3341 case 1)."""
+        samples = sine(997, 5, amplitude=10 ** (-23 / 20))
+        assert integrated_loudness(samples, 48000) == pytest.approx(-23.0, abs=0.1)
+
+    def test_other_rate(self):
+        """Test the K-weighting is derived for 44.1 kHz too."""
+        samples = sine(997, 3, rate=44100, amplitude=10 ** (-20 / 20))
+        assert integrated_loudness(samples, 44100) == pytest.approx(-20.0, abs=0.1)
+
+    def test_silence_is_gated(self):
+        """Test silent passages do not lower the integrated level."""
+        tone = sine(997, 3, amplitude=10 ** (-23 / 20))
+        padded = numpy.vstack([tone, numpy.zeros_like(tone)])
+        # Ungated, half the clip being silent would read 3 dB lower; only the
+        # few blocks straddling the end of the tone still count
+        assert integrated_loudness(padded, 48000) == pytest.approx(-23.0, abs=0.3)
+
+    def test_mono_counts_both_outputs(self):
+        """Test a mono clip is measured as the mixer plays it, on both channels."""
+        mono = sine(997, 2, amplitude=10 ** (-23 / 20), channels=1)
+        assert integrated_loudness(mono, 48000) == pytest.approx(-23.0, abs=0.1)
+
+    def test_short_clip_single_block(self):
+        """Test a clip shorter than one block is still measured."""
+        samples = sine(997, 0.2, amplitude=10 ** (-23 / 20))
+        assert integrated_loudness(samples, 48000) == pytest.approx(-23.0, abs=0.2)
+
+    def test_digital_silence(self):
+        """Test silence has no loudness or peak."""
+        silence = numpy.zeros((48000, 2))
+        assert integrated_loudness(silence, 48000) is None
+        assert true_peak(silence) is None
+
+    def test_true_peak_between_samples(self):
+        """Test a quarter-rate sine sampled 45 degrees off its crest reads its real peak."""
+        samples = sine(12000, 0.5, amplitude=0.5, phase=numpy.pi / 4)
+
+        assert 20 * numpy.log10(numpy.abs(samples).max()) == pytest.approx(-9.03, abs=0.05)
+        assert true_peak(samples) == pytest.approx(-6.02, abs=0.2)
+
+    def test_measure_wav(self, tmp_path):
+        """Test a 16-bit WAV is read and measured."""
+        path = write_pcm(tmp_path / 'a.wav', sine(997, 2, amplitude=10 ** (-18 / 20)))
+
+        measured = measure_file(str(path))
+
+        assert measured.loudness_lufs == pytest.approx(-18.0, abs=0.1)
+        assert measured.true_peak_dbtp == pytest.approx(-18.0, abs=0.1)
+
+    def test_measure_without_numpy(self, tmp_path):
+        """Test measurement is refused without numpy."""
+        path = write_pcm(tmp_path / 'a.wav', sine(997, 1))
+        with patch.object(loudness, 'NUMPY_AVAILABLE', False):
+            with pytest.raises(loudness.LoudnessError):
+                measure_file(str(path))
+
+
+@pytest.mark.unit
+class TestGain:
+    """Test gain limits."""
+
+    @pytest.mark.parametrize('measured, expected', [
+        ((-13.0, -10.0), -10.0),   # loud clip turned down to the target
+        ((-30.0, -20.0), 0.0),     # quiet clip cannot be turned up
+        ((-25.0, 0.5), -1.5),      # clipping clip limited to the true-peak ceiling
+        ((None, None), None),      # silence plays at unity
+    ])
+    def test_compute_gain(self, measured, expected):
+        """Test gain is attenuation only and respects the true-peak ceiling."""
+        assert compute_gain(*measured, target=-23.0) == expected
+
+    def test_target_from_settings(self, settings):
+        """Test the target comes from LOUDNESS_TARGET_LUFS."""
+        settings.LOUDNESS_TARGET_LUFS = -16.0
+        assert compute_gain(-10.0, -5.0) == -6.0
+
+    def test_db_to_volume(self):
+        """Test mixer volumes."""
+        assert db_to_volume(None) == 1.0
+        assert db_to_volume(0.0) == 1.0
+        assert db_to_volume(-20.0) == pytest.approx(0.1)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestStoredGain:
+    """Test measurements stored on rows and used at playback."""
+
+    def test_analyze_audio(self, tmp_path, settings):
+        """Test loudness, peak and gain are stored on the row."""
+        settings.LOUDNESS_TARGET_LUFS = -23.0
+        path = write_pcm(tmp_path / 'a.wav', sine(997, 2, amplitude=10 ** (-13 / 20)))
+        audio = Audio.objects.create(name='loud', path=str(path))
+
+        assert analyze_audio(audio)
+
+        audio.refresh_from_db()
+        assert audio.loudness_lufs == pytest.approx(-13.0, abs=0.1)
+        assert audio.gain_db == pytest.approx(-10.0, abs=0.1)
+
+    def test_identical_clip_reuses_measurement(self, tmp_path):
+        """Test a row with the same content hash is not read again."""
+        Audio.objects.create(name='a', path='a.wav', content_hash='same', loudness_lufs=-13.0, true_peak_dbtp=-10.0)
+        copy = Audio.objects.create(name='b', path=str(tmp_path / 'missing.wav'), content_hash='same')
+
+        with patch.object(loudness, 'measure_file') as measure:
+            assert analyze_audio(copy)
+
+        measure.assert_not_called()
+        copy.refresh_from_db()
+        assert copy.loudness_lufs == -13.0
+
+    def test_unreadable_file_keeps_unity(self, tmp_path):
+        """Test a file that cannot be measured leaves the gain empty."""
+        audio = Audio.objects.create(name='x', path=str(tmp_path / 'missing.wav'))
+
+        assert not analyze_audio(audio)
+        audio.refresh_from_db()
+        assert audio.gain_db is None
+
+    def test_playback_gains(self, django_assert_num_queries):
+        """Test one lookup covers originals, playback copies and bells."""
+        Audio.objects.create(name='a', path='audio/a.mp3', playback_path='audio/transcoded/h.wav',
+                             status=Audio.Status.READY, gain_db=-4.0)
+        Bell.objects.create(name='b', first='audio/bell/x/First.wav', last='audio/bell/x/Last.wav',
+                            first_gain_db=-2.0)
+        paths = ['audio/bell/x/First.wav', 'audio/transcoded/h.wav', 'audio/a.mp3', 'audio/bell/x/Last.wav']
+
+        with django_assert_num_queries(2):
+            gains = playback_gains(paths)
+
+        assert gains == {'audio/bell/x/First.wav': -2.0, 'audio/transcoded/h.wav': -4.0, 'audio/a.mp3': -4.0}
+
+    def test_playback_gains_absolute_path(self):
+        """Test absolute paths from play_audio match rows stored relative to the project."""
+        import os
+        Audio.objects.create(name='a', path='audio/a.wav', gain_db=-3.0)
+        assert playback_gains([os.path.abspath('audio/a.wav')]) == {os.path.abspath('audio/a.wav'): -3.0}
+
+    def test_player_sets_volume(self, mock_audio_player, mock_pygame, clear_utility_state):
+        """Test each clip plays at its stored gain and unknown clips at full volume."""
+        Audio.objects.create(name='a', path='audio/a.wav', gain_db=-20.0)
+
+        mock_audio_player._play_worker(['audio/a.wav', 'audio/other.wav'], None)
+
+        assert mock_pygame.mixer.music.set_volume.call_args_list == [call(pytest.approx(0.1)), call(1.0)]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAnalyzeLoudnessCommand:
+    """Test the analyze_loudness backfill."""
+
+    def test_backfill_and_regain(self, tmp_path, settings):
+        """Test rows are measured once and gains follow a new target without re-reading."""
+        settings.LOUDNESS_TARGET_LUFS = -23.0
+        # Only measure the rows created here, not the library seeded by migrations
+        Audio.objects.all().delete()
+        Bell.objects.all().delete()
+        path = write_pcm(tmp_path / 'a.wav', sine(997, 2, amplitude=10 ** (-13 / 20)))
+        audio = Audio.objects.create(name='a', path=str(path))
+        bell = Bell.objects.create(name='b', first=str(write_pcm(tmp_path / 'bell.wav', sine(997, 1))), last='')
+
+        call_command('analyze_loudness', stdout=io.StringIO())
+        audio.refresh_from_db()
+        bell.refresh_from_db()
+        assert audio.gain_db == pytest.approx(-10.0, abs=0.1)
+        assert bell.first_gain_db == pytest.approx(-23.0, abs=0.1)
+        assert bell.last_gain_db is None
+
+        settings.LOUDNESS_TARGET_LUFS = -18.0
+        with patch.object(loudness, 'load_samples') as load:
+            call_command('analyze_loudness', stdout=io.StringIO())
+        audio.refresh_from_db()
+        assert audio.gain_db == pytest.approx(-5.0, abs=0.1)
+        assert not any(c.args[0] == str(path) for c in load.call_args_list)
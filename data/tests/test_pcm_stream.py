@@ -0,0 +1,178 @@
+"""
+Tests for streamed and cached playback
+
+Tests cover:
+- Memory-mapped chunks of PCM WAV files, with trims
+- Byte-bounded LRU clip cache
+- AudioPlayer routing: cached clips, streamed tracks, music decoder
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from data.lib import audio_player
+from data.lib.clip_cache import ClipCache
+from data.lib.pcm_stream import PcmStream, PcmStreamError, open_stream
+from data.lib.silence import Trim
+
+
+@pytest.fixture
+def clip_cache():
+    """Fresh clip cache for the player."""
+    cache = ClipCache(max_bytes=1 << 20)
+    with patch.object(audio_player, 'get_clip_cache', return_value=cache):
+        yield cache
+
+
+@pytest.mark.unit
+class TestPcmStream:
+    """Test PcmStream chunks."""
+
+    def test_chunks_cover_data(self, make_wav, tmp_path):
+        """Test chunks are whole frames and add up to the data chunk."""
+        path = make_wav(tmp_path / 'a.wav', seconds=1.0, rate=8000, channels=2)
+
+        with PcmStream(str(path), chunk_bytes=1001) as stream:
+            chunks = list(stream.chunks())
+
+        assert {len(c) for c in chunks[:-1]} == {1000}
+        assert sum(len(c) for c in chunks) == 8000 * 4
+        assert stream.duration == 1.0
+
+    def test_trimmed_range(self, make_wav, tmp_path):
+        """Test start and end seconds are skipped."""
+        path = make_wav(tmp_path / 'a.wav', seconds=1.0, rate=8000)
+
+        with PcmStream(str(path)) as stream:
+            data = b''.join(stream.chunks(start=0.25, end=0.5))
+
+        full = path.read_bytes()
+        assert data == full[44 + 2 * 2000:44 + 2 * 4000]
+
+    def test_not_pcm(self, tmp_path):
+        """Test a file that is not a WAV is refused."""
+        path = tmp_path / 'a.mp3'
+        path.write_bytes(b'ID3 not a wave')
+        with pytest.raises(PcmStreamError):
+            PcmStream(str(path))
+
+    def test_open_stream_requires_mixer_format(self, make_wav, tmp_path):
+        """Test only files in the mixer format are streamed."""
+        low = make_wav(tmp_path / 'low.wav', seconds=0.1)
+        ok = make_wav(tmp_path / 'ok.wav', seconds=0.1, rate=44100, channels=2)
+
+        assert open_stream(str(low), 44100, 2) is None
+        assert open_stream(str(tmp_path / 'missing.wav'), 44100, 2) is None
+        stream = open_stream(str(ok), 44100, 2)
+        assert stream is not None
+        stream.close()
+
+
+@pytest.mark.unit
+class TestClipCache:
+    """Test ClipCache."""
+
+    def test_hit_and_eviction(self, tmp_path):
+        """Test clips are loaded once and the least recently used is evicted."""
+        paths = []
+        for name in 'abc':
+            (tmp_path / name).write_bytes(b'x')
+            paths.append(str(tmp_path / name))
+        loader = MagicMock(side_effect=lambda: (object(), 40))
+        cache = ClipCache(max_bytes=100)
+
+        first = cache.get(paths[0], (), loader)
+        assert cache.get(paths[0], (), loader) is first
+        cache.get(paths[1], (), loader)
+        cache.get(paths[0], (), loader)
+        cache.get(paths[2], (), loader)
+
+        assert loader.call_count == 3
+        assert (len(cache), cache.size) == (2, 80)
+        assert cache.get(paths[0], (), loader) is first
+
+    def test_changed_file_reloaded(self, tmp_path):
+        """Test a replaced file is decoded again."""
+        path = tmp_path / 'a'
+        path.write_bytes(b'x')
+        loader = MagicMock(side_effect=lambda: (object(), 1))
+        cache = ClipCache(max_bytes=100)
+
+        cache.get(str(path), (), loader)
+        path.write_bytes(b'longer')
+        cache.get(str(path), (), loader)
+
+        assert loader.call_count == 2
+
+
+@pytest.mark.unit
+class TestPlayerRouting:
+    """Test AudioPlayer picks the playback route per file."""
+
+    def test_short_clip_cached(self, mock_audio_player, mock_pygame, make_wav, tmp_path, clip_cache):
+        """Test a short clip is decoded once and played on the player channel."""
+        path = str(make_wav(tmp_path / 'now.wav', seconds=0.5))
+        channel = mock_pygame.mixer.Channel.return_value
+        channel.get_busy.return_value = False
+        mock_pygame.mixer.Sound.return_value.get_length.return_value = 0.5
+
+        mock_audio_player._play_file(path, -20.0, None)
+        mock_audio_player._play_file(path, None, None)
+
+        mock_pygame.mixer.Sound.assert_called_once_with(path)
+        assert channel.play.call_count == 2
+        mock_pygame.mixer.music.load.assert_not_called()
+        assert clip_cache.size == int(0.5 * 44100) * 4
+
+    def test_trimmed_clip(self, mock_audio_player, mock_pygame, make_wav, tmp_path, clip_cache):
+        """Test trim points are cut from the decoded samples."""
+        path = str(make_wav(tmp_path / 'now.wav', seconds=1.0))
+        mock_pygame.mixer.Channel.return_value.get_busy.return_value = False
+        mock_pygame.mixer.Sound.return_value.get_raw.return_value = bytes(44100 * 4)
+
+        mock_audio_player._play_file(path, None, Trim(0.25, 0.5, 1.0))
+
+        buffer = mock_pygame.mixer.Sound.call_args_list[-1].kwargs['buffer']
+        assert len(buffer) == int(0.25 * 44100) * 4
+
+    def test_long_track_streamed(self, mock_audio_player, mock_pygame, make_wav, tmp_path, clip_cache, monkeypatch):
+        """Test a long track in the mixer format is queued chunk by chunk."""
+        path = str(make_wav(tmp_path / 'anthem.wav', seconds=0.5, rate=44100, channels=2))
+        monkeypatch.setattr(audio_player, 'CLIP_CACHE_MAX_SECONDS', 0.1)
+        channel = mock_pygame.mixer.Channel.return_value
+        channel.get_queue.return_value = None
+        channel.get_busy.return_value = False
+
+        with patch('data.lib.pcm_stream.CHUNK_BYTES', 20000):
+            mock_audio_player._play_file(path, None, None)
+
+        buffers = [c.kwargs['buffer'] for c in mock_pygame.mixer.Sound.call_args_list]
+        assert len(buffers) == 5
+        assert max(len(b) for b in buffers) == 20000
+        channel.play.assert_called_once()
+        assert channel.queue.call_count == 4
+        mock_pygame.mixer.music.load.assert_not_called()
+
+    def test_stream_stops_on_request(self, mock_audio_player, mock_pygame, make_wav, tmp_path, monkeypatch):
+        """Test a stop request ends the stream while waiting to queue."""
+        path = str(make_wav(tmp_path / 'anthem.wav', seconds=0.5, rate=44100, channels=2))
+        monkeypatch.setattr(audio_player, 'CLIP_CACHE_MAX_SECONDS', 0.1)
+        channel = mock_pygame.mixer.Channel.return_value
+        channel.get_queue.return_value = object()
+        mock_audio_player._stop_event.set()
+
+        mock_audio_player._play_file(path, None, None)
+
+        channel.stop.assert_called_once()
+        channel.queue.assert_not_called()
+
+    def test_other_formats_use_music(self, mock_audio_player, mock_pygame, tmp_path):
+        """Test files that are neither short nor streamable go to the music decoder."""
+        path = tmp_path / 'song.mp3'
+        path.write_bytes(b'fake mp3 content')
+
+        mock_audio_player._play_file(str(path), None, None)
+
+        mock_pygame.mixer.music.load.assert_called_once_with(str(path))
+        mock_pygame.mixer.music.play.assert_called_once_with()
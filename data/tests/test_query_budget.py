@@ -0,0 +1,130 @@
+"""
+Tests for the query budget middleware and N+1 detection
+
+Tests cover:
+- SQL shape normalization
+- Repeated query detection
+- Middleware histograms and budget warnings
+- Query budgets of the main views
+"""
+
+from datetime import time
+from unittest.mock import patch
+
+import pytest
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from data.models import Schedule
+from data.lib.env_config import EnvSnapshot
+from data.lib.query_budget import (
+    capture_queries,
+    get_query_stats,
+    normalize_sql,
+    reset_query_stats,
+)
+
+
+@pytest.fixture
+def many_schedules(test_day_monday, test_day_tuesday, test_audio, test_bell):
+    """Ten schedules, each with a sound, bell and two days."""
+    for hour in range(7, 17):
+        schedule = Schedule.objects.create(time=time(hour, 0), sound=test_audio, bell_sound=test_bell)
+        schedule.notification_days.add(test_day_monday, test_day_tuesday)
+
+
+@pytest.fixture
+def clean_stats():
+    """Start with empty histograms."""
+    reset_query_stats()
+    yield
+    reset_query_stats()
+
+
+@pytest.mark.unit
+class TestNormalizeSql:
+    """Test normalize_sql."""
+
+    def test_literals_and_placeholders(self):
+        """Test values are replaced so repeats compare equal."""
+        a = normalize_sql('SELECT * FROM "data_audio" WHERE "id" = 5')
+        b = normalize_sql('SELECT *  FROM "data_audio"\nWHERE "id" = 17')
+        assert a == b == 'SELECT * FROM "data_audio" WHERE "id" = ?'
+
+    def test_in_lists_collapse(self):
+        """Test IN lists of any length have the same shape."""
+        assert normalize_sql('WHERE id IN (%s, %s, %s)') == normalize_sql('WHERE id IN (%s)') == 'WHERE id IN (...)'
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestCaptureQueries:
+    """Test query capture and budget assertions."""
+
+    def test_duplicates_detected(self, many_schedules):
+        """Test a per-row lookup shows up as a repeated shape."""
+        with capture_queries() as capture:
+            for schedule in Schedule.objects.all():
+                schedule.sound.name
+
+        assert capture.count == 11
+        shape, repeats = capture.duplicates()[0]
+        assert repeats == 10
+        assert 'data_audio' in shape
+
+    def test_assert_query_budget_fails(self, many_schedules, query_budget):
+        """Test the budget assertion lists the repeated shapes."""
+        with pytest.raises(AssertionError, match='possible N\\+1'):
+            with query_budget(max_repeats=1):
+                for schedule in Schedule.objects.all():
+                    schedule.bell_sound.name
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestQueryBudgetMiddleware:
+    """Test QueryBudgetMiddleware."""
+
+    def test_histogram_recorded(self, many_schedules, clean_stats):
+        """Test requests are recorded per route."""
+        Client().get(reverse('api_schedules'))
+        Client().get(reverse('api_schedules'))
+
+        stats = get_query_stats()['api/schedules/']
+        assert stats['queries']['count'] == 2
+        assert stats['over_budget'] == 0
+
+    @override_settings(QUERY_BUDGETS={'api_schedules': 1})
+    def test_over_budget_logged(self, many_schedules, clean_stats):
+        """Test a request over its budget is logged and counted."""
+        with patch('data.lib.query_budget.logger') as mock_logger:
+            Client().get(reverse('api_schedules'))
+
+        assert 'budget 1' in mock_logger.warning.call_args[0][0]
+        assert get_query_stats()['api/schedules/']['over_budget'] == 1
+
+    @override_settings(DEBUG=True)
+    def test_debug_header(self, clean_stats):
+        """Test the query count header in DEBUG mode."""
+        response = Client().get(reverse('wifi_monitor_status'))
+        assert response['X-Query-Count'] == '1'
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestViewQueryBudgets:
+    """N+1 guards for the views."""
+
+    @override_settings(STORAGES={'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+    def test_index(self, many_schedules, query_budget):
+        """Test the main page query count does not grow with the number of schedules."""
+        complete = EnvSnapshot(exists=True, values={}, missing_vars=[])
+        with patch('data.views.get_env_snapshot', return_value=complete), \
+             query_budget(max_queries=6, max_repeats=1):
+            response = Client().get(reverse('index'))
+        assert response.status_code == 200
+
+    def test_schedule_list(self, many_schedules, query_budget):
+        """Test the schedule API prefetches notification days."""
+        with query_budget(max_queries=3, max_repeats=1):
+            Client().get(reverse('api_schedules'))
@@ -0,0 +1,131 @@
+"""
+Tests for generation-keyed render caching
+
+Tests cover:
+- Generation bumps on model writes, only after commit
+- Cached listing responses and their invalidation
+- Cached template fragments on the main page
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from data.models import Audio, Schedule
+from data.lib.env_config import EnvSnapshot
+from data.lib.query_budget import capture_queries
+from data.lib.render_cache import get_data_generation, listing_cache_key
+
+STATIC_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestDataGeneration:
+    """Test generation bumps."""
+
+    def test_bumped_on_commit(self, django_capture_on_commit_callbacks):
+        """Test a model write bumps the generation once the transaction commits."""
+        before = get_data_generation()
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            Audio.objects.create(name='Anthem', path='/tmp/anthem.mp3')
+            assert get_data_generation() == before
+
+        for callback in callbacks:
+            callback()
+        assert get_data_generation() > before
+
+    def test_bulk_writes_bump(self, test_day_monday, django_capture_on_commit_callbacks):
+        """Test bulk schedule writes, which skip signals, still bump."""
+        before = get_data_generation()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Client().post(reverse('api_schedules'), data=json.dumps({'schedules': [
+                {'time': '08:00', 'days': [test_day_monday.id]},
+            ]}), content_type='application/json')
+
+        assert get_data_generation() > before
+
+    def test_listing_key_ignores_parameter_order(self):
+        """Test equivalent query strings share a cache entry."""
+        from django.http import QueryDict
+        assert listing_cache_key('x', QueryDict('a=1&b=2')) == listing_cache_key('x', QueryDict('b=2&a=1'))
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestCachedListings:
+    """Test cached /api/schedules/ and /api/audios/ pages."""
+
+    def test_hit_runs_no_queries(self, test_schedule):
+        """Test a repeated listing request is served from the cache."""
+        client = Client()
+        first = client.get(reverse('api_schedules'))
+
+        with capture_queries() as capture:
+            second = client.get(reverse('api_schedules'))
+
+        assert capture.count == 0
+        assert second.json() == first.json()
+
+    def test_write_invalidates(self, test_schedule, django_capture_on_commit_callbacks):
+        """Test a schedule created after caching shows up."""
+        client = Client()
+        assert len(client.get(reverse('api_schedules')).json()['results']) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Schedule.objects.create(time='09:00')
+
+        assert len(client.get(reverse('api_schedules')).json()['results']) == 2
+
+    def test_errors_not_cached(self):
+        """Test error responses are not cached."""
+        client = Client()
+        client.get(reverse('api_audios'), {'limit': 'x'})
+
+        with capture_queries() as capture:
+            response = client.get(reverse('api_audios'))
+
+        assert response.status_code == 200
+        assert capture.count > 0
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestCachedFragments:
+    """Test cached fragments on the main page."""
+
+    @pytest.fixture(autouse=True)
+    def env_ready(self, settings):
+        settings.STORAGES = STATIC_STORAGES
+        with patch('data.views.get_env_snapshot', return_value=EnvSnapshot(True, {}, [])):
+            yield
+
+    def test_fragments_skip_queries(self, test_bell, test_day_monday):
+        """Test day and bell fragments are rendered from the cache on a repeat visit."""
+        client = Client()
+        client.get(reverse('index'))
+
+        with capture_queries() as capture:
+            response = client.get(reverse('index'))
+
+        assert test_bell.name in response.content.decode()
+        assert not any('data_bell' in shape or 'data_day' in shape for shape in capture.shapes)
+
+    def test_rename_refreshes_fragment(self, test_bell, django_capture_on_commit_callbacks):
+        """Test renaming a bell replaces the cached option."""
+        client = Client()
+        client.get(reverse('index'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test_bell.name = 'Renamed Bell'
+            test_bell.save()
+
+        assert 'Renamed Bell' in client.get(reverse('index')).content.decode()
@@ -0,0 +1,149 @@
+"""
+Tests for the bulk schedule JSON API
+
+Tests cover:
+- Paginated listing
+- Bulk create with one-pass validation (all-or-nothing)
+- Bulk update of fields and notification days
+- Bulk delete
+- Query count for a large batch
+"""
+
+import json
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from data.models import Schedule
+
+
+def _send(method, payload):
+    """Send a JSON request to the schedule API."""
+    client = Client()
+    return getattr(client, method)(
+        reverse('api_schedules'),
+        data=json.dumps(payload),
+        content_type='application/json'
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestScheduleListing:
+    """Test GET /api/schedules/."""
+
+    def test_list(self, test_schedule):
+        """Test schedules are listed with display names."""
+        response = Client().get(reverse('api_schedules'), {'limit': 10})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['next_cursor'] is None
+        day = test_schedule.notification_days.first()
+        assert body['results'][0] == {
+            'id': test_schedule.id,
+            'time': '08:30',
+            'days': [day.id],
+            'sound': test_schedule.sound_id,
+            'bell_sound': test_schedule.bell_sound_id,
+            'tell_time': True,
+            'enable_bell_sound': True,
+            'sound_name': test_schedule.sound.name,
+            'bell_sound_name': test_schedule.bell_sound.name,
+            'day_names': [day.name],
+        }
+
+    def test_invalid_limit(self):
+        """Test a non-numeric page size is rejected."""
+        response = Client().get(reverse('api_schedules'), {'limit': 'x'})
+        assert response.status_code == 400
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestScheduleBulkCreate:
+    """Test POST /api/schedules/."""
+
+    def test_create(self, test_day_monday, test_day_tuesday, test_audio, test_bell):
+        """Test several schedules are created with their days."""
+        response = _send('post', {'schedules': [
+            {'time': '08:00', 'days': [test_day_monday.id, 'Tuesday'], 'sound': test_audio.id},
+            {'time': '12:30', 'days': ['monday'], 'bell_sound': test_bell.id, 'tell_time': False},
+        ]})
+
+        assert response.status_code == 201
+        created = response.json()['created']
+        assert [item['time'] for item in created] == ['08:00', '12:30']
+        assert created[0]['days'] == sorted([test_day_monday.id, test_day_tuesday.id])
+
+        schedule = Schedule.objects.get(id=created[1]['id'])
+        assert schedule.bell_sound == test_bell
+        assert schedule.tell_time is False
+        assert list(schedule.notification_days.all()) == [test_day_monday]
+
+    def test_invalid_batch_writes_nothing(self, test_day_monday):
+        """Test one invalid item rejects the whole batch with indexed errors."""
+        response = _send('post', {'schedules': [
+            {'time': '08:00', 'days': [test_day_monday.id]},
+            {'time': '25:00', 'sound': 999999, 'colour': 'red'},
+        ]})
+
+        assert response.status_code == 400
+        fields = {(e['index'], e['field']) for e in response.json()['errors']}
+        assert fields == {(1, 'time'), (1, 'sound'), (1, 'colour')}
+        assert Schedule.objects.count() == 0
+
+    def test_bell_cleared_when_disabled(self, test_bell):
+        """Test bell_sound is dropped when enable_bell_sound is false."""
+        response = _send('post', {'schedules': [
+            {'time': '09:00', 'bell_sound': test_bell.id, 'enable_bell_sound': False},
+        ]})
+        assert response.json()['created'][0]['bell_sound'] is None
+
+    def test_large_batch_query_count(self, test_day_monday, test_audio, django_assert_max_num_queries):
+        """Test a 60-row timetable is written in a handful of queries."""
+        items = [
+            {'time': f'{7 + i // 6:02d}:{(i % 6) * 10:02d}', 'days': [test_day_monday.id], 'sound': test_audio.id}
+            for i in range(60)
+        ]
+        with django_assert_max_num_queries(10):
+            response = _send('post', {'schedules': items})
+
+        assert response.status_code == 201
+        assert Schedule.objects.count() == 60
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestScheduleBulkUpdateDelete:
+    """Test PATCH and DELETE /api/schedules/."""
+
+    def test_update_fields_and_days(self, test_schedule, test_day_tuesday):
+        """Test partial updates change only the supplied fields."""
+        response = _send('patch', {'schedules': [
+            {'id': test_schedule.id, 'time': '09:45', 'days': [test_day_tuesday.id]},
+        ]})
+
+        assert response.status_code == 200
+        test_schedule.refresh_from_db()
+        assert test_schedule.time.strftime('%H:%M') == '09:45'
+        assert test_schedule.sound is not None
+        assert list(test_schedule.notification_days.all()) == [test_day_tuesday]
+
+    def test_update_unknown_id(self, test_schedule):
+        """Test updating a missing schedule is rejected."""
+        response = _send('patch', {'schedules': [{'id': test_schedule.id + 1000, 'tell_time': False}]})
+        assert response.status_code == 400
+
+    def test_delete(self, test_schedule):
+        """Test schedules are deleted by id."""
+        response = _send('delete', {'ids': [test_schedule.id]})
+
+        assert response.json() == {'deleted': 1}
+        assert not Schedule.objects.exists()
+
+    def test_delete_invalid_ids(self):
+        """Test a non-list ids value is rejected."""
+        response = _send('delete', {'ids': 'all'})
+        assert response.status_code == 400
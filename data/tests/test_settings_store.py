@@ -0,0 +1,151 @@
+"""
+Unit Tests for the cached settings store
+
+Tests cover:
+- Typed values and registry defaults
+- One query per load, cached reads
+- Invalidation on write (signals) and across processes (generation token)
+- WiFi status view query count
+"""
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from data.models import Utility
+from data.lib.settings_store import GENERATION_KEY, SettingsStore, get_settings_store
+
+
+@pytest.fixture
+def store():
+    """Settings store that never revalidates on its own (no time dependence)."""
+    return SettingsStore(revalidate_interval=3600)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestSettingsValues:
+    """Test typed reads and writes."""
+
+    def test_defaults_when_absent(self, store, clear_utility_state):
+        """Test registry defaults are returned for missing rows."""
+        assert store.get('wifi_monitor_enabled') is False
+        assert store.get('fallback_count') == 0
+        assert store.get('ap_channel') == 6
+        assert store.get('last_fallback_time') is None
+        assert store.get('ap_ssid', default='SchoolAlarm-Setup') == 'SchoolAlarm-Setup'
+
+    def test_typed_values(self, store, clear_utility_state):
+        """Test stored strings are converted to the registered type."""
+        Utility.objects.create(name='in_fallback_mode', value='true')
+        Utility.objects.create(name='fallback_count', value='3')
+        Utility.objects.create(name='last_fallback_time', value='1700000000.5')
+
+        assert store.get_many('in_fallback_mode', 'fallback_count', 'last_fallback_time') == {
+            'in_fallback_mode': True,
+            'fallback_count': 3,
+            'last_fallback_time': 1700000000.5,
+        }
+
+    def test_invalid_value_falls_back_to_default(self, store, clear_utility_state):
+        """Test an unparseable row returns the default."""
+        Utility.objects.create(name='ap_channel', value='abc')
+        assert store.get('ap_channel') == 6
+
+    def test_set_serializes(self, store, clear_utility_state):
+        """Test values are stored in the existing string formats."""
+        store.set('wifi_monitor_enabled', True)
+        store.set('ap_channel', 11)
+
+        assert Utility.objects.get(name='wifi_monitor_enabled').value == 'true'
+        assert Utility.objects.get(name='ap_channel').value == '11'
+        assert store.get('ap_channel') == 11
+
+    def test_delete(self, store, clear_utility_state):
+        """Test deleted settings fall back to their defaults."""
+        store.set('in_fallback_mode', True)
+        store.delete('in_fallback_mode', 'wifi_back_time')
+
+        assert not Utility.objects.filter(name='in_fallback_mode').exists()
+        assert store.get('in_fallback_mode') is False
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestSettingsCache:
+    """Test caching and invalidation."""
+
+    def test_reads_are_cached(self, store, clear_utility_state, django_assert_num_queries):
+        """Test the table is loaded once for many reads."""
+        Utility.objects.create(name='fallback_count', value='2')
+
+        with django_assert_num_queries(1):
+            for _ in range(10):
+                store.get('fallback_count')
+                store.get('ap_ssid')
+
+    def test_unchanged_set_is_skipped(self, store, clear_utility_state, django_assert_num_queries):
+        """Test writing the current value does not touch the database."""
+        store.set('wifi_down_count', 0)
+        store.get('wifi_down_count')
+
+        with django_assert_num_queries(0):
+            store.set('wifi_down_count', 0)
+
+    def test_write_invalidates_via_signal(self, clear_utility_state):
+        """Test ORM writes are visible immediately through the shared store."""
+        shared = get_settings_store()
+        assert shared.get('last_known_ssid') is None
+
+        Utility.objects.update_or_create(name='last_known_ssid', defaults={'value': 'SchoolNet'})
+        assert shared.get('last_known_ssid') == 'SchoolNet'
+
+    def test_write_bumps_generation(self, clear_utility_state):
+        """Test each write publishes a new generation token."""
+        Utility.objects.create(name='ap_ssid', value='A')
+        first = Utility.objects.get(name=GENERATION_KEY).value
+
+        Utility.objects.filter(name='ap_ssid').delete()
+        assert Utility.objects.get(name=GENERATION_KEY).value != first
+
+    def test_other_process_write_detected(self, clear_utility_state):
+        """Test a changed generation token triggers a reload after the interval."""
+        store = SettingsStore(revalidate_interval=0)
+        Utility.objects.create(name='fallback_count', value='1')
+        assert store.get('fallback_count') == 1
+
+        # Simulate another process: queryset update() fires no signals
+        Utility.objects.filter(name='fallback_count').update(value='5')
+        store.bump_generation()
+
+        assert store.get('fallback_count') == 5
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.wifi
+class TestSettingsViews:
+    """Test views reading through the settings store."""
+
+    def test_wifi_monitor_status_single_query(self, clear_utility_state, django_assert_num_queries):
+        """Test wifi_monitor_status loads every value in one query."""
+        Utility.objects.create(name='in_fallback_mode', value='true')
+        Utility.objects.create(name='fallback_count', value='4')
+        get_settings_store().invalidate()
+
+        with django_assert_num_queries(1):
+            response = Client().get(reverse('wifi_monitor_status'))
+
+        assert response.json() == {
+            'enabled': True,
+            'in_fallback_mode': True,
+            'last_known_ssid': None,
+            'fallback_count': 4,
+            'last_fallback_time': None,
+        }
+
+    def test_ap_config_defaults(self, clear_utility_state):
+        """Test ap_config returns defaults when nothing is configured."""
+        response = Client().get(reverse('ap_config'))
+
+        assert response.json() == {'ssid': 'SchoolAlarm-Setup', 'password': '', 'channel': 6}
@@ -0,0 +1,140 @@
+"""
+Tests for leading/trailing silence trimming
+
+Tests cover:
+- Trim point detection on synthetic clips
+- Trim points stored for library clips and time fragments
+- Trimmed lengths in sequence planning
+- The player starting after and stopping before the silence
+- The trim_silence command report
+"""
+
+import io
+import wave
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from data.models import Audio, AudioFragment
+from data.lib.audio_metadata import sequence_duration
+from data.lib.silence import PAD_SECONDS, Trim, detect_trim, playback_trims, trim_audio, trim_fragment
+
+numpy = pytest.importorskip('numpy')
+
+RATE = 8000
+
+
+def clip(lead, tone, tail, channels=1):
+    """Silence, a half-scale tone, silence."""
+    t = numpy.arange(int(tone * RATE)) / RATE
+    body = 0.5 * numpy.sin(2 * numpy.pi * 440 * t)
+    samples = numpy.concatenate([numpy.zeros(int(lead * RATE)), body, numpy.zeros(int(tail * RATE))])
+    return numpy.repeat(samples[:, None], channels, axis=1)
+
+
+def write_clip(path, samples):
+    """Write float samples shaped (frames, channels) as a 16-bit WAV."""
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(samples.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((samples * 32767).astype('<i2').tobytes())
+    return path
+
+
+@pytest.mark.unit
+class TestDetectTrim:
+    """Test detect_trim()."""
+
+    def test_padded_clip(self):
+        """Test silence at both ends is found, keeping the pad."""
+        trim = detect_trim(clip(0.3, 0.5, 0.2, channels=2), RATE)
+
+        assert trim.duration == 1.0
+        assert trim.start == pytest.approx(0.3 - PAD_SECONDS, abs=0.011)
+        assert trim.end == pytest.approx(0.2 - PAD_SECONDS, abs=0.011)
+        assert trim.length == pytest.approx(0.5 + 2 * PAD_SECONDS, abs=0.02)
+
+    def test_no_silence(self):
+        """Test a clip that starts and ends with sound is not trimmed."""
+        trim = detect_trim(clip(0, 0.5, 0), RATE)
+        assert (trim.start, trim.end) == (0.0, 0.0)
+
+    def test_all_silent(self):
+        """Test a silent clip is left whole rather than trimmed to nothing."""
+        trim = detect_trim(numpy.zeros((RATE, 1)), RATE)
+        assert (trim.start, trim.end, trim.duration) == (0.0, 0.0, 1.0)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestStoredTrim:
+    """Test stored trim points and their use."""
+
+    def test_trim_audio(self, tmp_path):
+        """Test trim points are stored on the Audio row."""
+        audio = Audio.objects.create(name='tts', path=str(write_clip(tmp_path / 'a.wav', clip(0.4, 0.5, 0.4))))
+
+        trim_audio(audio)
+
+        audio.refresh_from_db()
+        assert audio.trim_start == pytest.approx(0.35, abs=0.011)
+        assert audio.trim_end == pytest.approx(0.35, abs=0.011)
+
+    def test_trim_fragment_and_plan(self, tmp_path):
+        """Test a fragment gets a row and sequences are planned with its trimmed length."""
+        path = str(write_clip(tmp_path / '01.wav', clip(0.3, 0.4, 0.3)))
+
+        trim_fragment(path)
+        trim_fragment(path)
+
+        fragment = AudioFragment.objects.get(path=path)
+        assert fragment.duration == 1.0
+        assert sequence_duration([path]) == pytest.approx(0.5, abs=0.02)
+        assert playback_trims([path, 'audio/other.mp3']) == {path: Trim(fragment.trim_start, fragment.trim_end, 1.0)}
+
+    def test_unreadable_file(self, tmp_path):
+        """Test a missing file is left untrimmed."""
+        assert trim_fragment(str(tmp_path / 'missing.mp3')) is None
+        assert not AudioFragment.objects.exists()
+
+    def test_player_honours_trim(self, mock_audio_player, mock_pygame, clear_utility_state):
+        """Test playback starts after the leading silence and stops at the trailing silence."""
+        AudioFragment.objects.create(path='audio/thai/เวลา/now.mp3', duration=0.3, trim_start=0.1, trim_end=0.15)
+        mock_pygame.mixer.music.get_busy.return_value = True
+
+        mock_audio_player._play_worker(['audio/thai/เวลา/now.mp3'], None)
+
+        mock_pygame.mixer.music.play.assert_called_once_with(start=0.1)
+        mock_pygame.mixer.music.stop.assert_called_once()
+
+    def test_player_falls_back_without_seek(self, mock_audio_player, mock_pygame, clear_utility_state):
+        """Test a format that cannot seek plays from the start."""
+        AudioFragment.objects.create(path='a.wav', duration=0.2, trim_start=0.1, trim_end=0.05)
+        mock_pygame.mixer.music.play.side_effect = [RuntimeError('no seek'), None]
+
+        mock_audio_player._play_worker(['a.wav'], None)
+
+        assert mock_pygame.mixer.music.play.call_count == 2
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestTrimSilenceCommand:
+    """Test the trim_silence command."""
+
+    def test_reports_before_and_after(self, tmp_path):
+        """Test fragments and clips are scanned and the saved time reported."""
+        Audio.objects.all().delete()
+        fragment = str(write_clip(tmp_path / 'now.wav', clip(0.3, 0.4, 0.3)))
+        audio = Audio.objects.create(name='tts', path=str(write_clip(tmp_path / 'a.wav', clip(0.2, 0.5, 0.3))))
+        out = io.StringIO()
+
+        with patch('data.management.commands.trim_silence.announcement_fragments', return_value=[fragment]):
+            call_command('trim_silence', stdout=out)
+
+        audio.refresh_from_db()
+        assert audio.trim_start == pytest.approx(0.15, abs=0.011)
+        assert AudioFragment.objects.filter(path=fragment).exists()
+        assert 'Time fragments: scanned 1, 0 unreadable; 1.00s -> 0.50s' in out.getvalue()
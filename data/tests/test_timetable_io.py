@@ -0,0 +1,157 @@
+"""
+Tests for timetable import/export
+
+Tests cover:
+- Round trip through CSV, JSON and iCalendar
+- Streaming JSON parser across read boundaries
+- All-or-nothing import with row-level errors
+- Export and import endpoints
+"""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.urls import reverse
+
+from data.models import Schedule
+from data.lib import timetable_io
+from data.lib.schedule_batch import ScheduleValidationError
+
+
+def _export(fmt):
+    """Collect a streamed export into one string."""
+    return ''.join(timetable_io.EXPORTERS[fmt]())
+
+
+def _snapshot():
+    """Comparable view of all schedules."""
+    return sorted(
+        (s.time.strftime('%H:%M'), tuple(sorted(d.id for d in s.notification_days.all())),
+         s.sound_id, s.bell_sound_id, s.tell_time, s.enable_bell_sound)
+        for s in Schedule.objects.prefetch_related('notification_days')
+    )
+
+
+@pytest.fixture
+def timetable(test_schedule, test_day_tuesday, test_audio, test_bell):
+    """Two schedules with different options."""
+    second = Schedule.objects.create(time='12:00', sound=None, bell_sound=test_bell,
+                                     tell_time=False, enable_bell_sound=True)
+    second.notification_days.add(test_day_tuesday)
+    return [test_schedule, second]
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestRoundTrip:
+    """Test export followed by import recreates the same timetable."""
+
+    @pytest.mark.parametrize('fmt', ['csv', 'json', 'ics'])
+    def test_round_trip(self, timetable, fmt):
+        """Test a replace import of an export is lossless."""
+        before = _snapshot()
+        exported = _export(fmt)
+
+        count = timetable_io.import_timetable(io.StringIO(exported), fmt, replace=True)
+
+        assert count == 2
+        assert _snapshot() == before
+
+    def test_ics_structure(self, timetable):
+        """Test the iCalendar export contains weekly recurring events."""
+        exported = _export('ics')
+
+        assert exported.startswith('BEGIN:VCALENDAR\r\n')
+        assert 'RRULE:FREQ=WEEKLY;BYDAY=MO\r\n' in exported
+        assert 'DTSTART:20240101T083000\r\n' in exported
+        assert 'DTSTART:20240102T120000\r\n' in exported
+
+
+@pytest.mark.unit
+class TestJsonStream:
+    """Test the incremental JSON reader."""
+
+    def test_items_across_chunks(self):
+        """Test values split across reads are decoded correctly."""
+        doc = json.dumps({'version': 1, 'note': 'x' * 50, 'schedules': [{'time': f'08:{i:02d}', 'n': 12345} for i in range(20)]})
+
+        with patch.object(timetable_io, 'JSON_READ_SIZE', 7):
+            records = list(timetable_io.parse_json(io.StringIO(doc)))
+
+        assert len(records) == 20
+        assert records[-1] == {'time': '08:19', 'n': 12345}
+
+    def test_invalid_json(self):
+        """Test malformed input raises ValueError."""
+        with pytest.raises(ValueError):
+            list(timetable_io.parse_json(io.StringIO('{"schedules": [{"time": }]}')))
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestImportValidation:
+    """Test import validation."""
+
+    def test_invalid_row_rolls_back(self, test_day_monday):
+        """Test an invalid row in a later batch rolls back earlier batches."""
+        rows = ['time,days,sound'] + [f'08:{i:02d},Monday,' for i in range(5)] + ['99:00,Funday,Missing Sound']
+
+        with patch.object(timetable_io, 'IMPORT_BATCH_SIZE', 2):
+            with pytest.raises(ScheduleValidationError) as exc:
+                timetable_io.import_timetable(io.StringIO('\n'.join(rows)), 'csv')
+
+        assert {(e['index'], e['field']) for e in exc.value.errors} == {(5, 'time'), (5, 'days'), (5, 'sound')}
+        assert Schedule.objects.count() == 0
+
+    def test_names_resolved(self, test_day_monday, test_audio):
+        """Test sounds are matched by name and days by Thai or English name."""
+        doc = json.dumps([{'time': '07:45', 'days': ['จันทร์'], 'sound': test_audio.name}])
+
+        timetable_io.import_timetable(io.StringIO(doc), 'json')
+
+        schedule = Schedule.objects.get()
+        assert schedule.sound == test_audio
+        assert list(schedule.notification_days.all()) == [test_day_monday]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestTimetableEndpoints:
+    """Test the export and import views."""
+
+    def test_export_streams(self, timetable):
+        """Test export is a streaming attachment."""
+        response = Client().get(reverse('export_schedules'), {'format': 'csv'})
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Disposition'] == 'attachment; filename="timetable.csv"'
+        body = b''.join(response.streaming_content).decode()
+        assert body.splitlines()[0] == ','.join(timetable_io.CSV_COLUMNS)
+
+    def test_export_unknown_format(self):
+        """Test an unsupported format is rejected."""
+        response = Client().get(reverse('export_schedules'), {'format': 'xls'})
+        assert response.status_code == 400
+
+    def test_import_upload(self, timetable):
+        """Test a file upload with the format taken from its extension."""
+        upload = SimpleUploadedFile('timetable.json', _export('json').encode())
+
+        response = Client().post(reverse('import_schedules') + '?mode=replace', {'file': upload})
+
+        assert response.json() == {'imported': 2}
+        assert Schedule.objects.count() == 2
+
+    def test_import_errors(self, test_day_monday):
+        """Test validation errors are returned with row indexes."""
+        upload = SimpleUploadedFile('timetable.csv', b'time,days\n08:00,Someday\n')
+
+        response = Client().post(reverse('import_schedules'), {'file': upload})
+
+        assert response.status_code == 400
+        assert response.json()['errors'][0]['index'] == 0
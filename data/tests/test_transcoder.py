@@ -0,0 +1,133 @@
+"""
+Tests for background transcoding to the mixer format
+
+Tests cover:
+- Canonical format detection and pass-through
+- pygame backend output format
+- Failure handling and shared copies
+- Worker pool queued on commit
+"""
+
+import wave
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from data.models import Audio
+from data.lib import transcoder
+from data.lib.transcoder import TranscodePool, is_canonical, remove_playback_copy, transcode_audio
+
+
+@pytest.fixture
+def mixer(monkeypatch):
+    """Real pygame mixer on the dummy audio driver."""
+    pygame = pytest.importorskip('pygame')
+    monkeypatch.setenv('SDL_AUDIODRIVER', 'dummy')
+    pygame.mixer.quit()
+    try:
+        pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    except pygame.error as e:
+        pytest.skip(f'pygame mixer unavailable: {e}')
+    yield pygame
+    pygame.mixer.quit()
+
+
+@pytest.fixture
+def transcoded_dir(tmp_path, monkeypatch):
+    """Write transcoded copies under tmp_path."""
+    directory = tmp_path / 'transcoded'
+    monkeypatch.setattr(transcoder, 'TRANSCODED_DIR', str(directory))
+    return directory
+
+
+def _audio(path, content_hash=''):
+    return Audio.objects.create(name='clip', path=str(path), content_hash=content_hash)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestTranscodeAudio:
+    """Test transcode_audio()."""
+
+    def test_canonical_file_used_as_is(self, make_wav, tmp_path, transcoded_dir):
+        """Test a 44.1 kHz 16-bit stereo WAV is not copied."""
+        path = make_wav(tmp_path / 'ok.wav', seconds=0.1, rate=44100, channels=2)
+        audio = _audio(path)
+
+        assert is_canonical(str(path))
+        assert transcode_audio(audio.id) == str(path)
+        audio.refresh_from_db()
+        assert audio.status == Audio.Status.READY
+        assert not transcoded_dir.exists()
+
+    def test_pygame_backend(self, make_wav, tmp_path, transcoded_dir, mixer):
+        """Test an 8 kHz mono file becomes a 44.1 kHz 16-bit stereo copy."""
+        audio = _audio(make_wav(tmp_path / 'low.wav', seconds=0.5), content_hash='abc')
+
+        with patch.object(transcoder, 'BACKENDS', [('pygame', transcoder._transcode_pygame)]):
+            playback_path = transcode_audio(audio.id)
+
+        audio.refresh_from_db()
+        assert audio.playable_path == playback_path == str(transcoded_dir / 'abc.wav')
+        assert audio.path == str(tmp_path / 'low.wav')
+        with wave.open(playback_path) as w:
+            assert (w.getframerate(), w.getnchannels(), w.getsampwidth()) == (44100, 2, 2)
+            assert w.getnframes() / w.getframerate() == pytest.approx(0.5, abs=0.02)
+        assert not list(transcoded_dir.glob('*.part'))
+
+    def test_failure_keeps_original(self, make_wav, tmp_path, transcoded_dir):
+        """Test the row is marked failed and still plays its original."""
+        audio = _audio(make_wav(tmp_path / 'low.wav'))
+        broken = MagicMock(side_effect=RuntimeError('boom'))
+
+        with patch.object(transcoder, 'BACKENDS', [('broken', broken)]):
+            assert transcode_audio(audio.id) is None
+
+        audio.refresh_from_db()
+        assert audio.status == Audio.Status.FAILED
+        assert audio.playable_path == audio.path
+
+    def test_identical_uploads_share_copy(self, make_wav, tmp_path, transcoded_dir):
+        """Test a second row with the same content reuses the copy and keeps it on delete."""
+        def fake_backend(src, dst):
+            with open(dst, 'wb') as f:
+                f.write(b'wav')
+        backend = MagicMock(side_effect=fake_backend)
+        first = _audio(make_wav(tmp_path / 'a.wav'), content_hash='same')
+        second = _audio(make_wav(tmp_path / 'b.wav'), content_hash='same')
+
+        with patch.object(transcoder, 'BACKENDS', [('fake', backend)]):
+            transcode_audio(first.id)
+            transcode_audio(second.id)
+
+        assert backend.call_count == 1
+        first.refresh_from_db()
+        second.refresh_from_db()
+        remove_playback_copy(first)
+        assert (transcoded_dir / 'same.wav').exists()
+        first.delete()
+        remove_playback_copy(second)
+        assert not (transcoded_dir / 'same.wav').exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+class TestTranscodePool:
+    """Test the background worker pool."""
+
+    def test_submit_runs_after_commit(self, make_wav, tmp_path, transcoded_dir):
+        """Test a job queued inside a transaction runs once it commits."""
+        from django.db import transaction
+
+        path = make_wav(tmp_path / 'ok.wav', seconds=0.1, rate=44100, channels=2)
+        pool = TranscodePool(max_workers=1)
+        with patch.object(pool, 'submit_now', wraps=pool.submit_now) as submit_now:
+            with transaction.atomic():
+                audio = _audio(path)
+                pool.submit(audio.id)
+                submit_now.assert_not_called()
+            submit_now.assert_called_once_with(audio.id)
+        pool.shutdown(wait=True)
+
+        audio.refresh_from_db()
+        assert audio.status == Audio.Status.READY
@@ -0,0 +1,110 @@
+"""
+Unit Tests for UpdateRunner
+
+Tests cover:
+- Output drained into the status log (no pipe stall)
+- Exit code and phase timing capture
+- Log rotation
+- Single running update at a time
+"""
+
+import json
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from data.lib.update_runner import UpdateRunner
+
+
+def _wait_finished(runner, timeout=10.0):
+    """Wait until the runner has recorded an exit code."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if runner.get_state().get('exit_code') is not None:
+            return runner.get_state()
+        time.sleep(0.05)
+    raise AssertionError("update process did not finish")
+
+
+@pytest.fixture
+def runner():
+    """UpdateRunner with a mocked Utility model (no database)."""
+    return UpdateRunner(utility_model=MagicMock())
+
+
+@pytest.mark.unit
+class TestUpdateRunner:
+    """Test UpdateRunner process handling."""
+
+    def test_large_output_does_not_stall(self, runner, tmp_path):
+        """Test output far larger than a pipe buffer is fully drained."""
+        log = tmp_path / 'status.log'
+        script = "import sys\nfor i in range(20000): print('x' * 40, i)\nsys.stderr.write('done\\n')"
+
+        runner.start([sys.executable, '-c', script], cwd=str(tmp_path), log_path=str(log))
+        state = _wait_finished(runner)
+
+        assert state['exit_code'] == 0
+        content = log.read_text()
+        assert content.count('\n') == 20001
+        assert content.endswith('done\n')
+        assert state['log_bytes'] == len(content.encode())
+
+    def test_exit_code_and_phases(self, runner, tmp_path):
+        """Test phase markers become timings and are not logged."""
+        log = tmp_path / 'status.log'
+        script = (
+            "import sys, time\n"
+            "print('##phase pull', flush=True)\n"
+            "print('pulling', flush=True)\n"
+            "time.sleep(0.1)\n"
+            "print('##phase reload', flush=True)\n"
+            "sys.exit(3)"
+        )
+
+        runner.start([sys.executable, '-c', script], cwd=str(tmp_path), log_path=str(log))
+        state = _wait_finished(runner)
+
+        assert state['exit_code'] == 3
+        assert [p['name'] for p in state['phases']] == ['pull', 'reload']
+        assert state['phases'][0]['duration'] >= 0.1
+        assert state['phases'][1]['duration'] is not None
+        assert log.read_text() == 'pulling\n'
+
+    def test_log_rotation(self, tmp_path):
+        """Test the log is rotated once it exceeds max_bytes."""
+        runner = UpdateRunner(utility_model=MagicMock(), max_bytes=1000)
+        log = tmp_path / 'status.log'
+        script = "for i in range(100): print('y' * 30)"
+
+        runner.start([sys.executable, '-c', script], cwd=str(tmp_path), log_path=str(log))
+        _wait_finished(runner)
+
+        assert (tmp_path / 'status.log.1').exists()
+        assert log.stat().st_size < 1000
+
+    def test_start_while_running_returns_same_pid(self, runner, tmp_path):
+        """Test a second start does not launch another update."""
+        log = tmp_path / 'status.log'
+        args = [sys.executable, '-c', 'import time; time.sleep(0.5)']
+
+        first = runner.start(args, cwd=str(tmp_path), log_path=str(log))
+        assert runner.is_running()
+        assert runner.start(args, cwd=str(tmp_path), log_path=str(log)) == first
+
+        _wait_finished(runner)
+        assert not runner.is_running()
+
+    def test_state_persisted(self, tmp_path):
+        """Test state is written to the Utility model."""
+        utility = MagicMock()
+        runner = UpdateRunner(utility_model=utility)
+
+        runner.start([sys.executable, '-c', 'pass'], cwd=str(tmp_path), log_path=str(tmp_path / 'status.log'))
+        runner._reader_thread.join(timeout=5)
+
+        kwargs = utility.objects.update_or_create.call_args[1]
+        assert kwargs['name'] == UpdateRunner.STATE_KEY
+        assert json.loads(kwargs['defaults']['value'])['exit_code'] == 0
@@ -1,13 +1,15 @@
 from django.shortcuts import render,get_object_or_404,redirect
 from django.http import JsonResponse,StreamingHttpResponse
+from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from data.models import Audio, Day, Bell, Schedule, Utility
 from datetime import datetime
-from data.tasks import play_sound,check_schedule
+from data.tasks import play_sound,check_schedule,wrap_with_bells
 import requests
 import os
 import shutil
+import io
 import json
 import time
 import math
@@ -17,9 +19,22 @@ import sys
 import subprocess
 import platform
 from functools import wraps
-from decouple import Config,RepositoryEnv
 from django.conf import settings
 from data.lib.process import is_process_running
+from data.lib.log_tail import read_log_chunk, format_sse
+from data.lib.update_runner import get_update_runner
+from data.lib.env_config import ENV_PATH, get_env_snapshot, invalidate_env_snapshot
+from data.lib.settings_store import get_settings_store
+from data.lib import timetable_io
+from data.lib.query_budget import get_query_stats
+from data.lib.keyset import keyset_page, parse_limit
+from data.lib.render_cache import cache_listing
+from data.lib.audio_metadata import ingest_audio, sequence_duration
+from data.lib.transcoder import get_transcode_pool, remove_playback_copy
+from data.lib.schedule_batch import (
+    ScheduleValidationError, serialize_schedule,
+    create_schedules, update_schedules, delete_schedules
+)
 from data.lib.platform_helpers import is_windows as is_windows_platform, restart_service
 from .tasks import stop_sound
 
@@ -27,21 +42,9 @@ def check_env_file(view_func):
     """Decorator to check if the .env file exists and required variables are set."""
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-        print(env_path)
-
-        if not os.path.exists(env_path):
-            return redirect('/setup')  # Redirect to setup page if .env is missing
-
-        config = Config(RepositoryEnv(env_path))
-
-        # Define required environment variables
-        required_vars = ["DEBUG", "SECRET_KEY","ALLOWED_HOSTS","CSRF_TRUSTED_ORIGINS"]  # Add more required keys if needed
-        missing_vars = [var for var in required_vars if not config(var, default=None)]
-
-        if missing_vars:
-            print("missing var")
-            return redirect('/setup')  # Redirect if required variables are missing
+        # Cached snapshot: at most one stat() per second, re-parsed only when .env changes
+        if not get_env_snapshot().is_complete:
+            return redirect('/setup')  # Redirect if .env is missing or required variables are missing
 
         return view_func(request, *args, **kwargs)
 
@@ -50,16 +53,14 @@ def check_env_file(view_func):
 #template zone
 @check_env_file
 def index(request):
-    audios = Audio.objects.all()
+    # ตารางเวลาและรายการเสียงโหลดทีละหน้าผ่าน /api/schedules/ และ /api/audios/
+    # วันและเสียงระฆังถูก cache ใน template (queryset จะ query เฉพาะตอน cache miss)
     days = Day.objects.all()
     bells = Bell.objects.all()
-    schedules = Schedule.objects.order_by('time')
 
     context = {
-        'audios': audios,
         'days': days,
         'bells': bells,
-        'schedules': schedules
     }
     return render(request, 'main.html', context)
 
@@ -81,21 +82,19 @@ def save_form(request):
                 print(f"Exception occurred: {str(e)}")
                 return JsonResponse({'error': 'Invalid time format. Must be in HH:MM format.'}, status=400)
 
-            schedule = Schedule(
-                time=time_obj.time(),
-                tell_time=tell_time == '1',
-                enable_bell_sound=enable_bell_sound == '1',
-                sound=Audio.objects.get(pk=selected_sound) if selected_sound else None,
-                bell_sound=Bell.objects.get(pk=selected_bell_sound) if enable_bell_sound == '1' and selected_bell_sound else None
-            )
-            schedule.save()
-
-            for day_id in selected_days:
-                day = Day.objects.get(pk=day_id)
-                schedule.notification_days.add(day)
+            create_schedules([{
+                'time': time_obj.strftime('%H:%M'),
+                'tell_time': tell_time == '1',
+                'enable_bell_sound': enable_bell_sound == '1',
+                'sound': int(selected_sound) if selected_sound else None,
+                'bell_sound': int(selected_bell_sound) if selected_bell_sound else None,
+                'days': [int(day_id) for day_id in selected_days],
+            }])
 
             return JsonResponse({'message': 'Form data saved successfully'}, status=200)
 
+        except ScheduleValidationError as e:
+            return JsonResponse({'error': str(e), 'errors': e.errors}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
@@ -103,11 +102,8 @@ def save_form(request):
         return JsonResponse({'error': 'Invalid request method'}, status=405)
     
 def sound(request):
-    audios = Audio.objects.all()
-    context = {
-        'audios': audios,
-    }
-    return render(request, 'sound.html', context)
+    # รายการเสียงโหลดทีละหน้าผ่าน /api/audios/
+    return render(request, 'sound.html')
 
 def setting(request):
     voice_api_key=Utility.objects.filter(name="voice_api_key").first()
@@ -126,8 +122,7 @@ def setting(request):
     return render(request, 'setting.html', context)
 
 def setup(request):
-    ENV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-    if os.path.exists(ENV_PATH):
+    if get_env_snapshot().exists:
         return redirect("/")  
     
     return render(request, "setup.html")
@@ -142,6 +137,7 @@ def delete_audio(request, audio_id):
             os.remove(audio.path)
         except Exception as e:
             print(f"Error deleting file: {e}")
+    remove_playback_copy(audio)
     audio.delete()
 
     return JsonResponse({'message': 'Audio deleted successfully.'})
@@ -175,7 +171,9 @@ def create_audio(request):
                     with open(temp_file, 'wb') as file:
                         file.write(resp.content)
                     audio=Audio(name=text,path=temp_file)
+                    ingest_audio(audio, save=False)  # duration, format, loudness, hash
                     audio.save()
+                    get_transcode_pool().submit(audio.id)  # แปลงเป็น format ของ mixer เบื้องหลัง
                 except Exception:
                     print(Exception)
                 return JsonResponse({"status":True,"msg":"Audio created successfully."}, status=200)
@@ -192,7 +190,7 @@ def create_audio(request):
 @require_http_methods(["GET"])
 def play_audio(request, audio_id):
     audio = get_object_or_404(Audio, pk=audio_id)
-    abs_dir = os.path.abspath(audio.path)
+    abs_dir = os.path.abspath(audio.playable_path)
     try:
         play_sound([abs_dir])  # Celery plays the sound in the background
     except Exception as e:
@@ -212,6 +210,176 @@ def delete_schedule(request, schedule_id):
     schedule.delete()
     return JsonResponse({'message': 'Schedule deleted successfully.'})
 
+# ?sort= ของรายการ -> ลำดับของ keyset (คอลัมน์สุดท้ายต้อง unique)
+SCHEDULE_SORTS = {
+    'time': ('time', 'id'),
+    '-time': ('-time', '-id'),
+    'id': ('id',),
+    '-id': ('-id',),
+}
+AUDIO_SORTS = {
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+    'id': ('id',),
+    '-id': ('-id',),
+}
+
+def _parse_clock(value):
+    """แปลง 'HH:MM' เป็น time (None ถ้าไม่ได้ส่งมา)"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%H:%M').time()
+
+def _list_schedules(request):
+    """
+    รายการตารางเวลาแบบ keyset pagination
+    ?limit=, ?cursor=, ?sort=time|-time|id|-id
+    ตัวกรอง: ?day= (id หรือชื่อวัน), ?sound=, ?bell_sound=, ?time_from=HH:MM, ?time_to=HH:MM
+    """
+    params = request.GET
+    sort = params.get('sort', 'time')
+    if sort not in SCHEDULE_SORTS:
+        return JsonResponse({'error': f'Invalid sort: {sort}'}, status=400)
+
+    schedules = Schedule.objects.select_related('sound', 'bell_sound').prefetch_related('notification_days')
+    try:
+        limit = parse_limit(params.get('limit'))
+        day = params.get('day')
+        if day:
+            if day.isdigit():
+                schedules = schedules.filter(notification_days__id=int(day))
+            else:
+                schedules = schedules.filter(Q(notification_days__name=day) | Q(notification_days__name_eng__iexact=day))
+        for field in ('sound', 'bell_sound'):
+            if params.get(field):
+                schedules = schedules.filter(**{f'{field}_id': int(params[field])})
+        time_from = _parse_clock(params.get('time_from'))
+        time_to = _parse_clock(params.get('time_to'))
+        if time_from:
+            schedules = schedules.filter(time__gte=time_from)
+        if time_to:
+            schedules = schedules.filter(time__lte=time_to)
+
+        rows, next_cursor = keyset_page(schedules, SCHEDULE_SORTS[sort], params.get('cursor'), limit)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'results': [serialize_schedule(schedule, include_names=True) for schedule in rows],
+        'next_cursor': next_cursor,
+        'limit': limit,
+    })
+
+@csrf_exempt
+@require_http_methods(["GET", "POST", "PATCH", "DELETE"])
+@cache_listing('schedules')
+def api_schedules(request):
+    """
+    JSON API สำหรับตารางเวลา
+    GET: รายการแบบ keyset pagination (ดู _list_schedules)
+    POST: {"schedules": [...]} สร้างหลายรายการ
+    PATCH: {"schedules": [{"id": ..., ...}]} แก้ไขหลายรายการ
+    DELETE: {"ids": [...]} ลบหลายรายการ
+    ทุกการเขียนทำใน transaction เดียว ถ้ามีรายการไหนผิดจะไม่บันทึกเลย
+    """
+    if request.method == 'GET':
+        return _list_schedules(request)
+
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Expected a JSON object'}, status=400)
+
+    try:
+        if request.method == 'POST':
+            created = create_schedules(data.get('schedules'))
+            return JsonResponse({'created': created}, status=201)
+        elif request.method == 'PATCH':
+            updated = update_schedules(data.get('schedules'))
+            return JsonResponse({'updated': updated})
+        else:  # DELETE
+            deleted = delete_schedules(data.get('ids'))
+            return JsonResponse({'deleted': deleted})
+    except ScheduleValidationError as e:
+        return JsonResponse({'error': str(e), 'errors': e.errors}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+@require_http_methods(["GET"])
+@cache_listing('audios')
+def api_audios(request):
+    """
+    รายการเสียงแบบ keyset pagination
+    ?limit=, ?cursor=, ?sort=name|-name|id|-id, ?q= (ค้นหาจากชื่อ)
+    """
+    params = request.GET
+    sort = params.get('sort', 'name')
+    if sort not in AUDIO_SORTS:
+        return JsonResponse({'error': f'Invalid sort: {sort}'}, status=400)
+
+    audios = Audio.objects.only('id', 'name', 'duration')
+    if params.get('q'):
+        audios = audios.filter(name__icontains=params['q'])
+    try:
+        limit = parse_limit(params.get('limit'))
+        rows, next_cursor = keyset_page(audios, AUDIO_SORTS[sort], params.get('cursor'), limit)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'results': [{'id': audio.id, 'name': audio.name, 'duration': audio.duration} for audio in rows],
+        'next_cursor': next_cursor,
+        'limit': limit,
+    })
+
+@require_http_methods(["GET"])
+def export_schedules(request):
+    """ส่งออกตารางเวลาทั้งหมด (?format=csv|json|ics) แบบ streaming"""
+    fmt = request.GET.get('format', 'json').lower()
+    if fmt not in timetable_io.EXPORTERS:
+        return JsonResponse({'error': f'Unsupported format: {fmt}'}, status=400)
+
+    content_type, extension = timetable_io.FORMATS[fmt]
+    response = StreamingHttpResponse(timetable_io.EXPORTERS[fmt](), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="timetable.{extension}"'
+    return response
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def import_schedules(request):
+    """
+    นำเข้าตารางเวลาจากไฟล์ CSV, JSON หรือ iCalendar
+    ไฟล์ส่งมาใน field 'file' (หรือเป็น request body), ?format= ถ้าไม่ระบุจะดูจากนามสกุลไฟล์
+    ?mode=replace จะลบตารางเวลาเดิมทั้งหมดก่อน
+    """
+    upload = request.FILES.get('file')
+    fmt = request.GET.get('format')
+    if not fmt and upload:
+        fmt = os.path.splitext(upload.name)[1].lstrip('.')
+    fmt = (fmt or '').lower()
+    if fmt == 'ical':
+        fmt = 'ics'
+    if fmt not in timetable_io.PARSERS:
+        return JsonResponse({'error': f'Unsupported format: {fmt or "unknown"}'}, status=400)
+
+    raw = upload if upload else io.BytesIO(request.body)
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        imported = timetable_io.import_timetable(stream, fmt, replace=request.GET.get('mode') == 'replace')
+    except ScheduleValidationError as e:
+        return JsonResponse({'error': str(e), 'errors': e.errors[:100]}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    finally:
+        stream.detach()
+
+    return JsonResponse({'imported': imported})
+
+# วินาทีที่รอเพิ่มจากความยาวเสียงก่อนลบไฟล์ text-to-speech ชั่วคราว
+TTS_PLAYBACK_MARGIN = 5
+
 @require_http_methods(["POST"])
 def text_to_speech(request):
     try:
@@ -265,8 +433,11 @@ def text_to_speech(request):
                 try:
                     with open(temp_file, 'wb') as file:
                         file.write(resp.content)
-                    play_sound([temp_file])
-                    time.sleep(rounded_duration)
+                    playback = play_sound([temp_file])
+                    # รอจนเล่นจบก่อนลบไฟล์ชั่วคราว โดยจำกัดเวลาตามความยาวที่อ่านจาก header
+                    # (ใช้ค่าจาก API กับไฟล์ที่อ่านไม่ได้)
+                    expected = sequence_duration(wrap_with_bells([temp_file]), default=rounded_duration)
+                    playback.join(timeout=expected + TTS_PLAYBACK_MARGIN)
                 finally:
                     shutil.rmtree(temp_dir)
                     pass
@@ -307,8 +478,8 @@ def add_voice_api_key(request):
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_setup(request):
-    ENV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-    if os.path.exists(ENV_PATH):
+    # Always stat here (max_age=0) so two setup requests cannot both write .env
+    if get_env_snapshot(max_age=0).exists:
         return JsonResponse({"error": ".env file already exists."}, status=400)
 
     """Handles the setup process for generating the .env file."""
@@ -340,6 +511,7 @@ def api_setup(request):
                 env_file.write(f"DEBUG=False\n")
                 env_file.write(f"ALLOWED_HOSTS={domain_no_port}\n")
                 env_file.write(f"CSRF_TRUSTED_ORIGINS={domain}\n")
+            invalidate_env_snapshot()
 
             # Restart service (Linux only, Windows doesn't support systemd)
             if not is_windows_platform():
@@ -436,19 +608,36 @@ def api_update(request):
         # ให้สิทธิ์ execute กับ shell script
         subprocess.run(["chmod", "+x", SCRIPT_PATH], check=True)
         
-        # รัน shell script
-        process = subprocess.Popen(
-            [SCRIPT_PATH], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, shell=True, cwd=settings.BASE_DIR
-        )
+        # รัน shell script; output ถูกอ่านโดย reader thread และเขียนลง STATUS_FILE_PATH
+        pid = get_update_runner().start([SCRIPT_PATH], cwd=settings.BASE_DIR, log_path=STATUS_FILE_PATH)
 
         return JsonResponse({
             "message": "Update process started",
-            "process_id": process.pid
+            "process_id": pid
         }, status=200)
 
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
+
+def _update_process_status(pid):
+    """Return (is_active, runner_state) for an update process id."""
+    state = get_update_runner().get_state()
+    if state.get("pid") != pid:
+        return is_process_running(pid), {}
+    if state.get("exit_code") is not None:
+        return False, state
+    return is_process_running(pid), state
+
+
+def _status_payload(status, state):
+    """Status fields for progress responses, including exit code and phase timings when known."""
+    payload = {"status": status}
+    if state:
+        payload["exit_code"] = state.get("exit_code")
+        payload["phases"] = state.get("phases", [])
+    return payload
+
 @require_http_methods(["GET"])
 def api_process(request, process_id): # Changed parameter name here
     if platform.system() == "Windows":
@@ -459,8 +648,21 @@ def api_process(request, process_id): # Changed parameter name here
     except ValueError:
         return JsonResponse({"error": "Invalid process ID format"}, status=400)
 
+    process_active, state = _update_process_status(pid)
+    status = "running" if process_active else "completed_or_not_found"
+
+    # Incremental mode: ?offset=N returns only the bytes appended since N
+    if 'offset' in request.GET:
+        try:
+            offset = int(request.GET['offset'])
+        except ValueError:
+            return JsonResponse({"error": "Invalid offset"}, status=400)
+        log_chunk, offset = read_log_chunk(STATUS_FILE_PATH, offset, final=not process_active)
+        payload = _status_payload(status, state)
+        payload.update({"log": log_chunk, "offset": offset})
+        return JsonResponse(payload, status=200)
+
     log_content = "No log data available."
-    process_active = is_process_running(pid)
 
     if os.path.exists(STATUS_FILE_PATH):
         try:
@@ -476,10 +678,67 @@ def api_process(request, process_id): # Changed parameter name here
         else:
             log_content = "Process is not running and no log file found."
 
-    if process_active:
-        return JsonResponse({"status": "running", "log": log_content}, status=200)
-    else:
-        return JsonResponse({"status": "completed_or_not_found", "log": log_content}, status=200)
+    return JsonResponse({"status": status, "log": log_content}, status=200)
+
+
+SSE_POLL_INTERVAL = 0.5  # seconds between log checks
+SSE_HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments
+SSE_MAX_DURATION = 30 * 60  # give up after 30 minutes; EventSource reconnects with Last-Event-ID
+
+
+def _process_event_stream(pid, offset):
+    """Yield SSE messages with new log lines until the process exits."""
+    started = last_sent = time.monotonic()
+    yield format_sse({"status": "running", "offset": offset}, event="status", event_id=offset)
+
+    while True:
+        process_active, state = _update_process_status(pid)
+
+        # Drain everything written so far; after exit include a trailing partial line
+        while True:
+            log_chunk, offset = read_log_chunk(STATUS_FILE_PATH, offset, final=not process_active)
+            if not log_chunk:
+                break
+            yield format_sse({"log": log_chunk}, event="log", event_id=offset)
+            last_sent = time.monotonic()
+
+        if not process_active:
+            payload = _status_payload("completed_or_not_found", state)
+            payload["offset"] = offset
+            yield format_sse(payload, event="status", event_id=offset)
+            return
+
+        now = time.monotonic()
+        if now - started >= SSE_MAX_DURATION:
+            return
+        if now - last_sent >= SSE_HEARTBEAT_INTERVAL:
+            yield ": keep-alive\n\n"
+            last_sent = now
+
+        time.sleep(SSE_POLL_INTERVAL)
+
+
+@require_http_methods(["GET"])
+def api_process_stream(request, process_id):
+    """Stream update progress as Server-Sent Events (tails the status log by byte offset)."""
+    if platform.system() == "Windows":
+        return JsonResponse({"error": "Windows is not supported for this feature"}, status=400)
+
+    try:
+        pid = int(process_id)
+    except ValueError:
+        return JsonResponse({"error": "Invalid process ID format"}, status=400)
+
+    # Resume from Last-Event-ID on reconnect, or from ?offset= on first connect
+    try:
+        offset = int(request.headers.get("Last-Event-ID") or request.GET.get("offset", 0))
+    except ValueError:
+        offset = 0
+
+    response = StreamingHttpResponse(_process_event_stream(pid, offset), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable proxy buffering (nginx)
+    return response
 
 @csrf_exempt
 def upload_file(request):
@@ -503,14 +762,20 @@ def upload_file(request):
             for chunk in uploaded_file.chunks():
                 destination.write(chunk)
 
-        # Save file info to the Audio model
-        audio = Audio.objects.create(name=uploaded_file.name, path=file_path)
+        # Save file info and header metadata to the Audio model
+        audio = Audio(name=uploaded_file.name, path=file_path)
+        ingest_audio(audio, save=False)
+        audio.save()
+        # แปลงเป็น format ของ mixer (44.1 kHz 16-bit stereo) เบื้องหลัง เก็บไฟล์ต้นฉบับไว้
+        get_transcode_pool().submit(audio.id)
 
         return JsonResponse({
             "message": f"ไฟล์ {uploaded_file.name} อัพโหลดสำเร็จ!",
             "id": audio.id,
             "name": audio.name,
-            "path": audio.path
+            "path": audio.path,
+            "duration": audio.duration,
+            "status": audio.status,
         })
 
     return JsonResponse({"error": "อัพโหลดไม่สำเร็จ"}, status=400)
@@ -705,16 +970,11 @@ def ap_start(request):
         
         if success:
             # บันทึก config
+            store = get_settings_store()
             if ssid:
-                Utility.objects.update_or_create(
-                    name='ap_ssid',
-                    defaults={'value': ssid}
-                )
+                store.set('ap_ssid', ssid)
             if ap_info.get('password'):
-                Utility.objects.update_or_create(
-                    name='ap_password',
-                    defaults={'value': ap_info['password']}
-                )
+                store.set('ap_password', ap_info['password'])
             
             return JsonResponse({
                 'success': True,
@@ -741,8 +1001,7 @@ def ap_stop(request):
         
         if success:
             # ลบ fallback state
-            Utility.objects.filter(name='in_fallback_mode').delete()
-            Utility.objects.filter(name='wifi_back_time').delete()
+            get_settings_store().delete('in_fallback_mode', 'wifi_back_time')
         
         return JsonResponse({
             'success': success,
@@ -758,14 +1017,12 @@ def ap_config(request):
     """ดู/แก้ไข AP configuration"""
     if request.method == 'GET':
         try:
-            ap_ssid = Utility.objects.filter(name='ap_ssid').first()
-            ap_password = Utility.objects.filter(name='ap_password').first()
-            ap_channel = Utility.objects.filter(name='ap_channel').first()
+            store = get_settings_store()
             
             return JsonResponse({
-                'ssid': ap_ssid.value if ap_ssid else 'SchoolAlarm-Setup',
-                'password': ap_password.value if ap_password else '',
-                'channel': int(ap_channel.value) if ap_channel else 6
+                'ssid': store.get('ap_ssid', default='SchoolAlarm-Setup'),
+                'password': store.get('ap_password', default=''),
+                'channel': store.get('ap_channel')
             })
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -773,24 +1030,16 @@ def ap_config(request):
     else:  # POST
         try:
             data = json.loads(request.body)
+            store = get_settings_store()
             
             if 'ssid' in data:
-                Utility.objects.update_or_create(
-                    name='ap_ssid',
-                    defaults={'value': data['ssid']}
-                )
+                store.set('ap_ssid', data['ssid'])
             
             if 'password' in data:
-                Utility.objects.update_or_create(
-                    name='ap_password',
-                    defaults={'value': data['password']}
-                )
+                store.set('ap_password', data['password'])
             
             if 'channel' in data:
-                Utility.objects.update_or_create(
-                    name='ap_channel',
-                    defaults={'value': str(data['channel'])}
-                )
+                store.set('ap_channel', data['channel'])
             
             return JsonResponse({
                 'success': True,
@@ -808,10 +1057,7 @@ def wifi_monitor_toggle(request):
         data = json.loads(request.body)
         enabled = data.get('enabled', True)
         
-        Utility.objects.update_or_create(
-            name='wifi_monitor_enabled',
-            defaults={'value': 'true' if enabled else 'false'}
-        )
+        get_settings_store().set('wifi_monitor_enabled', bool(enabled))
         
         return JsonResponse({
             'success': True,
@@ -827,18 +1073,21 @@ def wifi_monitor_toggle(request):
 def wifi_monitor_status(request):
     """ดึงสถานะ WiFi monitoring"""
     try:
-        enabled = Utility.objects.filter(name='wifi_monitor_enabled').first()
-        in_fallback = Utility.objects.filter(name='in_fallback_mode').first()
-        last_ssid = Utility.objects.filter(name='last_known_ssid').first()
-        fallback_count = Utility.objects.filter(name='fallback_count').first()
-        last_fallback = Utility.objects.filter(name='last_fallback_time').first()
+        store = get_settings_store()
+        status = {
+            # ยังไม่เคยตั้งค่า = แสดงว่าเปิดอยู่
+            'enabled': store.get('wifi_monitor_enabled', default=True),
+            **store.get_many('in_fallback_mode', 'last_known_ssid', 'fallback_count', 'last_fallback_time')
+        }
         
-        return JsonResponse({
-            'enabled': enabled.value == 'true' if enabled else True,
-            'in_fallback_mode': in_fallback.value == 'true' if in_fallback else False,
-            'last_known_ssid': last_ssid.value if last_ssid else None,
-            'fallback_count': int(fallback_count.value) if fallback_count else 0,
-            'last_fallback_time': float(last_fallback.value) if last_fallback else None
-        })
+        return JsonResponse(status)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def query_stats(request):
+    """สถิติจำนวน query ต่อ URL ของ process นี้ (เฉพาะตอน DEBUG)"""
+    if not settings.DEBUG:
+        return JsonResponse({'error': 'Not found'}, status=404)
+    return JsonResponse(get_query_stats())
@@ -1,35 +1,46 @@
 #!/bin/bash
 
-STATUS_FILE="process_status.log"
+# Output goes to stdout/stderr only. When started from the web UI the update
+# runner (data/lib/update_runner.py) drains it into process_status.log.
 RELOAD_SCRIPT="scripts/reload_django.sh"
 
+# The reload script restarts the web service that reads our output; ignore
+# SIGPIPE so the update still finishes if that reader goes away.
+trap '' PIPE
+
 # ฟังก์ชันช่วยในการเขียน log
 log_message() {
-    echo "[$(date '+%Y-%m-%d %H:%M:%S')] $1" | tee -a "$STATUS_FILE"
+    echo "[$(date '+%Y-%m-%d %H:%M:%S')] $1"
+}
+
+# ระบุขั้นตอน (update runner ใช้จับเวลาแต่ละ phase)
+phase() {
+    echo "##phase $1"
 }
 
-# ล้าง log เก่า และเริ่มต้น process ใหม่
-echo "[$(date '+%Y-%m-%d %H:%M:%S')] --- Update Process Started ---" > "$STATUS_FILE"
+log_message "--- Update Process Started ---"
 
 log_message "⏳ Starting update process..."
+phase "reset"
 log_message "⚡ Resetting local changes..."
-git reset --hard origin/prod &>> "$STATUS_FILE"
+git reset --hard origin/prod 2>&1
 
 log_message "🧹 Cleaning untracked files..."
-git clean -fd &>> "$STATUS_FILE"
+git clean -fd 2>&1
 
+phase "pull"
 log_message "⬇️ Pulling latest code from branch 'prod'..."
-GIT_OUTPUT=$(git pull origin prod --force 2>&1 | tee -a "$STATUS_FILE")
+git pull origin prod --force 2>&1
 EXIT_CODE=$?
 
 if [ $EXIT_CODE -eq 0 ]; then
     log_message "✅ Git pull completed successfully."
 
-    # ✅ ใช้ `exec` เพื่อให้ log ครบทุกบรรทัด
     if [ -f "$RELOAD_SCRIPT" ]; then
+        phase "reload"
         log_message "🔄 Running reload script: $RELOAD_SCRIPT"
         # เรียกผ่าน bash โดยตรงเพื่อไม่ต้องพึ่งสิทธิ์ execute
-        exec bash "$RELOAD_SCRIPT" 2>&1 | tee -a "$STATUS_FILE"
+        bash "$RELOAD_SCRIPT" 2>&1
     else
         log_message "⚠️ Reload script not found!"
     fi
@@ -38,3 +49,4 @@ else
 fi
 
 log_message "✅ Update process finished."
+exit $EXIT_CODE
@@ -67,6 +67,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    'data.lib.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,6 +80,39 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'thai_school_alarm_web.urls'
 
+# Query budget middleware (data/lib/query_budget.py): requests running more
+# queries than this are logged with their repeated SQL shapes.
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=True, cast=bool)
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=20, cast=int)
+# Per-view overrides keyed by URL name, e.g. {'index': 10}
+QUERY_BUDGETS = {}
+
+# Cache framework. Local memory by default (no Redis needed); set CACHE_DIR to
+# use the file backend when several worker processes must share invalidations.
+CACHE_DIR = config('CACHE_DIR', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    } if CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'thai-school-alarm',
+    }
+}
+
+# Rendered fragments and listing pages (data/lib/render_cache.py) are keyed by
+# a generation number bumped on every Schedule/Audio/Bell/Day write.
+RENDER_CACHE_TIMEOUT = config('RENDER_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Background workers converting uploads to the mixer format (data/lib/transcoder.py)
+TRANSCODE_WORKERS = config('TRANSCODE_WORKERS', default=2, cast=int)
+
+# Integrated loudness clips are turned down to at playback (data/lib/loudness.py)
+LOUDNESS_TARGET_LUFS = config('LOUDNESS_TARGET_LUFS', default=-23.0, cast=float)
+
+# RAM kept for decoded short clips played by AudioPlayer (data/lib/clip_cache.py)
+CLIP_CACHE_MB = config('CLIP_CACHE_MB', default=32, cast=int)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -90,6 +124,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'data.lib.render_cache.render_cache_context',
             ],
         },
     },
@@ -24,6 +24,10 @@ urlpatterns = [
     path("", views.index, name='index'),
     path("save_form",views.save_form, name='save_form'),
     path('delete_schedule/<int:schedule_id>/', views.delete_schedule, name='delete_schedule'),
+    path('api/schedules/', views.api_schedules, name='api_schedules'),
+    path('api/audios/', views.api_audios, name='api_audios'),
+    path('api/schedules/export/', views.export_schedules, name='export_schedules'),
+    path('api/schedules/import/', views.import_schedules, name='import_schedules'),
     path("speech",views.text_to_speech, name='text_to_speech'),
     path("sound",views.sound, name='sound'),
     path("setting",views.setting, name='setting'),
@@ -36,7 +40,9 @@ urlpatterns = [
     path('api/version/', views.get_current_version, name='get_current_version'),
     path('api/update/', views.api_update, name='api_update'),
     path('api/process/<str:process_id>/', views.api_process, name='api_process'),
+    path('api/process/<str:process_id>/stream/', views.api_process_stream, name='api_process_stream'),
     path('api/upload/', views.upload_file, name='upload_file'),
+    path('api/debug/query-stats/', views.query_stats, name='query_stats'),
     path("stop_audio/", views.stop_audio, name="stop_audio"),
     
     # WiFi Management API